@@ -1,5 +1,6 @@
+import os
 from argparse import ArgumentParser
-from dve.app import make_app, make_wsgi_app
+from dve.app import make_app, make_wsgi_app, default_app_config_filepath
 # make_wsgi_app MUST be imported here
 
 
@@ -28,9 +29,15 @@ if __name__ == "__main__":
         choices=log_level_choices,
         default=None,
     )
+    parser.add_argument(
+        "-c",
+        "--config",
+        help="App config filepath",
+        default=os.getenv("DVE_APP_CONFIG", default_app_config_filepath),
+    )
     args = parser.parse_args()
     loglevel = args.loglevel or ("DEBUG" if args.debug else "INFO")
-    app = make_app()
+    app = make_app(app_config_filepath=args.config)
     app.run_server(
         host='0.0.0.0',
         port=5000,
@@ -0,0 +1,53 @@
+"""
+Dash callback requests, made as the browser makes them. Used by the
+benchmarks (`conftest.py`) and the load test (`loadtest.py`).
+"""
+
+
+def output_spec(output):
+    component_id, component_property = output.rsplit(".", 1)
+    return {"id": component_id, "property": component_property}
+
+
+def callback_body(output, dependency, values, changed):
+    """
+    Return the body of a Dash callback request.
+
+    :param output: Callback id, i.e., its output(s), as in `_dash-dependencies`
+        and `app.callback_map`.
+    :param dependency: The callback's inputs and state (items `inputs` and
+        `state`), as in `_dash-dependencies` or `app.callback_map`.
+    :param values: Current component property values, keyed by
+        `"<id>.<property>"`.
+    :param changed: Component properties (`"<id>.<property>"`) that have
+        changed. Those that are inputs of the callback triggered it.
+    :return: dict
+    """
+    # Callback ids are "<id>.<property>" for a single output, and
+    # "..<id>.<property>...<id>.<property>.." for multiple outputs.
+    if output.startswith(".."):
+        outputs = [output_spec(item) for item in output[2:-2].split("...")]
+    else:
+        outputs = output_spec(output)
+
+    def with_values(specs):
+        return [
+            {**spec, "value": values.get(f"{spec['id']}.{spec['property']}")}
+            for spec in specs
+        ]
+
+    inputs = dependency["inputs"]
+    return {
+        "output": output,
+        "outputs": outputs,
+        "inputs": with_values(inputs),
+        "state": with_values(dependency.get("state", [])),
+        "changedPropIds": [
+            prop_id
+            for prop_id in changed
+            if any(
+                prop_id == f"{spec['id']}.{spec['property']}"
+                for spec in inputs
+            )
+        ],
+    }
@@ -0,0 +1,123 @@
+"""
+Fixtures for the benchmark suite. See "Benchmarks" in `docs/testing.md`.
+"""
+import os
+
+import pytest
+
+import dve.cache_stats
+import dve.config.snapshot
+import dve.synthetic_data
+from callback_requests import callback_body
+from dve.app import make_app
+from dve.config.index import compile_config
+
+
+# Design variable and climate regime combinations benchmarked. Between them
+# they cover the kinds of data files: rasters with and without a time
+# dimension, ratio and non-ratio change factors, and shared station files.
+dv_regimes = [
+    ("HDD", "historical"),
+    ("HDD", "future"),
+    ("RL50", "historical"),
+    ("RL50", "future"),
+    ("DRWP5", "future"),
+]
+dvs = sorted({dv for dv, _ in dv_regimes})
+
+future_dataset_id = "2.0"
+
+
+def clear_caches():
+    """Empty all data caches, so that the next access is a cold one."""
+    for cache in dve.cache_stats.thread_safe_caches:
+        cache.clear()
+    for function in dve.cache_stats.lru_caches.values():
+        function.cache_clear()
+
+
+@pytest.fixture(scope="session")
+def app_config_filepath(tmp_path_factory):
+    """
+    Filepath of the app configuration for the synthetic data set. The data
+    set is generated unless environment variable `DVE_BENCHMARK_DATA` names
+    a directory that already contains one (which saves time on repeated
+    runs). Environment variable `DVE_BENCHMARK_REFINE` (default 1) sets the
+    refinement of the model grid.
+    """
+    output_dir = os.environ.get("DVE_BENCHMARK_DATA")
+    if output_dir:
+        filepath = os.path.join(output_dir, "app-config.yml")
+        if os.path.exists(filepath):
+            return filepath
+    else:
+        output_dir = str(tmp_path_factory.mktemp("synthetic-data"))
+    return dve.synthetic_data.generate(
+        output_dir,
+        dvs=dvs,
+        refine=int(os.environ.get("DVE_BENCHMARK_REFINE", 1)),
+    )
+
+
+@pytest.fixture(scope="session")
+def config(app_config_filepath):
+    config = dve.config.snapshot.load_config(app_config_filepath)
+    config["index"] = compile_config(config)
+    return config
+
+
+@pytest.fixture(scope="session")
+def app(app_config_filepath):
+    return make_app(app_config_filepath=app_config_filepath)
+
+
+@pytest.fixture(scope="session")
+def post_callback(app):
+    """
+    Return a function that makes a Dash callback request, as the browser
+    does, and returns the response. The callback is identified by its
+    output(s), as in `app.callback_map`; its input and state values are
+    given by a dict keyed by `"<id>.<property>"`. Request headers (e.g.,
+    `Accept-Encoding`) are optional.
+    """
+    client = app.server.test_client()
+    path = f"{app.config.routes_pathname_prefix}_dash-update-component"
+
+    def post(output, values, changed, headers=None):
+        body = callback_body(
+            output, app.callback_map[output], values, changed
+        )
+        response = client.post(path, json=body, headers=headers)
+        response.close()
+        assert response.status_code in (200, 204), response.data[:1000]
+        return response
+
+    return post
+
+
+@pytest.fixture(params=["cold", "warm"])
+def cache(request):
+    return request.param
+
+
+@pytest.fixture
+def run(benchmark, cache):
+    """
+    Return a function that benchmarks a function with cold or warm caches.
+    With cold caches, the caches are cleared before every round. With warm
+    caches, the function is run once before benchmarking.
+    """
+
+    def run(function, *args, **kwargs):
+        if cache == "cold":
+            return benchmark.pedantic(
+                function,
+                args=args,
+                kwargs=kwargs,
+                setup=clear_caches,
+                rounds=5,
+            )
+        function(*args, **kwargs)
+        return benchmark(function, *args, **kwargs)
+
+    return run
@@ -0,0 +1,484 @@
+"""
+Multi-user load test of the app over HTTP.
+
+Simulated users replay a scenario (a sequence of requests, mostly Dash
+callback requests) against a running app, concurrently, for a fixed time at
+each of several concurrency levels. For each level, the harness reports
+throughput and latency percentiles, overall and optionally per step.
+
+The app under test is either already running (`--url`), or started by the
+harness from an app configuration (`--app-config`), with the Flask
+development server (`--server werkzeug`) or with Gunicorn
+(`--server gunicorn`) for each combination of `--workers` and `--threads`.
+Use the synthetic data set (`python -m dve.synthetic_data`) to load test
+without the production data.
+
+Scenarios are JSON files. A scenario is an object with these items:
+
+- `name`: name of scenario.
+- `initial`: initial values of the component properties that are inputs
+  to callbacks, keyed by `"<id>.<property>"`.
+- `steps`: list of steps. Each step has a `name` and an optional `think`
+  time (seconds) to wait after it, and is one of:
+  - `{"get": [<path>, ...]}`: GET requests (paths relative to the app's
+    base path), e.g., for a page load.
+  - `{"set": {<id>.<property>: <value>, ...}, "callbacks": [<output>, ...]}`:
+    update component property values, as a user's action would, and make
+    the callback requests that the update triggers (identified by their
+    outputs, as in `_dash-dependencies`).
+  - `{"body": <request body>}`: a literal Dash callback request.
+
+A file of Dash callback requests captured from the app (see `dve.capture`)
+can also be given as a scenario; each captured request is a `body` step,
+with the captured pause before the next request as its think time.
+
+Example, from the repository root directory:
+
+```
+python -m dve.synthetic_data /tmp/dve-synthetic
+python benchmarks/loadtest.py --app-config /tmp/dve-synthetic/app-config.yml \
+    --server gunicorn --workers 1 2 --threads 1 4 --users 1 2 4 8 16
+```
+"""
+import argparse
+import gzip
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+from collections import defaultdict
+from time import perf_counter
+
+import brotli
+import numpy as np
+
+from callback_requests import callback_body
+
+
+default_scenario_filepath = os.path.join(
+    os.path.dirname(__file__), "scenarios", "typical.json"
+)
+
+percentiles = (50, 90, 95, 99)
+
+
+# Scenarios
+
+
+def load_capture(filepath, max_think=10):
+    """
+    Return a scenario consisting of the Dash callback requests in a capture
+    file (see `dve.capture`).
+    """
+    with open(filepath) as file:
+        records = [json.loads(line) for line in file if line.strip()]
+    steps = []
+    for record, next_record in zip(records, records[1:] + [None]):
+        think = (
+            0
+            if next_record is None
+            else min(max(next_record["time"] - record["time"], 0), max_think)
+        )
+        steps.append(
+            {
+                "name": record["body"].get("output", "callback"),
+                "body": record["body"],
+                "think": think,
+            }
+        )
+    return {
+        "name": os.path.basename(filepath),
+        "initial": {},
+        "steps": steps,
+    }
+
+
+def load_scenario(filepath):
+    if filepath.endswith(".jsonl"):
+        return load_capture(filepath)
+    with open(filepath) as file:
+        return json.load(file)
+
+
+# HTTP
+
+
+# Decoders of response content, by `Content-Encoding`. Requests accept
+# compressed responses, as browsers do, so that the app handles them as it
+# does in use (see `dve.compression`).
+decoders = {"gzip": gzip.decompress, "br": brotli.decompress}
+
+
+class Client:
+    """
+    An HTTP client holding a persistent connection, reconnecting when the
+    server closes it.
+    """
+
+    def __init__(self, url, timeout=600):
+        parts = urllib.parse.urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.base_path = parts.path.rstrip("/") + "/"
+        self.timeout = timeout
+        self.connection = None
+
+    def request(self, method, path, body=None):
+        """
+        Make a request and read the response. Return the status and the
+        body, decoded.
+        """
+        headers = {"Accept-Encoding": "gzip, br"}
+        if body is not None:
+            body = json.dumps(body).encode()
+            headers["Content-Type"] = "application/json"
+        for attempt in (1, 2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(
+                    self.host, self.port, timeout=self.timeout
+                )
+            try:
+                self.connection.request(
+                    method, self.base_path + path, body=body, headers=headers
+                )
+                response = self.connection.getresponse()
+                data = response.read()
+                encoding = response.getheader("Content-Encoding")
+                if encoding in decoders:
+                    data = decoders[encoding](data)
+                if response.getheader("Connection", "").lower() == "close":
+                    self.close()
+                return response.status, data
+            except (http.client.HTTPException, ConnectionError):
+                self.close()
+                if attempt == 2:
+                    raise
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+def wait_until_ready(url, process=None, timeout=600):
+    """Wait until the app at `url` responds."""
+    client = Client(url, timeout=10)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError("Server exited before becoming ready")
+        try:
+            status, _ = client.request("GET", "_dash-layout")
+            if status == 200:
+                return
+        except (OSError, http.client.HTTPException):
+            pass
+        time.sleep(1)
+    raise RuntimeError(f"Server at {url} not ready after {timeout} s")
+
+
+# Simulated users
+
+
+class User:
+    """
+    A simulated user, who replays a scenario repeatedly until a deadline.
+    """
+
+    def __init__(self, url, scenario, dependencies, think_scale, results):
+        self.client = Client(url)
+        self.scenario = scenario
+        self.dependencies = dependencies
+        self.think_scale = think_scale
+        self.results = results
+
+    def record(self, name, elapsed, status):
+        self.results.append((name, elapsed, status))
+
+    def timed(self, name, method, path, body=None):
+        start = perf_counter()
+        try:
+            status, _ = self.client.request(method, path, body)
+        except (OSError, http.client.HTTPException):
+            status = None
+        self.record(name, perf_counter() - start, status)
+
+    def run_scenario(self, deadline):
+        values = dict(self.scenario.get("initial", {}))
+        for step in self.scenario["steps"]:
+            if time.time() >= deadline:
+                return
+            name = step["name"]
+            if "get" in step:
+                for path in step["get"]:
+                    self.timed(name, "GET", path)
+            elif "body" in step:
+                self.timed(name, "POST", "_dash-update-component", step["body"])
+            else:
+                changed = list(step.get("set", {}))
+                values.update(step.get("set", {}))
+                for output in step.get("callbacks", []):
+                    body = callback_body(
+                        output, self.dependencies[output], values, changed
+                    )
+                    self.timed(name, "POST", "_dash-update-component", body)
+            think = step.get("think", 0) * self.think_scale
+            if think:
+                time.sleep(think)
+
+    def run(self, deadline):
+        try:
+            while time.time() < deadline:
+                self.run_scenario(deadline)
+        finally:
+            self.client.close()
+
+
+def run_level(url, scenario, dependencies, users, duration, think_scale):
+    """
+    Run `users` simulated users concurrently for `duration` seconds. Return
+    a list of (step name, elapsed seconds, HTTP status) for all requests,
+    and the actual duration.
+    """
+    results = []
+    deadline = time.time() + duration
+    threads = [
+        threading.Thread(
+            target=User(url, scenario, dependencies, think_scale, results).run,
+            args=(deadline,),
+        )
+        for _ in range(users)
+    ]
+    start = perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, perf_counter() - start
+
+
+def summarize(results, elapsed):
+    """Return throughput and latency statistics for a list of results."""
+    latencies = np.array([r[1] for r in results]) * 1000
+    errors = sum(1 for r in results if r[2] is None or r[2] >= 400)
+    summary = {
+        "requests": len(results),
+        "errors": errors,
+        "throughput": len(results) / elapsed if elapsed else 0,
+    }
+    for p in percentiles:
+        summary[f"p{p}"] = (
+            float(np.percentile(latencies, p)) if len(latencies) else None
+        )
+    summary["max"] = float(latencies.max()) if len(latencies) else None
+    return summary
+
+
+# Servers
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(server, app_config, port, workers=1, threads=1):
+    """
+    Start the app in a subprocess, with the Flask development server or
+    Gunicorn. Return the process.
+    """
+    env = {**os.environ, "DVE_APP_CONFIG": app_config}
+    if server == "gunicorn":
+        command = [
+            "gunicorn",
+            f"--bind=127.0.0.1:{port}",
+            f"--workers={workers}",
+            f"--threads={threads}",
+            "--timeout=600",
+            "app:make_wsgi_app()",
+        ]
+    else:
+        command = [
+            sys.executable,
+            "-c",
+            "import app; "
+            f"app.make_wsgi_app().run(host='127.0.0.1', port={port}, "
+            "threaded=True)",
+        ]
+    return subprocess.Popen(
+        command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+# Reporting
+
+
+def format_row(row):
+    def ms(value):
+        return "-" if value is None else f"{value:.0f}"
+
+    return (
+        f"{row['server']:>9} {row['workers']:>7} {row['threads']:>7} "
+        f"{row['users']:>5} {row['step'][:32]:<32} {row['requests']:>8} "
+        f"{row['errors']:>6} {row['throughput']:>8.1f} "
+        + " ".join(f"{ms(row[f'p{p}']):>7}" for p in percentiles)
+        + f" {ms(row['max']):>7}"
+    )
+
+
+header = (
+    f"{'server':>9} {'workers':>7} {'threads':>7} {'users':>5} "
+    f"{'step':<32} {'requests':>8} {'errors':>6} {'req/s':>8} "
+    + " ".join(f"{f'p{p} ms':>7}" for p in percentiles)
+    + f" {'max ms':>7}"
+)
+
+
+def load_test(url, scenario, args, server="-", workers="-", threads="-"):
+    """
+    Run the scenario at each concurrency level against the app at `url`.
+    Return a list of report rows.
+    """
+    client = Client(url)
+    status, data = client.request("GET", "_dash-dependencies")
+    client.close()
+    if status != 200:
+        raise RuntimeError(f"Could not get callback dependencies: {status}")
+    dependencies = {d["output"]: d for d in json.loads(data)}
+
+    # Warm up: one user, once through the scenario, so that the data caches
+    # are as they would be in a running app.
+    if args.warm_up:
+        User(url, scenario, dependencies, 0, []).run_scenario(float("inf"))
+
+    rows = []
+    for users in args.users:
+        results, elapsed = run_level(
+            url, scenario, dependencies, users, args.duration, args.think_scale
+        )
+        groups = {"(all)": results}
+        if args.by_step:
+            by_step = defaultdict(list)
+            for result in results:
+                by_step[result[0]].append(result)
+            groups.update(by_step)
+        for step, step_results in groups.items():
+            row = {
+                "server": server,
+                "workers": workers,
+                "threads": threads,
+                "users": users,
+                "step": step,
+                **summarize(step_results, elapsed),
+            }
+            print(format_row(row), flush=True)
+            rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load test the app with simulated users"
+    )
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument(
+        "--url", help="Base URL of a running app (e.g. http://localhost:5000/)"
+    )
+    target.add_argument(
+        "--app-config", help="App config filepath of an app to start"
+    )
+    parser.add_argument(
+        "--server",
+        choices=("werkzeug", "gunicorn"),
+        default="gunicorn",
+        help="Server with which to start the app (default: gunicorn)",
+    )
+    parser.add_argument(
+        "--workers", type=int, nargs="+", default=[1], help="Gunicorn workers"
+    )
+    parser.add_argument(
+        "--threads", type=int, nargs="+", default=[1], help="Gunicorn threads"
+    )
+    parser.add_argument(
+        "--scenario",
+        default=default_scenario_filepath,
+        help="Scenario file (.json), or capture file (.jsonl)",
+    )
+    parser.add_argument(
+        "--users",
+        type=int,
+        nargs="+",
+        default=[1, 2, 4, 8, 16],
+        help="Concurrency levels (numbers of simulated users)",
+    )
+    parser.add_argument(
+        "--duration",
+        type=float,
+        default=60,
+        help="Duration of each concurrency level, in seconds (default: 60)",
+    )
+    parser.add_argument(
+        "--think-scale",
+        type=float,
+        default=0,
+        help="Factor applied to scenario think times (default: 0, no pauses)",
+    )
+    parser.add_argument(
+        "--no-warm-up",
+        dest="warm_up",
+        action="store_false",
+        help="Do not run the scenario once before measuring",
+    )
+    parser.add_argument(
+        "--by-step", action="store_true", help="Also report each step"
+    )
+    parser.add_argument("--json", help="Write results to this file as JSON")
+    args = parser.parse_args()
+
+    scenario = load_scenario(args.scenario)
+    print(header, flush=True)
+    rows = []
+    if args.url:
+        rows += load_test(args.url, scenario, args)
+    else:
+        configurations = (
+            [(w, t) for w in args.workers for t in args.threads]
+            if args.server == "gunicorn"
+            else [("-", "-")]
+        )
+        for workers, threads in configurations:
+            port = free_port()
+            base_path = os.environ.get("DASH_URL_BASE_PATHNAME", "/")
+            url = f"http://127.0.0.1:{port}{base_path}"
+            process = start_server(
+                args.server, args.app_config, port, workers, threads
+            )
+            try:
+                wait_until_ready(url, process)
+                rows += load_test(
+                    url, scenario, args, args.server, workers, threads
+                )
+            finally:
+                stop_server(process)
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({"scenario": scenario["name"], "results": rows}, file)
+
+
+if __name__ == "__main__":
+    main()
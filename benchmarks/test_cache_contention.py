@@ -0,0 +1,249 @@
+"""
+Lock-contention stress tests of the dataset caches (`DvXrDataset` and
+`PdCsvDataset`; see `dve.data`).
+
+Many threads apply operations to cached datasets concurrently, with access
+patterns ranging from all hits to mostly misses, and with a cache smaller
+than the set of files, so that misses cause evictions. Each test measures
+throughput, operation latency, and time spent waiting for the cache lock
+(reported in the benchmark's `extra_info`), and checks correctness:
+
+- No operation fails.
+- Every operation sees the dataset it asked for.
+- No item that needs finalization (e.g., closing its file) is evicted while
+  an operation is using it. Items that need none (`PdCsvDataset`) are read
+  without the cache lock, and may be evicted while in use.
+
+These tests are a gate for any change to the cache: a new cache must pass
+them, and should not reduce throughput.
+"""
+import random
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dve.data import DvXrDataset, PdCsvDataset
+from dve.synthetic_data import model_grid, raster_dataset
+
+
+# Number of distinct files, and cache size. The cache holds fewer items
+# than there are files, so that misses evict items.
+num_files = 12
+cache_size = 4
+
+# Access patterns: for each, the probability of accessing one of a small
+# "hot" set of files (which fit in cache), rather than any file.
+patterns = {"hits": 1.0, "mixed": 0.8, "misses": 0.0}
+hot_files = cache_size - 1
+
+
+@pytest.fixture(scope="module")
+def grid():
+    return model_grid()
+
+
+@pytest.fixture(scope="module")
+def land_index(grid):
+    """Indices (ilat, ilon) of a land cell."""
+    ilat, ilon = np.nonzero(grid.sftlf.values > 0)
+    return int(ilat[0]), int(ilon[0])
+
+
+@pytest.fixture(scope="module")
+def raster_filepaths(tmp_path_factory, grid):
+    """Raster files; all values in file `i` are `i`."""
+    directory = tmp_path_factory.mktemp("rasters")
+    filepaths = []
+    for i in range(num_files):
+        filepath = str(directory / f"raster-{i}.nc")
+        raster_dataset(
+            grid, "dv", np.full(grid.sftlf.shape, float(i)), "1"
+        ).to_netcdf(filepath)
+        filepaths.append(filepath)
+    return filepaths
+
+
+@pytest.fixture(scope="module")
+def csv_filepaths(tmp_path_factory):
+    """CSV files; all values in file `i` are `i`."""
+    directory = tmp_path_factory.mktemp("csvs")
+    filepaths = []
+    for i in range(num_files):
+        filepath = str(directory / f"stations-{i}.csv")
+        pd.DataFrame({"value": np.full(500, float(i))}).to_csv(
+            filepath, index=False
+        )
+        filepaths.append(filepath)
+    return filepaths
+
+
+class Instrumentation:
+    """
+    Tracks which cache items are in use, and detects evictions of items in
+    use. Items are identified by their cache keys (filepaths). Evicting an
+    item in use is a violation only if the cache finalizes evicted items.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.on_evict = cache.on_evict
+        self._lock = threading.Lock()
+        self.in_use = Counter()
+        self.violations = []
+
+    def evict(self, key, item):
+        with self._lock:
+            if self.in_use[key] and self.on_evict is not None:
+                self.violations.append(key)
+        if self.on_evict is not None:
+            self.on_evict(key, item)
+
+    @contextmanager
+    def using(self, key):
+        """Context manager marking the item for `key` in use."""
+        with self._lock:
+            self.in_use[key] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_use[key] -= 1
+
+
+def instrument(monkeypatch, cache):
+    cache.clear()
+    instrumentation = Instrumentation(cache)
+    monkeypatch.setattr(cache, "maxsize", cache_size)
+    monkeypatch.setattr(cache, "on_evict", instrumentation.evict)
+    return instrumentation
+
+
+@pytest.fixture
+def xr_cache(monkeypatch):
+    yield instrument(monkeypatch, DvXrDataset._cache)
+    DvXrDataset._cache.clear()
+
+
+@pytest.fixture
+def csv_cache(monkeypatch):
+    yield instrument(monkeypatch, PdCsvDataset._cache)
+    PdCsvDataset._cache.clear()
+
+
+def stress(operation, num_keys, pattern, num_threads, ops_per_thread):
+    """
+    Run `operation(i)` for file indices `i` chosen according to `pattern`,
+    from `num_threads` threads concurrently. Return throughput, latency
+    percentiles, and the exceptions raised.
+    """
+    hot_probability = patterns[pattern]
+    latencies = []
+    errors = []
+    barrier = threading.Barrier(num_threads)
+
+    def run(seed):
+        rng = random.Random(seed)
+        thread_latencies = []
+        barrier.wait()
+        for _ in range(ops_per_thread):
+            if rng.random() < hot_probability:
+                i = rng.randrange(hot_files)
+            else:
+                i = rng.randrange(num_keys)
+            start = perf_counter()
+            try:
+                operation(i)
+            except Exception as e:
+                errors.append(e)
+            thread_latencies.append(perf_counter() - start)
+        latencies.extend(thread_latencies)
+
+    threads = [
+        threading.Thread(target=run, args=(seed,))
+        for seed in range(num_threads)
+    ]
+    start = perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = perf_counter() - start
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "ops": len(latencies),
+        "ops_per_second": len(latencies) / elapsed,
+        "latency_p50_ms": float(np.percentile(latencies_ms, 50)),
+        "latency_p99_ms": float(np.percentile(latencies_ms, 99)),
+        "latency_max_ms": float(latencies_ms.max()),
+        "errors": errors,
+    }
+
+
+def run_stress(benchmark, instrumentation, operation, pattern, threads, ops):
+    before = instrumentation.cache.stats()
+    result = benchmark.pedantic(
+        stress,
+        args=(operation, num_files, pattern, threads, ops),
+        rounds=1,
+        iterations=1,
+    )
+    after = instrumentation.cache.stats()
+    errors = result.pop("errors")
+    benchmark.extra_info.update(
+        {
+            **result,
+            "lock_wait_seconds": (
+                after["lock_wait_seconds"] - before["lock_wait_seconds"]
+            ),
+            "lock_wait_max_seconds": after["lock_wait_max_seconds"],
+            "hits": after["hits"] - before["hits"],
+            "misses": after["misses"] - before["misses"],
+            "evictions": after["evictions"] - before["evictions"],
+        }
+    )
+    assert not errors, f"{len(errors)} errors, e.g. {errors[0]!r}"
+    assert not instrumentation.violations, (
+        f"{len(instrumentation.violations)} items evicted while in use"
+    )
+
+
+@pytest.mark.parametrize("threads", [1, 8, 32])
+@pytest.mark.parametrize("pattern", list(patterns))
+def test_xr_dataset_contention(
+    benchmark, xr_cache, raster_filepaths, land_index, pattern, threads
+):
+    ilat, ilon = land_index
+
+    def read_value(dvds, ds, key):
+        with xr_cache.using(key):
+            return float(ds[dvds.dv_name][ilat, ilon].values)
+
+    def operation(i):
+        # As in the app, a manager object is created for each access.
+        filepath = raster_filepaths[i]
+        value = DvXrDataset(filepath).apply(read_value, filepath)
+        assert value == i, f"Expected value {i}, got {value}"
+
+    run_stress(benchmark, xr_cache, operation, pattern, threads, 100)
+
+
+@pytest.mark.parametrize("threads", [1, 8, 32])
+@pytest.mark.parametrize("pattern", list(patterns))
+def test_pd_csv_dataset_contention(
+    benchmark, csv_cache, csv_filepaths, pattern, threads
+):
+    def read_value(pdds, data_frame, key):
+        with csv_cache.using(key):
+            return float(data_frame["value"].iloc[-1])
+
+    def operation(i):
+        filepath = csv_filepaths[i]
+        value = PdCsvDataset(filepath).apply(read_value, filepath)
+        assert value == i, f"Expected value {i}, got {value}"
+
+    run_stress(benchmark, csv_cache, operation, pattern, threads, 200)
@@ -0,0 +1,169 @@
+"""
+Benchmarks of the Dash callbacks, made as callback requests, so that they
+include request handling and response serialization, as in production.
+"""
+import os
+
+import pytest
+
+from conftest import dv_regimes, future_dataset_id
+from dve.download_utils import download_by_location_dir
+
+
+# A land point on the synthetic (and production) grid, in rotated pole
+# coordinates. Map click data carries rotated pole coordinates.
+click_rlon, click_rlat = -10.12, 5.06
+
+
+def map_values(dv, regime, **overrides):
+    return {
+        "main_tabs.active_tab": "map-tab",
+        "design_variable.value": dv,
+        "climate_regime.value": regime,
+        "future_dataset_id.value": future_dataset_id,
+        "show_stations.on": True,
+        "show_grid.on": True,
+        "color_map.value": "viridis",
+        "color_scale_type.value": "linear",
+        "num_colors.value": 10,
+        "color_scale_data_range.value": [0, 1000],
+        "viewport-ds.children": None,
+        "language.value": "en",
+        **overrides,
+    }
+
+
+@pytest.mark.parametrize("dv, regime", dv_regimes)
+def test_update_map(run, post_callback, dv, regime):
+    run(
+        post_callback,
+        "map_figure.data",
+        map_values(dv, regime),
+        ["design_variable.value"],
+    )
+
+
+@pytest.mark.parametrize("encoding", ["br", "gzip"])
+def test_update_map_compressed(run, post_callback, encoding):
+    # With warm caches, the compressed response is taken from the
+    # compression cache.
+    run(
+        post_callback,
+        "map_figure.data",
+        map_values("RL50", "historical"),
+        ["design_variable.value"],
+        headers={"Accept-Encoding": encoding},
+    )
+
+
+@pytest.mark.parametrize("dv, regime", dv_regimes)
+def test_update_lonlat_overlay(run, post_callback, dv, regime):
+    run(
+        post_callback,
+        "map_lonlat_overlay.data",
+        map_values(dv, regime),
+        ["show_grid.on"],
+    )
+
+
+@pytest.mark.parametrize("dv, regime", dv_regimes)
+def test_update_stations(run, post_callback, dv, regime):
+    run(
+        post_callback,
+        "map_stations.data",
+        map_values(dv, regime),
+        ["show_stations.on"],
+    )
+
+
+def test_update_colour_table(run, post_callback):
+    # Changing the number of colours makes no request; the map is recoloured
+    # client side from the colour table.
+    run(
+        post_callback,
+        "colour_table.data",
+        {"color_map.value": "plasma"},
+        ["color_map.value"],
+    )
+
+
+@pytest.mark.skipif(
+    not os.access(os.path.join("/", download_by_location_dir), os.W_OK),
+    reason="Download directory is not writable",
+)
+@pytest.mark.parametrize("dv, regime", dv_regimes)
+def test_display_click_info(run, post_callback, dv, regime):
+    run(
+        post_callback,
+        "map_click_info.children",
+        {
+            "main_tabs.active_tab": "map-tab",
+            "map_main_graph.clickData": {
+                "points": [
+                    {"x": click_rlon, "y": click_rlat, "curveNumber": 2}
+                ]
+            },
+            "design_variable.value": dv,
+            "climate_regime.value": regime,
+            "future_dataset_id.value": future_dataset_id,
+            "language.value": "en",
+        },
+        ["map_main_graph.clickData"],
+    )
+
+
+@pytest.mark.parametrize("dv, regime", dv_regimes)
+def test_update_slider(run, post_callback, dv, regime):
+    run(
+        post_callback,
+        "..color_scale_data_range.min...color_scale_data_range.max"
+        "...color_scale_data_range.step...color_scale_data_range.marks"
+        "...color_scale_data_range.value..",
+        {
+            "design_variable.value": dv,
+            "climate_regime.value": regime,
+            "future_dataset_id.value": future_dataset_id,
+        },
+        ["design_variable.value"],
+    )
+
+
+@pytest.mark.parametrize("dv", sorted({dv for dv, _ in dv_regimes}))
+@pytest.mark.parametrize(
+    "filter_query, sort_by",
+    [
+        ("", []),
+        ("{prov} = BC && {Latitude} > 49", []),
+        ("", [{"column_id": "Location", "direction": "desc"}]),
+    ],
+)
+def test_update_tablec2_page(run, post_callback, dv, filter_query, sort_by):
+    run(
+        post_callback,
+        "..table-C2-data.data...table-C2-data.page_current"
+        "...table-C2-data.page_count..",
+        {
+            "table-C2-data.page_current": 1,
+            "table-C2-data.page_size": 50,
+            "table-C2-data.sort_by": sort_by,
+            "table-C2-data.filter_query": filter_query,
+            "design_variable.value": dv,
+        },
+        ["table-C2-data.filter_query"],
+    )
+
+
+@pytest.mark.parametrize("dv, regime", dv_regimes)
+def test_display_province_stats(run, post_callback, dv, regime):
+    run(
+        post_callback,
+        "province_stats.children",
+        {
+            "main_tabs.active_tab": "map-tab",
+            "design_variable.value": dv,
+            "climate_regime.value": regime,
+            "future_dataset_id.value": future_dataset_id,
+            "language.value": "en",
+        },
+        ["design_variable.value"],
+    )
@@ -0,0 +1,98 @@
+"""
+Benchmarks of the functions behind the callbacks that dominate their time.
+"""
+import pytest
+
+from conftest import dvs
+from dve.callbacks.table_c2 import make_data_table
+from dve.compression import compress
+from dve.download_utils import get_download_data
+from dve.generate_iso_lines import configured_lonlat_overlay
+from dve.serialization import serializers
+from test_callbacks import click_rlat, click_rlon, map_values
+
+
+@pytest.mark.parametrize("regime", ["historical", "future"])
+def test_get_download_data(run, config, regime):
+    run(
+        get_download_data,
+        click_rlon,
+        click_rlat,
+        config,
+        regime,
+        "reconstruction",
+        "2.0",
+    )
+
+
+@pytest.mark.parametrize("dv", dvs)
+def test_make_data_table(run, config, dv):
+    run(make_data_table, config, "en", dv)
+
+
+@pytest.mark.parametrize(
+    "viewport",
+    [
+        None,
+        {
+            "x_min": -20,
+            "x_max": 10,
+            "y_min": -10,
+            "y_max": 15,
+        },
+    ],
+    ids=["full", "zoomed"],
+)
+def test_lonlat_overlay(run, config, viewport):
+    run(
+        configured_lonlat_overlay,
+        config["values"]["map"]["lonlat_overlay"],
+        rlon_grid_size=155,
+        rlat_grid_size=130,
+        viewport=viewport,
+    )
+
+
+@pytest.fixture(scope="module")
+def map_figure_response(post_callback):
+    return post_callback(
+        "map_figure.data",
+        map_values("RL50", "historical"),
+        ["design_variable.value"],
+    ).data
+
+
+@pytest.mark.parametrize("encoding", ["br", "gzip"])
+def test_compress(run, benchmark, config, map_figure_response, encoding):
+    # The CPU cost of compressing the largest callback response, without the
+    # compression cache. The bytes saved are in `extra_info`.
+    level = config["values"]["compression"]["levels"][encoding]
+    compressed = run(compress, map_figure_response, encoding, level)
+    benchmark.extra_info.update(
+        {
+            "level": level,
+            "bytes": len(map_figure_response),
+            "compressed_bytes": len(compressed),
+            "saved_bytes": len(map_figure_response) - len(compressed),
+        }
+    )
+
+
+@pytest.fixture(scope="module")
+def map_figure(app):
+    # The map figure as returned by `update_map`, before serialization. The
+    # callback's own function is wrapped by Dash, which serializes its value.
+    callback = app.callback_map["map_figure.data"]
+    values = map_values("RL50", "historical")
+    return callback["callback"].__wrapped__(
+        *(
+            values[f"{spec['id']}.{spec['property']}"]
+            for spec in callback["inputs"] + callback.get("state", [])
+        )
+    )
+
+
+@pytest.mark.parametrize("serializer", ["orjson", "plotly"])
+def test_serialize(benchmark, map_figure, serializer):
+    # Serialization of the largest callback response; see `dve.serialization`.
+    benchmark(serializers[serializer], map_figure)
@@ -0,0 +1,80 @@
+"""
+Administrative HTTP routes.
+
+Administrative routes (e.g., reloading the configuration) are served under
+`<routes pathname prefix>admin/`. They are enabled only if the environment
+variable `DVE_ADMIN_TOKEN` is set to a non-empty value, and requests to them
+must present that token in an `Authorization: Bearer <token>` header.
+
+Note that a request to an admin route is handled by just one of the
+app's worker processes.
+"""
+import functools
+import hmac
+import logging
+import os
+
+import flask
+
+
+logger = logging.getLogger(__name__)
+
+
+def admin_token():
+    return os.environ.get("DVE_ADMIN_TOKEN") or None
+
+
+def admin_enabled():
+    return admin_token() is not None
+
+
+def authorized(request):
+    """
+    Return a boolean indicating whether a request presents the admin token.
+    """
+    token = admin_token()
+    if token is None:
+        return False
+    scheme, _, credentials = request.headers.get("Authorization", "").partition(
+        " "
+    )
+    return scheme.lower() == "bearer" and hmac.compare_digest(
+        credentials.strip().encode(), token.encode()
+    )
+
+
+def admin_url(app, path):
+    return f"{app.config.routes_pathname_prefix}admin/{path}"
+
+
+def route(app, path, **options):
+    """
+    Decorator that adds an admin route to the app's server. If admin routes
+    are not enabled, the route is not added. Requests that do not present
+    the admin token are refused.
+
+    :param app: Dash app.
+    :param path: Path of route, relative to the admin base path.
+    :param options: Options passed through to `flask.Flask.route`.
+    """
+
+    def decorator(view):
+        if not admin_enabled():
+            return view
+
+        @functools.wraps(view)
+        def protected_view(*args, **kwargs):
+            if not authorized(flask.request):
+                logger.warning(
+                    f"Unauthorized request to admin route '{path}' "
+                    f"from {flask.request.remote_addr}"
+                )
+                flask.abort(403)
+            return view(*args, **kwargs)
+
+        app.server.route(
+            admin_url(app, path), endpoint=f"admin_{view.__name__}", **options
+        )(protected_view)
+        return view
+
+    return decorator
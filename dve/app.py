@@ -6,6 +6,8 @@ import yaml
 from yamlinclude import YamlIncludeConstructor
 
 import dve
+import dve.config.index
+import dve.config.snapshot
 import dve.config.validation
 import dve.callbacks.local_preferences
 import dve.callbacks.url_query_params
@@ -16,10 +18,24 @@ import dve.callbacks.map_figure
 import dve.callbacks.table_c2
 import dve.callbacks.colour_scale
 import dve.callbacks.map_pointer
+import dve.callbacks.province_stats
 import dve.callbacks.overlay
 import dve.callbacks.labels
+import dve.cache_stats
+import dve.capture
+import dve.compression
 import dve.data
+import dve.export
 import dve.layout
+import dve.metrics
+import dve.payloads
+import dve.preload
+import dve.profiling
+import dve.provinces
+import dve.reload
+import dve.serialization
+import dve.subset
+import dve.tracing
 
 import dash
 import dash_bootstrap_components as dbc
@@ -64,10 +80,27 @@ def make_dash_app(config):
     dve.callbacks.overlay.add(app, config)
     dve.callbacks.colour_scale.add(app, config)
     dve.callbacks.map_pointer.add(app, config)
+    dve.callbacks.province_stats.add(app, config)
     dve.callbacks.map_figure.add(app, config)
     dve.callbacks.labels.add(app, config)
 
+    # Add response serialization and compression. These must precede the
+    # routes, some of which instrument or inspect responses (see
+    # `dve.serialization.add`, `dve.compression.add`).
+    dve.serialization.add(app, config)
+    dve.compression.add(app, config)
+
     # Add routes
+    dve.metrics.add(app, config)
+    dve.cache_stats.add(app, config)
+    dve.profiling.add(app, config)
+    dve.tracing.add(app, config)
+    dve.payloads.add(app, config)
+    dve.capture.add(app, config)
+    dve.export.add(app, config)
+    dve.subset.add(app, config)
+    dve.provinces.add(app, config)
+
     @app.server.route(f"{str(download_base_url())}/<filename>")
     def serve_static(filename):
         return flask.send_from_directory(
@@ -80,6 +113,7 @@ def make_dash_app(config):
 def make_app(
     log_config_filepath=default_log_config_filepath,
     app_config_filepath=default_app_config_filepath,
+    preload=False,
 ):
     """
     Main app factory. Configures app logging, reads app config file, causes
@@ -99,6 +133,8 @@ def make_app(
 
     :param log_config_filepath: Filepath of app logging configuration file.
     :param app_config_filepath: Filepath of app configuration file.
+    :param preload: If true, preload data and prime caches (see module
+      `dve.preload`) before returning the app.
     :return: a Dash app
     """
 
@@ -110,13 +146,17 @@ def make_app(
     logger = logging.getLogger("dve")
 
     logger.debug("Loading app configuration")
-    with open(app_config_filepath, "r") as config_file:
-        config = yaml.load(config_file)
+    config = dve.config.snapshot.load_config(app_config_filepath)
     logger.debug(f"Configuration loaded.")
 
+    config["index"] = dve.config.index.compile_config(config)
     dve.config.validation.validate(config)
 
     app = make_dash_app(config)
+    dve.reload.add(app, config, app_config_filepath)
+
+    if preload:
+        dve.preload.preload(config)
 
     return app
 
@@ -129,6 +169,11 @@ def make_wsgi_app():
 
     - Logging config filepath: `DVE_LOG_CONFIG`.
     - App config filepath: `DVE_APP_CONFIG`.
+    - Preload mode: `DVE_PRELOAD` (true if set to "true", "yes" or "1").
+
+    When Gunicorn setting `preload_app` is true, this function is called in
+    the master process before workers are forked, and preloading is done
+    once for all workers.
     """
     log_config_filepath = os.getenv(
         "DVE_LOG_CONFIG", default_log_config_filepath
@@ -136,8 +181,10 @@ def make_wsgi_app():
     app_config_filepath = os.getenv(
         "DVE_APP_CONFIG", default_app_config_filepath
     )
+    preload = os.getenv("DVE_PRELOAD", "").lower() in {"true", "yes", "1"}
     app = make_app(
         log_config_filepath=log_config_filepath,
         app_config_filepath=app_config_filepath,
+        preload=preload,
     )
     return app.server
@@ -0,0 +1,377 @@
+/*
+Client-side callbacks for the map.
+
+The map hover info (the lon-lat coordinates of the grid cell under the map
+pointer) is computed and displayed here, in the browser, so that hovering
+over the map makes no requests to the server. The grid is described by the
+`map_grid` store (see `pointer_grid` in `dve/data.py`).
+
+The map figure is built on the server (`update_map` in
+`dve/callbacks/map_figure.py`) and displayed from here. Its overlays (the
+lon-lat graticule and the stations) are built on the server separately, and
+added to the figure here, so that toggling an overlay does not resend the
+whole figure. When only the colour map or the number of colours changes, the
+figure is recoloured here, by restyling its heatmap, station and colourbar
+traces, rather than rebuilt on the server. The colour scale computations are
+transcriptions of those in `dve/colorbar.py` and `dve/math_utils.py`, and
+must be kept in agreement with them. The colours themselves are computed on
+the server (`colour_table` in `dve/colorbar.py`) and provided in the
+`colour_table` store.
+*/
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    map: {
+        hover_info: function(hoverData, designVariable, grid, lang, labels) {
+            const noUpdate = window.dash_clientside.no_update;
+            const triggered = window.dash_clientside.callback_context
+                .triggered.map(t => t.prop_id);
+
+            // Clear if the DV selection has changed.
+            if (triggered.includes("design_variable.value")) {
+                return null;
+            }
+            // Clear if there is no data for the current selection.
+            if (!grid) {
+                return null;
+            }
+            // Ignore if no hover data or if not hovering over map. Map
+            // curves are numbered > 1 due to the order they are added as
+            // traces to the figure.
+            if (!hoverData || hoverData.points[0].curveNumber <= 1) {
+                return noUpdate;
+            }
+            // Ignore grid updates that are not otherwise significant.
+            if (triggered.every(t => t === "map_grid.data")) {
+                return noUpdate;
+            }
+
+            const point = hoverData.points[0];
+            const ilon = nearestIndex(grid.rlon, point.x);
+            const ilat = nearestIndex(grid.rlat, point.y);
+            let lon, lat;
+            if (grid.pole) {
+                [lon, lat] = rotatedPoleToLonLat(
+                    grid.rlon[ilon], grid.rlat[ilat], grid.pole.lon,
+                    grid.pole.lat
+                );
+                if (lon > 0) {
+                    lon -= 360;
+                }
+            } else {
+                lon = grid.lon[ilat][ilon];
+                lat = grid.lat[ilat][ilon];
+            }
+
+            const langLabels = labels[lang];
+            return valueTable([
+                [langLabels.lat, roundDecimals(lat, 6)],
+                [langLabels.lon, roundDecimals(lon, 6)],
+            ]);
+        },
+
+        figure: function(
+            figure, lonlatOverlay, stations, colourTable, numColours
+        ) {
+            if (!figure) {
+                return window.dash_clientside.no_update;
+            }
+            // Message figures have no colour scale, and no overlays.
+            if (!(figure.layout.meta && figure.layout.meta.colour_scale)) {
+                return figure;
+            }
+            const overlaid = withOverlays(figure, lonlatOverlay, stations);
+            const meta = overlaid.layout.meta.colour_scale;
+            // Use the figure as built if its colours are current, or if the
+            // colours are not known.
+            if (
+                !colourTable ||
+                (colourTable.name === meta.colour_map &&
+                    numColours === meta.num_colours)
+            ) {
+                return overlaid;
+            }
+            return recolour(overlaid, meta, colourTable, numColours);
+        },
+    },
+});
+
+
+// Return a copy of the map figure with overlays added: the lon-lat graticule
+// beneath the map traces, and the stations above them. This reproduces the
+// order of traces, and so the curve numbers, of the map figure before
+// overlays were built separately.
+function withOverlays(figure, lonlatOverlay, stations) {
+    const meta = figure.layout.meta.colour_scale;
+    const [colourbar, ...maps] = figure.data;
+    const heatmap = figure.data[meta.heatmap];
+    // Place the overlays on the map subplot.
+    const axes = {xaxis: heatmap.xaxis, yaxis: heatmap.yaxis};
+    const lonlat = (lonlatOverlay || []).map(trace => ({...trace, ...axes}));
+    const data = [colourbar, ...lonlat, ...maps];
+    if (stations) {
+        data.push({
+            ...stations,
+            ...axes,
+            marker: {
+                ...stations.marker,
+                cmin: meta.zmin,
+                cmax: meta.zmax,
+                colorscale: heatmap.colorscale,
+            },
+        });
+    }
+    return {
+        ...figure,
+        data: data,
+        layout: {
+            ...figure.layout,
+            meta: {
+                ...figure.layout.meta,
+                colour_scale: {
+                    ...meta,
+                    heatmap: meta.heatmap + lonlat.length,
+                    stations: stations ? data.length - 1 : null,
+                },
+            },
+        },
+    };
+}
+
+
+// Return a copy of the map figure with a new colour map or number of
+// colours. This reproduces the colour scale parts of `update_map`.
+function recolour(figure, meta, colourTable, numColours) {
+    const [fwd, back] = scaleTransform(meta.scale);
+    const boundaries = uniformlySpacedWithTarget(
+        meta.zmin, meta.zmax, numColours + 1, meta.target, meta.scale
+    );
+    const numActualColours = boundaries.length - 1;
+    const colours = colourTable.colours[numActualColours];
+    if (!colours) {
+        return figure;
+    }
+    const colorscale = discreteColorscale(boundaries, colours);
+    const tickvals = uniformlySpacedWithTarget(
+        meta.zmin,
+        meta.zmax,
+        Math.min(numActualColours + 1, meta.max_num_ticks),
+        meta.target,
+        meta.scale
+    );
+
+    const data = figure.data.slice();
+
+    // Colourbar (see `discrete_colorscale_colorbar`).
+    const tBoundaries = boundaries.map(fwd);
+    const tMidpoints = tBoundaries
+        .slice(1)
+        .map((b, i) => (b + tBoundaries[i]) / 2);
+    data[0] = {
+        ...data[0],
+        y: tMidpoints,
+        z: tMidpoints.map(m => [back(m)]),
+        colorscale: colorscale,
+    };
+
+    // Heatmap (raster).
+    data[meta.heatmap] = {
+        ...data[meta.heatmap],
+        zmin: boundaries[0],
+        zmax: boundaries[numActualColours],
+        colorscale: colorscale,
+    };
+
+    // Stations.
+    if (meta.stations !== null) {
+        const stations = data[meta.stations];
+        data[meta.stations] = {
+            ...stations,
+            marker: {...stations.marker, colorscale: colorscale},
+        };
+    }
+
+    const colourbarAxis = "yaxis" + (data[0].yaxis || "y").slice(1);
+    return {
+        ...figure,
+        data: data,
+        layout: {
+            ...figure.layout,
+            [colourbarAxis]: {
+                ...figure.layout[colourbarAxis],
+                tickvals: tickvals.map(fwd),
+                ticktext: tickvals.map(t => sigfigs(t, meta.tick_sigfigs)),
+            },
+            meta: {
+                ...figure.layout.meta,
+                colour_scale: {
+                    ...meta,
+                    colour_map: colourTable.name,
+                    num_colours: numColours,
+                },
+            },
+        },
+    };
+}
+
+
+// Transcription of `dve.colorbar.scale_transform`.
+function scaleTransform(scale) {
+    if (scale === "logarithmic") {
+        return [Math.log10, x => Math.pow(10, x)];
+    }
+    return [x => x, x => x];
+}
+
+
+// Transcription of `numpy.linspace`.
+function linspace(start, stop, num) {
+    const div = num - 1;
+    const delta = stop - start;
+    const step = delta / div;
+    const values = Array.from(
+        {length: num},
+        (_, i) => (step === 0 ? (i / div) * delta : i * step) + start
+    );
+    if (num > 1) {
+        values[num - 1] = stop;
+    }
+    return values;
+}
+
+
+// Transcription of `dve.colorbar.uniformly_spaced_with_target`.
+function uniformlySpacedWithTarget(zmin, zmax, numValues, target, scale) {
+    const [fwd, back] = scaleTransform(scale);
+
+    if (target === null || target === undefined) {
+        return linspace(fwd(zmin), fwd(zmax), numValues).map(back);
+    }
+
+    // Work in transformed value space
+    const z0 = fwd(zmin);
+    const zn = fwd(zmax);
+    const v = fwd(target);
+
+    // Unadjusted values
+    const z = linspace(z0, zn, numValues);
+    const deltaZ = (zn - z0) / (numValues - 1);
+    const k = rint((v - z0) / deltaZ);
+    let d = v - z[k];
+
+    // Targeted values
+    const ratio = Math.abs(d / deltaZ);
+    const dIsLarge = !(ratio <= Math.max(1e-9 * ratio, 1e-3));
+    d = dIsLarge ? d : 0;
+    const before = dIsLarge && d > 0 ? [z0 - deltaZ] : [];
+    const after = dIsLarge && d < 0 ? [zn + deltaZ] : [];
+
+    // Transform back
+    return [...before, ...z, ...after].map(x => back(x + d));
+}
+
+
+// Transcription of `dve.colorbar.discrete_colorscale`.
+function discreteColorscale(boundaries, colours) {
+    const first = boundaries[0];
+    const diff = boundaries[boundaries.length - 1] - first;
+    const normalized = boundaries.map(b => (b - first) / diff);
+    return colours.flatMap((colour, k) => [
+        [normalized[k], colour],
+        [normalized[k + 1], colour],
+    ]);
+}
+
+
+// Round half to even, as `numpy.rint`.
+function rint(x) {
+    const r = Math.round(x);
+    return Math.abs(x % 1) === 0.5 && r % 2 !== 0 ? r - 1 : r;
+}
+
+
+// Round to a number of decimals, as `numpy.round`.
+function roundDecimals(x, decimals) {
+    if (decimals >= 0) {
+        const factor = Math.pow(10, decimals);
+        return rint(x * factor) / factor;
+    }
+    const factor = Math.pow(10, -decimals);
+    return rint(x / factor) * factor;
+}
+
+
+// Transcription of `dve.math_utils.sigfigs`.
+function sigfigs(x, n) {
+    if (x === 0) {
+        return x;
+    }
+    return roundDecimals(x, -Math.floor(Math.log10(Math.abs(x))) + (n - 1));
+}
+
+
+// Return the index of the element of a monotonic increasing array nearest
+// to a value.
+function nearestIndex(values, value) {
+    let low = 0;
+    let high = values.length - 1;
+    while (high - low > 1) {
+        const mid = (low + high) >> 1;
+        if (values[mid] <= value) {
+            low = mid;
+        } else {
+            high = mid;
+        }
+    }
+    return Math.abs(values[high] - value) < Math.abs(values[low] - value)
+        ? high
+        : low;
+}
+
+
+// Convert rotated pole coordinates to lon-lat coordinates. A transcription
+// of `dve.math_utils.rotated_pole_to_lonlat`.
+function rotatedPoleToLonLat(rlon, rlat, poleLon, poleLat) {
+    const radians = Math.PI / 180;
+    rlon *= radians;
+    rlat *= radians;
+    const x = Math.cos(rlat) * Math.cos(rlon);
+    const y = Math.cos(rlat) * Math.sin(rlon);
+    const z = Math.sin(rlat);
+    const theta = (90 - poleLat) * radians;
+    const phi = (poleLon + 180) * radians;
+    const x1 = Math.cos(theta) * x - Math.sin(theta) * z;
+    const z1 = Math.sin(theta) * x + Math.cos(theta) * z;
+    const x2 = Math.cos(phi) * x1 - Math.sin(phi) * y;
+    const y2 = Math.sin(phi) * x1 + Math.cos(phi) * y;
+    return [Math.atan2(y2, x2) / radians, Math.asin(z1) / radians];
+}
+
+
+// Return a Dash component: the table rendered by
+// `dve.callbacks.map_pointer.value_table`.
+function component(type, namespace, props) {
+    return {type: type, namespace: namespace, props: props};
+}
+
+function valueTable(items) {
+    const html = "dash_html_components";
+    return component("Table", "dash_bootstrap_components", {
+        bordered: true,
+        size: "sm",
+        children: [
+            component("Tbody", html, {
+                children: items.map(([name, value]) =>
+                    component("Tr", html, {
+                        children: [
+                            component("Th", html, {
+                                children: name,
+                                style: {width: "5em"},
+                            }),
+                            component("Td", html, {children: value}),
+                        ],
+                    })
+                ),
+            }),
+        ],
+    });
+}
@@ -0,0 +1,122 @@
+"""
+Reporting of cache statistics.
+
+Statistics for the thread-safe dataset caches (see `ThreadSafeCache.stats`
+in module `dve.data`) and for the `functools.lru_cache`s of derived data
+are reported:
+
+- On the admin route `admin/caches`, as JSON (see `dve.admin`). Note that
+  the statistics are those of the worker process that handles the request.
+- In the log, as a summary for each worker process, every
+  `DVE_CACHE_STATS_LOG_INTERVAL` seconds (environment variable; default
+  600; 0 disables).
+
+Use these statistics to choose `LARGE_FILE_CACHE_SIZE` and
+`SMALL_FILE_CACHE_SIZE`: a low hit ratio together with evictions of young
+items indicates that a cache is too small; a high hit ratio with a cache
+that never fills indicates it could be smaller.
+"""
+import logging
+import os
+import threading
+import time
+
+import flask
+
+import dve.admin
+from dve.colorbar import colour_table
+from dve.compression import cache as compression_cache
+from dve.config.index import resolve_filepath
+from dve.data import DvXrDataset, PdCsvDataset, region_cache
+from dve.dict_utils import split_path
+from dve.generate_iso_lines import lonlat_overlay_lines
+from dve.polygons import canada_boundary
+from dve.provinces import label_cache, load_provinces
+
+
+logger = logging.getLogger(__name__)
+
+log_interval = float(os.environ.get("DVE_CACHE_STATS_LOG_INTERVAL", 600))
+
+thread_safe_caches = (
+    DvXrDataset._cache,
+    PdCsvDataset._cache,
+    region_cache,
+    label_cache,
+    compression_cache,
+)
+
+lru_caches = {
+    "resolve_filepath": resolve_filepath,
+    "split_path": split_path,
+    "lonlat_overlay_lines": lonlat_overlay_lines,
+    "canada_boundary": canada_boundary,
+    "colour_table": colour_table,
+    "load_provinces": load_provinces,
+}
+
+
+def cache_stats():
+    """
+    Return statistics for all caches.
+
+    :return: dict
+    """
+    return {
+        "pid": os.getpid(),
+        "caches": [cache.stats() for cache in thread_safe_caches],
+        "lru_caches": {
+            name: function.cache_info()._asdict()
+            for name, function in lru_caches.items()
+        },
+    }
+
+
+def log_summary():
+    for stats in cache_stats()["caches"]:
+        hit_ratio = stats["hit_ratio"]
+        logger.info(
+            f"Cache {stats['name']}: "
+            f"size {stats['size']}/{stats['maxsize']}, "
+            f"hit ratio {'-' if hit_ratio is None else f'{hit_ratio:.3f}'}, "
+            f"{stats['misses']} misses, {stats['evictions']} evictions, "
+            f"lock wait {stats['lock_wait_seconds']:.3f} s",
+            extra={"item": "cache_stats", "cache_stats": stats},
+        )
+
+
+_logger_pid = None
+
+
+def _ensure_logging():
+    """
+    Start the periodic log summary in this process, if not already started.
+    """
+    global _logger_pid
+    if not log_interval or _logger_pid == os.getpid():
+        return
+    _logger_pid = os.getpid()
+
+    def log_periodically():
+        while True:
+            time.sleep(log_interval)
+            try:
+                log_summary()
+            except Exception:
+                logger.exception("Error logging cache statistics")
+
+    threading.Thread(
+        target=log_periodically, name="CacheStats", daemon=True
+    ).start()
+
+
+def add(app, config):
+    """
+    Add the cache statistics admin route to the app, and start the periodic
+    log summary (in each worker process, on its first request).
+    """
+    app.server.before_request(_ensure_logging)
+
+    @dve.admin.route(app, "caches")
+    def admin_caches():
+        return flask.jsonify(cache_stats())
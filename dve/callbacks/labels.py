@@ -14,6 +14,7 @@ from dve.config.text import (
     colourbar_options_control_titles,
     show_stations_label,
     map_pointer_output_heading,
+    province_stats_heading,
 )
 
 logger = logging.getLogger(__name__)
@@ -91,6 +92,13 @@ def add(app, config):
     def update_map_pointer_output_heading(lang):
         return map_pointer_output_heading(config, lang)
 
+    @app.callback(
+        Output("province_stats_heading", "children"),
+        Input("language", "value"),
+    )
+    def update_province_stats_heading(lang):
+        return province_stats_heading(config, lang)
+
     @app.callback(Output("map_main_graph", "config"), Input("language", "value"))
     def update_color_map_ctrl_options(lang):
         return {
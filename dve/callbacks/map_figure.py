@@ -4,11 +4,9 @@ from pkg_resources import resource_filename
 import math
 
 import dash
-from dash.dependencies import Input, Output, State
+from dash.dependencies import ClientsideFunction, Input, Output, State
 import plotly.graph_objects as go
 
-import geopandas as gpd
-
 from dve.config.text import (
     map_title,
     map_no_dvs_for_climate_regime_msg,
@@ -27,19 +25,20 @@ from dve.config.values import (
 from dve.config.validation import file_exists
 from dve.data import get_data_object
 from dve.colorbar import (
+    colour_table,
     discrete_colorscale,
     colorscale_colors,
     discrete_colorscale_colorbar,
     use_ticks,
     uniformly_spaced_with_target,
 )
-from dve.generate_iso_lines import lonlat_overlay
+from dve.generate_iso_lines import configured_lonlat_overlay
 from dve.processing import coord_prep
 from dve.math_utils import round_to_multiple, sigfigs
+from dve.polygons import canada_boundary
 from dve.timing import timing
 
 from climpyrical.gridding import find_nearest_index
-from climpyrical.mask import stratify_coords
 
 logger = logging.getLogger(__name__)
 timing_log_info = logger.info
@@ -66,20 +65,16 @@ def message_figure(message):
 
 
 def add(app, config):
-    # Load Canada map polygons
-    canada = gpd.read_file(
-        resource_filename("dve", config["values"]["paths"]["canada_vector"])
-    ).geometry
-    canada_x, canada_y = stratify_coords(canada)
-
-    # Bounds of Canada map
-    cx_min = min(value for value in canada_x if value is not None)
-    cx_max = max(value for value in canada_x if value is not None)
-    cy_min = min(value for value in canada_y if value is not None)
-    cy_max = max(value for value in canada_y if value is not None)
-
+    # The map figure is built here, without its overlays, and displayed by a
+    # client-side callback (see `dve/assets/map.js`). The overlays (lon-lat
+    # graticule, stations) are built by separate callbacks, and added to the
+    # figure client side, so that toggling an overlay sends only its traces,
+    # not the whole figure. The client-side callback also recolours the
+    # figure when only the colour map or the number of colours changes.
+    # Those controls are therefore State here: the figure is rebuilt only
+    # when the data displayed in it changes.
     @app.callback(
-        Output("map_main_graph", "figure"),
+        Output("map_figure", "data"),
         # Tab selection
         Input("main_tabs", "active_tab"),
         # DV selection
@@ -88,16 +83,13 @@ def add(app, config):
         Input("climate_regime", "value"),
         # Input("historical_dataset_id", "value"),
         Input("future_dataset_id", "value"),
-        Input("show_stations", "on"),
-        Input("show_grid", "on"),
         # Colour scale options
-        Input("color_map", "value"),
         Input("color_scale_type", "value"),
-        Input("num_colors", "value"),
         Input("color_scale_data_range", "value"),
         # Client-side state
-        Input("viewport-ds", "children"),
         Input("language", "value"),
+        State("color_map", "value"),
+        State("num_colors", "value"),
     )
     def update_map(
         # Tab selection
@@ -107,52 +99,25 @@ def add(app, config):
         # Overlay options
         climate_regime,
         future_dataset_id,
-        show_stations,
-        show_grid,
         # Colour scale options
-        color_map_name,
         color_scale_type,
-        num_colours,
         color_scale_data_range,
         # Client-side state
-        viewport_ds,
         lang,
+        color_map_name,
+        num_colours,
     ):
-        with timing("Update map", log=timing_log_info):
+        with timing(
+            "Update map",
+            log=timing_log_info,
+            labels={"dv": design_variable, "regime": climate_regime},
+        ):
             # Do not update if the tab is not selected
             if main_tabs_active_tab != "map-tab":
                 return dash.no_update
 
             historical_dataset_id = "reconstruction"
 
-            ctx = dash.callback_context
-
-            viewport = viewport_ds and json.loads(viewport_ds)
-
-            if ctx.triggered and ctx.triggered[0]["prop_id"].startswith(
-                "viewport-ds"
-            ):
-                # Do not update if viewport has changed but lat-lon grid is not
-                # shown. Changing lat-lon grid for vp change is only reason to
-                # update.
-                if not show_grid:
-                    return dash.no_update
-
-                # Do not update if viewport dimensions have not changed.
-                # Grid covers entirety of Canada, and only changes when vp dims
-                # change.
-                if viewport and viewport["previous"]:
-                    vp_prev = viewport["previous"]
-                    vp_curr = viewport["current"]
-                    if math.isclose(
-                        vp_prev["x_max"] - vp_prev["x_min"],
-                        vp_curr["x_max"] - vp_curr["x_min"],
-                    ) and math.isclose(
-                        vp_prev["y_max"] - vp_prev["y_min"],
-                        vp_curr["y_max"] - vp_curr["y_min"],
-                    ):
-                        return dash.no_update
-
             raster_filepath = filepath_for(
                 config,
                 design_variable,
@@ -186,8 +151,6 @@ def add(app, config):
             # Build the maps figure.
 
             # The list `maps` is the set of overlaid traces comprising the map.
-            # It is built up incrementally depending on the values of the
-            # inputs.
             maps = []
 
             roundto = dv_roundto(config, design_variable, climate_regime)
@@ -247,34 +210,16 @@ def add(app, config):
                     lambda dvds, ds: (ds.rlon, ds.rlat, ds[dvds.dv_name])
                 )
 
-            # Trace: Lon-lat overlay
-            if show_grid:
-                lonlat_overlay_config = config["values"]["map"][
-                    "lonlat_overlay"
-                ]
-
-                with timing("create lon-lat graticule", log=timing_log_debug):
-                    maps += lonlat_overlay(
-                        # It's not clear why the grid sizes should be taken
-                        # from the dataset, but that's how the code works. Ick.
-                        rlon_grid_size=rlon.size,
-                        rlat_grid_size=rlat.size,
-                        viewport=viewport and viewport["current"],
-                        num_lon_intervals=lonlat_overlay_config["lon"][
-                            "num_intervals"
-                        ],
-                        lon_round_to=lonlat_overlay_config["lon"]["round_to"],
-                        num_lat_intervals=lonlat_overlay_config["lat"][
-                            "num_intervals"
-                        ],
-                        lat_round_to=lonlat_overlay_config["lat"]["round_to"],
-                        lon_min=lonlat_overlay_config["lon"]["min"],
-                        lon_max=lonlat_overlay_config["lon"]["max"],
-                        lat_min=lonlat_overlay_config["lat"]["min"],
-                        lat_max=lonlat_overlay_config["lat"]["max"],
+            # Trace: Canada map. The lon-lat overlay, if shown, is inserted
+            # before this trace client side. The map polygons, and their
+            # bounds, are loaded once per shapefile (see `canada_boundary`).
+            canada_x, canada_y, (cx_min, cx_max, cy_min, cy_max) = (
+                canada_boundary(
+                    resource_filename(
+                        "dve", config["values"]["paths"]["canada_vector"]
                     )
-
-            # Trace: Canada map
+                )
+            )
             maps += [
                 go.Scattergl(
                     x=canada_x,
@@ -304,6 +249,7 @@ def add(app, config):
             #         for j in range(icymax - icymin):
             #             x = ds_arr[j,i]
 
+            heatmap_index = len(maps)
             with timing("create heatmap", log=timing_log_debug):
                 maps.append(
                     go.Heatmap(
@@ -323,70 +269,27 @@ def add(app, config):
                     )
                 )
 
-            # Trace: Stations
-            if show_stations and dv_has_climate_regime(
-                config, design_variable, "historical"
-            ):
-                logger.debug("update_ds: get station dataset")
-                df = get_data_object(
-                    config,
-                    design_variable,
-                    "historical",
-                    historical_dataset_id="stations",
-                ).data_frame()
-                stations_column = dv_historical_stations_column(
-                    config, design_variable
-                )
-                with timing("coord_prep for stations", log=timing_log_debug):
-                    df = coord_prep(df, stations_column)
-                maps.append(
-                    go.Scattergl(
-                        x=df.rlon,
-                        y=df.rlat,
-                        text=df[stations_column],
-                        mode="markers",
-                        marker=dict(
-                            size=10,
-                            symbol="circle",
-                            color=df[stations_column],
-                            cmin=zmin,
-                            cmax=zmax,
-                            line=dict(width=1, color="DarkSlateGrey"),
-                            colorscale=colorscale,
-                            showscale=False,  # Hide colorbar
-                        ),
-                        hovertemplate=map_station_hover_template(
-                            config, lang, design_variable, climate_regime
-                        ),
-                        name="",
-                    )
-                )
-
             # Accompanying colorbar. It would be nice to use the built-in
             # colorbar, but Plotly's logarithmic colorbar is not suitable to our
             # purposes.
+            max_num_ticks = config["values"]["ui"]["ticks"]["max-num"]
+            tick_sigfigs = dv_colour_bar_sigfigs(
+                config, design_variable, climate_regime
+            )
             tickvals = use_ticks(
                 zmin,
                 zmax,
                 target,
                 color_scale_type,
                 num_actual_colors,
-                config["values"]["ui"]["ticks"]["max-num"],
+                max_num_ticks,
             )
             colorbar = discrete_colorscale_colorbar(
                 boundaries,
                 colorscale,
                 color_scale_type,
                 tickvals,
-                [
-                    sigfigs(
-                        t,
-                        dv_colour_bar_sigfigs(
-                            config, design_variable, climate_regime
-                        ),
-                    )
-                    for t in tickvals
-                ],
+                [sigfigs(t, tick_sigfigs) for t in tickvals],
             )
 
             # Create the figure that will be populated with the heatmap and
@@ -406,6 +309,23 @@ def add(app, config):
                     ),
                     showlegend=False,
                     uirevision="None",
+                    # Everything needed to recolour the figure client side.
+                    # The trace index is that of the figure: the colourbar
+                    # trace comes first. The stations overlay, if shown, is
+                    # coloured with this colour scale.
+                    meta={
+                        "colour_scale": {
+                            "colour_map": color_map_name,
+                            "num_colours": num_colours,
+                            "zmin": zmin,
+                            "zmax": zmax,
+                            "target": target,
+                            "scale": color_scale_type,
+                            "max_num_ticks": max_num_ticks,
+                            "tick_sigfigs": tick_sigfigs,
+                            "heatmap": 1 + heatmap_index,
+                        }
+                    },
                     **config["values"]["map"]["layout"]["main"],
                 )
             )
@@ -452,6 +372,194 @@ def add(app, config):
 
             return figure
 
+    @app.callback(Output("colour_table", "data"), Input("color_map", "value"))
+    def update_colour_table(color_map_name):
+        """
+        Provide the colours of the selected colour map, for recolouring the
+        map client side (see `dve/assets/map.js`).
+        """
+        colour_maps = config["values"]["map"]["colour_maps"]
+        if color_map_name not in (
+            *colour_maps,
+            *(f"{color}_r" for color in colour_maps),
+        ):
+            return None
+        num_colours_ctrl = config["values"]["ui"]["controls"]["num-colours"]
+        # A colour scale with a target value has up to one more colour than
+        # requested.
+        return colour_table(
+            color_map_name,
+            num_colours_ctrl["min"],
+            num_colours_ctrl["max"] + 1,
+        )
+
+    @app.callback(
+        Output("map_lonlat_overlay", "data"),
+        Input("main_tabs", "active_tab"),
+        Input("design_variable", "value"),
+        Input("climate_regime", "value"),
+        Input("future_dataset_id", "value"),
+        Input("show_grid", "on"),
+        Input("viewport-ds", "children"),
+    )
+    def update_lonlat_overlay(
+        main_tabs_active_tab,
+        design_variable,
+        climate_regime,
+        future_dataset_id,
+        show_grid,
+        viewport_ds,
+    ):
+        """
+        Provide the lon-lat graticule traces overlaid on the map, or None if
+        the graticule is not shown.
+        """
+        with timing(
+            "Update lon-lat overlay",
+            log=timing_log_info,
+            labels={"dv": design_variable, "regime": climate_regime},
+        ):
+            # Do not update if the tab is not selected
+            if main_tabs_active_tab != "map-tab":
+                return dash.no_update
+
+            if not show_grid:
+                return None
+
+            historical_dataset_id = "reconstruction"
+
+            ctx = dash.callback_context
+
+            viewport = viewport_ds and json.loads(viewport_ds)
+
+            if ctx.triggered and ctx.triggered[0]["prop_id"].startswith(
+                "viewport-ds"
+            ):
+                # Do not update if viewport dimensions have not changed.
+                # Grid covers entirety of Canada, and only changes when vp dims
+                # change.
+                if viewport and viewport["previous"]:
+                    vp_prev = viewport["previous"]
+                    vp_curr = viewport["current"]
+                    if math.isclose(
+                        vp_prev["x_max"] - vp_prev["x_min"],
+                        vp_curr["x_max"] - vp_curr["x_min"],
+                    ) and math.isclose(
+                        vp_prev["y_max"] - vp_prev["y_min"],
+                        vp_curr["y_max"] - vp_curr["y_min"],
+                    ):
+                        return dash.no_update
+
+            raster_filepath = filepath_for(
+                config,
+                design_variable,
+                climate_regime,
+                historical_dataset_id,
+                future_dataset_id,
+            )
+            # No map, no overlay.
+            if raster_filepath is None or not file_exists(raster_filepath):
+                return None
+
+            raster_dataset = get_data_object(
+                config,
+                design_variable,
+                climate_regime,
+                historical_dataset_id,
+                future_dataset_id,
+            )
+            rlon_size, rlat_size = raster_dataset.apply(
+                lambda dvds, ds: (ds.rlon.size, ds.rlat.size)
+            )
+            with timing("create lon-lat graticule", log=timing_log_debug):
+                return configured_lonlat_overlay(
+                    config["values"]["map"]["lonlat_overlay"],
+                    # It's not clear why the grid sizes should be taken
+                    # from the dataset, but that's how the code works. Ick.
+                    rlon_grid_size=rlon_size,
+                    rlat_grid_size=rlat_size,
+                    viewport=viewport and viewport["current"],
+                )
+
+    @app.callback(
+        Output("map_stations", "data"),
+        Input("main_tabs", "active_tab"),
+        Input("design_variable", "value"),
+        Input("climate_regime", "value"),
+        Input("show_stations", "on"),
+        Input("language", "value"),
+    )
+    def update_stations(
+        main_tabs_active_tab,
+        design_variable,
+        climate_regime,
+        show_stations,
+        lang,
+    ):
+        """
+        Provide the stations trace overlaid on the map, or None if stations
+        are not shown. The trace is coloured client side, with the colour
+        scale of the map.
+        """
+        with timing(
+            "Update stations overlay",
+            log=timing_log_info,
+            labels={"dv": design_variable, "regime": climate_regime},
+        ):
+            # Do not update if the tab is not selected
+            if main_tabs_active_tab != "map-tab":
+                return dash.no_update
+
+            if not (
+                show_stations
+                and dv_has_climate_regime(config, design_variable, "historical")
+            ):
+                return None
+
+            logger.debug("update_stations: get station dataset")
+            dataset = get_data_object(
+                config,
+                design_variable,
+                "historical",
+                historical_dataset_id="stations",
+            )
+            # Some DVs (e.g., IDFCF) have no stations.
+            if dataset is None:
+                return None
+            df = dataset.data_frame()
+            stations_column = dv_historical_stations_column(
+                config, design_variable
+            )
+            with timing("coord_prep for stations", log=timing_log_debug):
+                df = coord_prep(df, stations_column)
+            return go.Scattergl(
+                x=df.rlon,
+                y=df.rlat,
+                text=df[stations_column],
+                mode="markers",
+                marker=dict(
+                    size=10,
+                    symbol="circle",
+                    color=df[stations_column],
+                    line=dict(width=1, color="DarkSlateGrey"),
+                    showscale=False,  # Hide colorbar
+                ),
+                hovertemplate=map_station_hover_template(
+                    config, lang, design_variable, climate_regime
+                ),
+                name="",
+            )
+
+    app.clientside_callback(
+        ClientsideFunction(namespace="map", function_name="figure"),
+        Output("map_main_graph", "figure"),
+        Input("map_figure", "data"),
+        Input("map_lonlat_overlay", "data"),
+        Input("map_stations", "data"),
+        Input("colour_table", "data"),
+        Input("num_colors", "value"),
+    )
+
     @app.callback(
         Output("viewport-ds", "children"),
         [Input("map_main_graph", "relayoutData")],
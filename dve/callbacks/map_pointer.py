@@ -3,7 +3,7 @@ import functools
 import math
 
 import dash
-from dash.dependencies import Input, Output
+from dash.dependencies import ClientsideFunction, Input, Output, State
 from dash import html
 import dash_bootstrap_components as dbc
 
@@ -17,7 +17,7 @@ from dve.config.text import (
     climate_regime_label,
 )
 from dve.config.values import dv_has_climate_regime, dv_roundto, filepath_for
-from dve.data import get_data_object
+from dve.data import get_data_object, pointer_grid
 from dve.download_utils import (
     download_filename,
     download_url,
@@ -162,24 +162,17 @@ def add(app, config):
         return lon, lat, url, filename
 
     @app.callback(
-        Output("map_hover_info", "children"),
-        Input("map_main_graph", "hoverData"),
+        Output("map_grid", "data"),
         Input("design_variable", "value"),
         Input("climate_regime", "value"),
         Input("future_dataset_id", "value"),
-        Input("language", "value"),
     )
-    def display_hover_info(
-        hover_data, design_variable, climate_regime, future_dataset_id, lang
-    ):
-        # logger.debug(f"hover_data {hover_data}")
-
-        # Ignore if no hover data or if not hovering over map. Map curves are
-        # numbered > 1 due to the order they are added as traces to the figure.
-        if hover_data is None or hover_data["points"][0]["curveNumber"] <= 1:
-            return dash.no_update
-
-        # Ignore if there is no data for the current design variable,
+    def update_map_grid(design_variable, climate_regime, future_dataset_id):
+        """
+        Provide the description of the map grid from which the hover info is
+        computed and displayed client side (see `dve/assets/map.js`).
+        """
+        # Clear if there is no data for the current design variable,
         # climate regime and dataset (future GW, if future).
         raster_filepath = filepath_for(
             config,
@@ -191,30 +184,28 @@ def add(app, config):
         if raster_filepath is None:
             return None
 
-        # Clear if only the DV selection has changed
-        ctx = dash.callback_context
-        if ctx.triggered and ctx.triggered[0]["prop_id"].startswith(
-            "design_variable"
-        ):
-            return None
-
         # TODO: This is likely irrelevant now -- see clear if no data.
         if not dv_has_climate_regime(config, design_variable, climate_regime):
             return dash.no_update
 
-        rlon, rlat = pointer_rlonlat(hover_data)
-
-        lon, lat, *unused = download_info(
-            rlon,
-            rlat,
+        dataset = get_data_object(
+            config,
             design_variable,
             climate_regime,
             historical_dataset_id,
             future_dataset_id,
         )
+        return dataset.apply(pointer_grid)
 
-        # TODO: Must this return a list?
-        return [map_lon_lat_table(config, lang, lon=lon, lat=lat)]
+    app.clientside_callback(
+        ClientsideFunction(namespace="map", function_name="hover_info"),
+        Output("map_hover_info", "children"),
+        Input("map_main_graph", "hoverData"),
+        Input("design_variable", "value"),
+        Input("map_grid", "data"),
+        Input("language", "value"),
+        State("map_hover_labels", "data"),
+    )
 
     # TODO: This can be better done by setting the "href" and "download"
     #   properties on a static download link established in layout.py.
@@ -321,7 +312,11 @@ def add(app, config):
         """
         # logger.debug(f"click_data {click_data}")
 
-        with timing("Display click info", log=timing_log_info):
+        with timing(
+            "Display click info",
+            log=timing_log_info,
+            labels={"dv": design_variable, "regime": climate_regime},
+        ):
             # Do not update if the tab is not selected
             if main_tabs_active_tab != "map-tab":
                 return dash.no_update
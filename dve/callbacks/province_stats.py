@@ -0,0 +1,137 @@
+import logging
+
+import dash
+from dash.dependencies import Input, Output
+from dash import html
+import dash_bootstrap_components as dbc
+import numpy as np
+
+from dve.config.text import (
+    dv_label,
+    province_stats_column_label,
+    province_stats_no_data_msg,
+)
+from dve.config.values import dv_roundto, filepath_for
+from dve.data import get_data_object
+from dve.math_utils import round_to_multiple_array
+from dve.provinces import configured_percentiles, province_stats
+from dve.timing import timing
+
+
+logger = logging.getLogger(__name__)
+timing_log = logger.info
+
+historical_dataset_id = "reconstruction"
+
+
+def province_stats_table(config, lang, climate_regime, design_variable, stats):
+    """
+    Return a table of statistics of a design variable by province.
+
+    :param stats: tuple (Provinces, ZoneStats), as returned by
+      `dve.provinces.province_stats`.
+    """
+    provinces, zone_stats = stats
+    percentiles = configured_percentiles(config)
+    columns = (
+        [province_stats_column_label(config, lang, "province")]
+        + [province_stats_column_label(config, lang, "min")]
+        + [
+            province_stats_column_label(config, lang, "percentile", q=q)
+            for q in percentiles
+        ]
+        + [
+            province_stats_column_label(config, lang, "mean"),
+            province_stats_column_label(config, lang, "max"),
+        ]
+    )
+    roundto = dv_roundto(config, design_variable, climate_regime)
+    rows = round_to_multiple_array(
+        np.column_stack(
+            (
+                zone_stats.min,
+                *zone_stats.percentiles,
+                zone_stats.mean,
+                zone_stats.max,
+            )
+        ),
+        roundto,
+    )
+    return dbc.Table(
+        [
+            html.Caption(
+                dv_label(config, lang, design_variable, climate_regime),
+                style={"caption-side": "top", "padding": "0 0 0.5em 0"},
+            ),
+            html.Thead(html.Tr([html.Th(column) for column in columns])),
+            html.Tbody(
+                [
+                    html.Tr(
+                        [html.Th(name)]
+                        + [
+                            html.Td("n/a" if np.isnan(value) else value)
+                            for value in row.tolist()
+                        ]
+                    )
+                    for name, row in zip(provinces.names[lang], rows)
+                ]
+            ),
+        ],
+        bordered=True,
+        size="sm",
+    )
+
+
+def add(app, config):
+    @app.callback(
+        Output("province_stats", "children"),
+        Input("main_tabs", "active_tab"),
+        Input("design_variable", "value"),
+        Input("climate_regime", "value"),
+        Input("future_dataset_id", "value"),
+        Input("language", "value"),
+    )
+    def display_province_stats(
+        main_tabs_active_tab,
+        design_variable,
+        climate_regime,
+        future_dataset_id,
+        lang,
+    ):
+        with timing(
+            "Display province stats",
+            log=timing_log,
+            labels={"dv": design_variable, "regime": climate_regime},
+        ):
+            # Do not update if the tab is not selected
+            if main_tabs_active_tab != "map-tab":
+                return dash.no_update
+
+            # Only raster (gridded) data can be summarized.
+            raster_filepath = filepath_for(
+                config,
+                design_variable,
+                climate_regime,
+                historical_dataset_id,
+                future_dataset_id,
+            )
+            if raster_filepath is None or not raster_filepath.endswith(".nc"):
+                return province_stats_no_data_msg(config, lang)
+
+            dataset = get_data_object(
+                config,
+                design_variable,
+                climate_regime,
+                historical_dataset_id,
+                future_dataset_id,
+            )
+            if dataset is None:
+                return province_stats_no_data_msg(config, lang)
+
+            return province_stats_table(
+                config,
+                lang,
+                climate_regime,
+                design_variable,
+                province_stats(config, dataset, configured_percentiles(config)),
+            )
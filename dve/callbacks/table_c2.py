@@ -1,8 +1,9 @@
+import functools
 import logging
 
 import dash
-from dash.dependencies import Input, Output
-from dash import dash_table, dcc
+from dash.dependencies import Input, Output, State
+from dash import dash_table, dcc, html
 
 from dve.config.text import (
     future_change_factor_label,
@@ -10,6 +11,7 @@ from dve.config.text import (
     table_c2_title,
     table_c2_no_table_data_msg,
     table_c2_no_station_data_msg,
+    table_c2_download_button_text,
     location_label,
     province_label,
     longitude_label,
@@ -17,10 +19,23 @@ from dve.config.text import (
     table_c2_tab_label,
     dv_label,
 )
-from dve.config.values import dv_has_climate_regime, dv_roundto, filepath_for
+from dve.config.values import (
+    config_generation,
+    dv_has_climate_regime,
+    dv_roundto,
+    filepath_for,
+    resolved_filepath_for,
+)
+from dve.callbacks.utils import triggered_by
 from dve.config.validation import file_exists
 from dve.data import get_data_object
-from dve.math_utils import round_to_multiple
+from dve.file_status import registry as file_status_registry
+from dve.math_utils import round_to_multiple_array
+from dve.table_query import (
+    filter_data_frame,
+    query_data_frame,
+    sort_data_frame,
+)
 from dve.timing import timing
 
 
@@ -28,33 +43,18 @@ logger = logging.getLogger(__name__)
 timing_log = logger.info
 
 
-def make_data_table(config, lang, design_variable):
-    historical_name_and_units = dv_label(
-        config, lang, design_variable, climate_regime="historical"
-    )
+def value_column_ids(config, design_variable):
+    """
+    Return the ids of the design value columns of Table C2 for a design
+    variable: NBCC historical value, PCIC historical value, and a list of
+    future change factors.
+    """
     historical_units, future_units = (
         dv_units(config, design_variable, climate_regime, nice=False)
         for climate_regime in ("historical", "future")
     )
     future_dataset_ids = config["values"]["ui"]["future_change_factors"]
 
-    title = table_c2_title(config, lang, design_variable)
-
-    # Show error message if configured data file does not exist.
-    if not file_exists(
-        filepath_for(
-            config,
-            design_variable,
-            climate_regime="historical",
-            historical_dataset_id="table",
-        )
-    ):
-        return (title, dcc.Markdown(table_c2_no_table_data_msg(config, lang)))
-
-    historical_dataset = get_data_object(
-        config, design_variable, "historical", historical_dataset_id="table"
-    ).data_frame()
-
     nbcc_hx_value_col_id = f"{design_variable} (NBCC)"
 
     pcic_revised_hx_value_col_id = f"{design_variable} ({historical_units})"
@@ -66,29 +66,88 @@ def make_data_table(config, lang, design_variable):
         f"CF_{future_dataset_id}C{column_units_suffix}"
         for future_dataset_id in future_dataset_ids
     ]
+    return nbcc_hx_value_col_id, pcic_revised_hx_value_col_id, cf_value_col_ids
 
-    try:
-        display_dataset = historical_dataset[
-            [
-                "Location",
-                "prov",
-                "Longitude",
-                "Latitude",
-                nbcc_hx_value_col_id,
-                pcic_revised_hx_value_col_id,
-                *cf_value_col_ids,
-            ]
+
+def display_data_frame(config, design_variable):
+    """
+    Return the data displayed in Table C2 for a design variable: the
+    displayed columns of the configured data file, with change factors
+    rounded according to config.
+
+    :raises KeyError: if the data file lacks a displayed column.
+    """
+    historical_dataset = get_data_object(
+        config, design_variable, "historical", historical_dataset_id="table"
+    ).data_frame()
+    (
+        nbcc_hx_value_col_id,
+        pcic_revised_hx_value_col_id,
+        cf_value_col_ids,
+    ) = value_column_ids(config, design_variable)
+
+    display_dataset = historical_dataset[
+        [
+            "Location",
+            "prov",
+            "Longitude",
+            "Latitude",
+            nbcc_hx_value_col_id,
+            pcic_revised_hx_value_col_id,
+            *cf_value_col_ids,
         ]
-    except KeyError as e:
-        return (title, f"An error occurred reading Table C2: {str(e)}")
+    ]
 
     # Round CF values according to config
-    for col_id in cf_value_col_ids:
-        display_dataset[col_id] = display_dataset[col_id].apply(
-            lambda x: round_to_multiple(
-                x, dv_roundto(config, design_variable, "future")
+    roundto = dv_roundto(config, design_variable, "future")
+    return display_dataset.assign(
+        **{
+            col_id: round_to_multiple_array(
+                display_dataset[col_id].to_numpy(), roundto
             )
+            for col_id in cf_value_col_ids
+        }
+    )
+
+
+def table_c2_page_size(config):
+    return config["values"]["table_C2"].get("page_size", 50)
+
+
+def make_data_table(config, lang, design_variable):
+    """
+    Return the title and content of Table C2 for a design variable. The
+    table is paged, filtered and sorted server side (see
+    `dve.table_query`); it is returned with its first page of data.
+    """
+    historical_name_and_units = dv_label(
+        config, lang, design_variable, climate_regime="historical"
+    )
+    future_dataset_ids = config["values"]["ui"]["future_change_factors"]
+
+    title = table_c2_title(config, lang, design_variable)
+
+    # Show error message if configured data file does not exist.
+    if not file_exists(
+        filepath_for(
+            config,
+            design_variable,
+            climate_regime="historical",
+            historical_dataset_id="table",
         )
+    ):
+        return (title, dcc.Markdown(table_c2_no_table_data_msg(config, lang)))
+
+    try:
+        display_dataset = display_data_frame(config, design_variable)
+    except KeyError as e:
+        return (title, f"An error occurred reading Table C2: {str(e)}")
+
+    (
+        nbcc_hx_value_col_id,
+        pcic_revised_hx_value_col_id,
+        cf_value_col_ids,
+    ) = value_column_ids(config, design_variable)
 
     column_info = {
         "Location": {
@@ -131,46 +190,111 @@ def make_data_table(config, lang, design_variable):
         },
     }
 
+    page_size = table_c2_page_size(config)
+    records, page_current, page_count = query_data_frame(
+        display_dataset, page_size=page_size
+    )
+
     return (
         title,
-        dash_table.DataTable(
-            columns=[
-                {"id": id_, **column_info[id_]}
-                for id_ in display_dataset.columns
-            ],
-            style_table={
-                # "width": "100%",
-                # 'overflowX': 'auto',
-            },
-            style_cell={
-                "textAlign": "center",
-                "whiteSpace": "normal",
-                "height": "auto",
-                "padding": "5px",
-                "width": "2em",
-                "minWidth": "2em",
-                "maxWidth": "2em",
-                "overflow": "hidden",
-                "textOverflow": "ellipsis",
-            },
-            style_cell_conditional=[
-                {
-                    "if": {"column_id": "Location"},
-                    "width": "5em",
-                    "textAlign": "left",
-                }
-            ],
-            style_as_list_view=True,
-            style_header={"backgroundColor": "white", "fontWeight": "bold"},
-            page_action="none",
-            filter_action="native",
-            data=display_dataset.to_dict("records"),
-            export_format="csv",
+        html.Div(
+            [
+                html.Button(
+                    table_c2_download_button_text(config, lang),
+                    id="table-C2-download-button",
+                    className="btn btn-primary btn-sm mb-1",
+                ),
+                dash_table.DataTable(
+                    id="table-C2-data",
+                    columns=[
+                        {"id": id_, **column_info[id_]}
+                        for id_ in display_dataset.columns
+                    ],
+                    style_table={
+                        # "width": "100%",
+                        # 'overflowX': 'auto',
+                    },
+                    style_cell={
+                        "textAlign": "center",
+                        "whiteSpace": "normal",
+                        "height": "auto",
+                        "padding": "5px",
+                        "width": "2em",
+                        "minWidth": "2em",
+                        "maxWidth": "2em",
+                        "overflow": "hidden",
+                        "textOverflow": "ellipsis",
+                    },
+                    style_cell_conditional=[
+                        {
+                            "if": {"column_id": "Location"},
+                            "width": "5em",
+                            "textAlign": "left",
+                        }
+                    ],
+                    style_as_list_view=True,
+                    style_header={
+                        "backgroundColor": "white",
+                        "fontWeight": "bold",
+                    },
+                    page_action="custom",
+                    page_current=page_current,
+                    page_size=page_size,
+                    page_count=page_count,
+                    filter_action="custom",
+                    filter_query="",
+                    sort_action="custom",
+                    sort_mode="multi",
+                    sort_by=[],
+                    data=records,
+                ),
+            ]
         ),
     )
 
 
 def add(app, config):
+    # Table C2 for a design variable and language. The table depends only on
+    # these, the configured data file, and the configuration, so it is
+    # cached, keyed also by the file's modification time and the
+    # configuration generation, so that a replaced file or a reloaded
+    # configuration is picked up.
+    @functools.lru_cache(maxsize=64)
+    def data_table(design_variable, lang, mtime, generation):
+        return make_data_table(config, lang, design_variable)
+
+    # Data displayed in Table C2, queried for each page, filter and sort.
+    # Cached as `data_table` is.
+    @functools.lru_cache(maxsize=16)
+    def data_frame(design_variable, mtime, generation):
+        return display_data_frame(config, design_variable)
+
+    def table_data_frame(design_variable):
+        """
+        Return the data displayed in Table C2, or None if it cannot be read
+        (see `display_data_frame`).
+        """
+        try:
+            return data_frame(
+                design_variable,
+                table_mtime(design_variable),
+                config_generation(config),
+            )
+        except KeyError as e:
+            logger.warning(
+                f"Table C2 for {design_variable} cannot be read: {e}"
+            )
+            return None
+
+    def table_mtime(design_variable):
+        filepath = resolved_filepath_for(
+            config,
+            design_variable,
+            climate_regime="historical",
+            historical_dataset_id="table",
+        )
+        return filepath and file_status_registry.mtime(filepath)
+
     @app.callback(Output("table-tab", "label"), Input("language", "value"))
     def update_about_tab_label(lang):
         return table_c2_tab_label(config, lang)
@@ -194,6 +318,71 @@ def add(app, config):
                 None,
             )
 
-        with timing(f"Table C2 for {design_variable}", timing_log):
-            data_table = make_data_table(config, lang, design_variable)
-        return data_table
+        with timing(
+            f"Table C2 for {design_variable}",
+            timing_log,
+            labels={"description": "Table C2", "dv": design_variable},
+        ):
+            return data_table(
+                design_variable,
+                lang,
+                table_mtime(design_variable),
+                config_generation(config),
+            )
+
+    @app.callback(
+        Output("table-C2-data", "data"),
+        Output("table-C2-data", "page_current"),
+        Output("table-C2-data", "page_count"),
+        Input("table-C2-data", "page_current"),
+        Input("table-C2-data", "page_size"),
+        Input("table-C2-data", "sort_by"),
+        Input("table-C2-data", "filter_query"),
+        State("design_variable", "value"),
+        # The table is created with its first page of data.
+        prevent_initial_call=True,
+    )
+    def update_tablec2_page(
+        page_current, page_size, sort_by, filter_query, design_variable
+    ):
+        with timing(
+            f"Table C2 page for {design_variable}",
+            timing_log,
+            labels={"description": "Table C2 page", "dv": design_variable},
+        ):
+            display_dataset = table_data_frame(design_variable)
+            if display_dataset is None:
+                return [], 0, 0
+            # A new filter or sort order starts at the first page.
+            if triggered_by(
+                ("table-C2-data.filter_query", "table-C2-data.sort_by"),
+                dash.callback_context,
+            ):
+                page_current = 0
+            return query_data_frame(
+                display_dataset,
+                filter_query=filter_query,
+                sort_by=sort_by,
+                page_current=page_current,
+                page_size=page_size,
+            )
+
+    @app.callback(
+        Output("table-C2-download", "data"),
+        Input("table-C2-download-button", "n_clicks"),
+        State("table-C2-data", "sort_by"),
+        State("table-C2-data", "filter_query"),
+        State("design_variable", "value"),
+        prevent_initial_call=True,
+    )
+    def download_tablec2(n_clicks, sort_by, filter_query, design_variable):
+        # Download the whole table, as filtered and sorted.
+        display_dataset = table_data_frame(design_variable)
+        if display_dataset is None:
+            return dash.no_update
+        data = sort_data_frame(
+            filter_data_frame(display_dataset, filter_query), sort_by
+        )
+        return dcc.send_data_frame(
+            data.to_csv, f"table-C2-{design_variable}.csv", index=False
+        )
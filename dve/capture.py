@@ -0,0 +1,73 @@
+"""
+Capture of Dash callback requests, for replay by the load-test harness
+(`benchmarks/loadtest.py`).
+
+When environment variable `DVE_CAPTURE_FILE` is set, the body of every Dash
+callback request (`_dash-update-component`) is appended to that file, one
+JSON object per line:
+
+```
+{"time": <epoch seconds>, "session": <client address>, "body": <request body>}
+```
+
+To capture a realistic sequence, run the app with capture enabled, use it
+in a browser as a user would, and stop the app. The harness replays the
+captured requests in order, with the captured pauses between them if
+requested.
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+import flask
+
+from dve.dash_requests import update_component_path
+
+
+logger = logging.getLogger(__name__)
+
+
+class CaptureWriter:
+    """Appends captured requests to a file, one JSON object per line."""
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self._lock = threading.Lock()
+
+    def write(self, record):
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            with open(self.filepath, "a") as file:
+                file.write(line)
+
+
+def add(app, config):
+    """
+    Add capture of Dash callback requests to the app, if enabled.
+    """
+    filepath = os.environ.get("DVE_CAPTURE_FILE")
+    if not filepath:
+        return
+    logger.warning(f"Capturing Dash callback requests to {filepath}")
+    writer = CaptureWriter(filepath)
+    callback_path = update_component_path(app)
+
+    @app.server.before_request
+    def capture_request():
+        if flask.request.path != callback_path:
+            return
+        body = flask.request.get_json(silent=True)
+        if body is None:
+            return
+        try:
+            writer.write(
+                {
+                    "time": time.time(),
+                    "session": flask.request.remote_addr,
+                    "body": body,
+                }
+            )
+        except OSError as e:
+            logger.warning(f"Could not capture request: {e}")
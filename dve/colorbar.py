@@ -1,3 +1,4 @@
+import functools
 import logging
 import math
 
@@ -153,6 +154,30 @@ def colorscale_colors(colour_map_name, num_colours):
     return [matplotlib.colors.rgb2hex(cmap(i)) for i in range(cmap.N)]
 
 
+@functools.lru_cache(maxsize=32)
+def colour_table(colour_map_name, min_colours, max_colours):
+    """
+    Return the colours (see `colorscale_colors`) derived from a named
+    matplotlib colour map for each number of colours in a range, for
+    recolouring the map client side (see `dve/assets/map.js`). Colours are
+    computed here rather than client side so that they are exactly those
+    the server would use.
+
+    :param colour_map_name: matplotlib colour map name
+    :param min_colours: minimum number of colours
+    :param max_colours: maximum number of colours
+    :return: dict with keys "name", the colour map name, and "colours",
+        a dict mapping number of colours to list of colours
+    """
+    return {
+        "name": colour_map_name,
+        "colours": {
+            num_colours: colorscale_colors(colour_map_name, num_colours)
+            for num_colours in range(min_colours, max_colours + 1)
+        },
+    }
+
+
 def discrete_colorscale_colorbar(
     boundaries, colorscale, scale, tickvals, ticktext, **kwargs
 ):
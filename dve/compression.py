@@ -0,0 +1,210 @@
+"""
+HTTP response compression.
+
+Responses are compressed with Brotli or gzip, whichever the client prefers
+(request header `Accept-Encoding`) among the configured encodings, provided
+that the response:
+
+- is a complete successful response (status 200, no `Content-Range`), and
+  not already encoded. Partial content (status 206, for a `Range` request)
+  is a range of the bytes of the uncompressed representation, so it is sent
+  as is;
+- has one of the configured content types;
+- is at least the configured minimum size, when its size is known. Small
+  responses gain little from compression.
+
+Complete responses are compressed whole. Compressing a large response (e.g.,
+a map figure, about 1 MB of JSON) takes tens of milliseconds, and many
+responses are repeated: the same figure, overlay or table for many users,
+and Dash's JavaScript bundles for every page load. Compressed responses
+within a configured range of sizes are therefore cached (`cache`), keyed by
+encoding and a digest of their content, so that each is compressed only once
+per worker process. Because the key is the content itself, a cached
+response can never be stale.
+
+Streamed responses (e.g., raster exports; see `dve.export`) are compressed
+as they are sent, chunk by chunk, and are not cached.
+
+Dash's own compression option (Flask-Compress) is not used, so that
+compression can be configured and cached here.
+
+Configuration: `values.compression` (see `config/values/compression.yml`).
+Environment variable `COMPRESSION_CACHE_SIZE` (default 100) sets the number
+of compressed responses cached.
+
+The bytes saved on callback responses are visible in the payload metrics
+(see `dve.payloads`), as the difference between `dve_callback_response_bytes`
+and `dve_callback_sent_bytes` (labelled by encoding). The CPU cost is
+recorded in metric `dve_compression_seconds`, labelled by encoding.
+"""
+import gzip
+import hashlib
+import logging
+import os
+import zlib
+from time import perf_counter
+
+import brotli
+import flask
+
+from dve.data import ThreadSafeCache
+from dve.metrics import metrics
+
+
+logger = logging.getLogger(__name__)
+
+# Cache of compressed responses, keyed by encoding and content digest.
+cache = ThreadSafeCache(
+    "CompressedResponses",
+    on_miss=None,
+    maxsize=int(os.environ.get("COMPRESSION_CACHE_SIZE", 100)),
+    sizeof=len,
+)
+
+
+def compress(data, encoding, level):
+    """
+    Compress data.
+
+    :param data: bytes
+    :param encoding: "br" or "gzip"
+    :param level: Compression level (Brotli quality or gzip level)
+    :return: bytes
+    """
+    start = perf_counter()
+    if encoding == "br":
+        result = brotli.compress(data, quality=level)
+    else:
+        # A fixed mtime makes the output depend only on the data.
+        result = gzip.compress(data, compresslevel=level, mtime=0)
+    metrics.observe(
+        "dve_compression_seconds",
+        perf_counter() - start,
+        {"encoding": encoding},
+    )
+    return result
+
+
+def compress_chunks(chunks, encoding, level):
+    """
+    Generate the compressed content of an iterable of chunks (bytes). The
+    compressed content of each chunk is flushed with the chunk, so that
+    streaming is preserved: a client need not wait for further chunks to
+    receive it.
+
+    :param chunks: iterable of bytes
+    :param encoding: "br" or "gzip"
+    :param level: Compression level (Brotli quality or gzip level)
+    """
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=level)
+        for chunk in chunks:
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+    else:
+        # wbits 31: gzip container, maximum window.
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            yield compressor.compress(chunk) + compressor.flush(
+                zlib.Z_SYNC_FLUSH
+            )
+        yield compressor.flush()
+
+
+def compressed_stream(response, encoding, level):
+    """
+    Return an iterable of the compressed content of a streamed response,
+    which closes the response's original iterable when it is closed.
+    """
+    body = response.response
+    chunks = response.iter_encoded()
+
+    def stream():
+        try:
+            yield from compress_chunks(chunks, encoding, level)
+        finally:
+            if hasattr(body, "close"):
+                body.close()
+
+    return stream()
+
+
+def compress_response(config, response, encoding):
+    """
+    Compress a response in place (see module docstring).
+
+    :param config: Compression config (`values.compression`).
+    :param response: Flask response.
+    :param encoding: "br" or "gzip"
+    """
+    level = config["levels"][encoding]
+
+    if response.is_streamed:
+        response.direct_passthrough = False
+        response.response = compressed_stream(response, encoding, level)
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        cache_config = config["cache"]
+        if cache_config["min_size"] <= len(data) <= cache_config["max_size"]:
+            key = (encoding, hashlib.blake2b(data, digest_size=16).digest())
+            data = cache.fetch(
+                key, on_miss=lambda key: compress(data, encoding, level)
+            )
+        else:
+            data = compress(data, encoding, level)
+        response.set_data(data)
+
+    response.headers["Content-Encoding"] = encoding
+
+    # A compressed response is a different representation, so it must have
+    # a different entity tag. Requests conditional on the tag are evaluated
+    # against the new one.
+    etag, weak = response.get_etag()
+    if etag is not None:
+        response.set_etag(f"{etag}-{encoding}", weak)
+        response.make_conditional(flask.request)
+
+
+def add(app, config):
+    """
+    Add response compression to the app.
+
+    Flask runs after-request functions in the reverse order of their
+    registration, so this must be added before any others that inspect
+    response content (e.g., `dve.payloads`, `dve.capture`), in order that
+    they see it uncompressed.
+    """
+    compression_config = config["values"]["compression"]
+    if not compression_config["enabled"]:
+        return
+
+    encodings = compression_config["encodings"]
+    mimetypes = set(compression_config["mimetypes"])
+    min_size = compression_config["min_size"]
+
+    @app.server.after_request
+    def compress_after_request(response):
+        if (
+            response.mimetype not in mimetypes
+            or response.status_code != 200
+            or "Content-Range" in response.headers
+            or "Content-Encoding" in response.headers
+        ):
+            return response
+
+        # The response depends on the request's Accept-Encoding, whether or
+        # not it is compressed.
+        response.vary.add("Accept-Encoding")
+
+        if (
+            response.content_length is not None
+            and response.content_length < min_size
+        ):
+            return response
+        encoding = flask.request.accept_encodings.best_match(encodings)
+        if encoding is None:
+            return response
+
+        compress_response(compression_config, response, encoding)
+        return response
@@ -0,0 +1,201 @@
+"""
+This module compiles the configuration into an immutable, indexed form.
+
+The values configured for each design variable (filepaths, units, rounding,
+colour defaults, etc.) are looked up many times in the course of every map
+update, map click, and table build. Looking them up in the raw configuration
+means walking nested dicts on every access. Instead, the configuration is
+compiled once into a `ConfigIndex`, which holds a typed record per design
+variable and a flat map from (design variable, climate regime, dataset id)
+to filepath. The accessor functions in `dve.config.values` look up values in
+the index.
+
+The index is stored in the configuration under the key `index`. It is
+compiled when the app configuration is loaded, or otherwise on first use
+(see `config_index`).
+
+Each index has a generation number, distinct from that of every other index
+compiled in the process. Caches of values derived from the configuration
+are keyed by it, so that they are not used once the configuration is
+reloaded (see `dve.reload`).
+
+Values that are not configured are recorded as None. The accessors in
+`dve.config.values` raise `KeyError` for those that must be configured.
+"""
+import functools
+import itertools
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Optional, Tuple
+
+from pkg_resources import resource_filename
+
+
+# Map from historical dataset id to path of its filepath in the config for
+# a design variable's historical datasets.
+historical_dataset_paths = {
+    "stations": ("stations", "path"),
+    "table": ("table_C2",),
+    "model": ("model",),
+    "reconstruction": ("reconstruction",),
+}
+
+
+class ClimateRegimeRecord(NamedTuple):
+    """Configuration of a design variable for a single climate regime."""
+
+    units: Optional[str]
+    roundto: Optional[float]
+    colour_map: Optional[str]
+    colour_scale_default: Optional[str]
+    colour_scale_disable_logarithmic: bool
+    colour_bar_sigfigs: Optional[int]
+    # Map from dataset id to filepath (as specified in config)
+    filepaths: Mapping[str, str]
+
+
+class DvRecord(NamedTuple):
+    """Configuration of a design variable."""
+
+    id: str
+    tier: Optional[int]
+    stations_column: Optional[str]
+    # Map from climate regime to climate regime record
+    climate_regimes: Mapping[str, ClimateRegimeRecord]
+
+
+# Source of index generation numbers.
+generations = itertools.count()
+
+
+class ConfigIndex(NamedTuple):
+    """Compiled configuration."""
+
+    # Map from design variable id to design variable record
+    dvs: Mapping[str, DvRecord]
+    # Map from (design variable, climate regime, dataset id) to filepath
+    filepaths: Mapping[Tuple[str, str, str], str]
+    # Map from filepath (as specified in config) to absolute filepath
+    resolved_filepaths: Mapping[str, str]
+    # Map from units id to tuple (nice units, separator)
+    units: Mapping[str, Tuple[str, str]]
+    # Generation number
+    generation: int
+
+
+@functools.lru_cache(maxsize=None)
+def resolve_filepath(filepath):
+    """
+    Return the absolute filepath for a filepath specified in the config.
+    Config filepaths are relative to the `dve` package.
+    """
+    return resource_filename("dve", filepath)
+
+
+def compile_filepaths(cr_config, climate_regime):
+    datasets = cr_config.get("datasets") or {}
+    if climate_regime == "historical":
+        filepaths = {}
+        for dataset_id, path in historical_dataset_paths.items():
+            value = datasets
+            for key in path:
+                value = value.get(key) if isinstance(value, dict) else None
+            if value is not None:
+                filepaths[dataset_id] = value
+        return filepaths
+    return {
+        dataset_id: filepath
+        for dataset_id, filepath in datasets.items()
+        if filepath is not None
+    }
+
+
+def compile_climate_regime(cr_config, climate_regime):
+    scale = cr_config.get("scale") or {}
+    return ClimateRegimeRecord(
+        units=cr_config.get("units"),
+        roundto=cr_config.get("roundto"),
+        colour_map=cr_config.get("colour_map"),
+        colour_scale_default=scale.get("default"),
+        colour_scale_disable_logarithmic=scale.get(
+            "disable_logarithmic", False
+        ),
+        colour_bar_sigfigs=(cr_config.get("colorbar") or {}).get("sigfigs"),
+        filepaths=MappingProxyType(
+            compile_filepaths(cr_config, climate_regime)
+        ),
+    )
+
+
+def compile_dv(design_variable, dv_config):
+    climate_regimes = {
+        climate_regime: compile_climate_regime(
+            dv_config[climate_regime], climate_regime
+        )
+        for climate_regime in ("historical", "future")
+        if climate_regime in dv_config
+    }
+    try:
+        stations_column = dv_config["historical"]["datasets"]["stations"][
+            "column"
+        ]
+    except (KeyError, TypeError):
+        stations_column = None
+    return DvRecord(
+        id=design_variable,
+        tier=dv_config.get("tier"),
+        stations_column=stations_column,
+        climate_regimes=MappingProxyType(climate_regimes),
+    )
+
+
+def compile_config(config):
+    """
+    Compile a configuration into a `ConfigIndex`.
+
+    :param config: Configuration (as loaded from the app config file).
+    :return: ConfigIndex
+    """
+    dvs = {
+        design_variable: compile_dv(design_variable, dv_config)
+        for design_variable, dv_config in config["values"]["dvs"].items()
+    }
+    filepaths = {
+        (design_variable, climate_regime, dataset_id): filepath
+        for design_variable, dv_record in dvs.items()
+        for climate_regime, cr_record in dv_record.climate_regimes.items()
+        for dataset_id, filepath in cr_record.filepaths.items()
+    }
+    units = {
+        units_id: (
+            definition["nice"],
+            " " if definition.get("separator", True) else "",
+        )
+        for units_id, definition in (
+            config["values"].get("units") or {}
+        ).items()
+        if "nice" in definition
+    }
+    return ConfigIndex(
+        dvs=MappingProxyType(dvs),
+        filepaths=MappingProxyType(filepaths),
+        resolved_filepaths=MappingProxyType(
+            {
+                filepath: resolve_filepath(filepath)
+                for filepath in set(filepaths.values())
+            }
+        ),
+        units=MappingProxyType(units),
+        generation=next(generations),
+    )
+
+
+def config_index(config):
+    """
+    Return the index of a configuration, compiling it if it has not been
+    compiled already.
+    """
+    try:
+        return config["index"]
+    except KeyError:
+        index = config["index"] = compile_config(config)
+        return index
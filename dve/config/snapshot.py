@@ -0,0 +1,146 @@
+"""
+Fast loading of the app configuration by way of a snapshot.
+
+The app configuration is spread over dozens of YAML files, tied together by
+`!include` tags, and parsing them all takes a significant part of app startup.
+To avoid that, the loaded configuration is saved in a snapshot file, keyed by
+a hash of the contents of all the YAML source files. On subsequent loads, if
+no source file has changed, the configuration is loaded from the snapshot,
+which takes milliseconds. Finding the source files requires only a scan of
+each file for `!include` tags, not a YAML parse.
+
+Snapshots are stored in the directory named by the environment variable
+`DVE_CONFIG_SNAPSHOT_DIR` (default: `dve-config-snapshots` in the system
+temporary directory). If the variable is set to the empty string, snapshots
+are not used.
+
+Snapshots are written with `marshal`, which is fast, handles all the plain
+data types YAML produces, and, unlike `pickle`, cannot execute code on load.
+A configuration that contains a value `marshal` cannot handle is simply not
+snapshotted.
+"""
+import glob
+import hashlib
+import logging
+import marshal
+import os
+import re
+import sys
+import tempfile
+
+import yaml
+
+
+logger = logging.getLogger(__name__)
+
+default_snapshot_dir = os.path.join(
+    tempfile.gettempdir(), "dve-config-snapshots"
+)
+
+include_pattern = re.compile(r"!include\s+['\"]?([^\s'\"]+)")
+
+
+def source_files(filepath, base_dir="."):
+    """
+    Return the list of YAML files that make up a configuration: the file
+    itself and, recursively, the files it includes. Include paths are
+    relative to `base_dir`, as they are for the `!include` tag processor.
+    """
+    result = []
+    pending = [filepath]
+    while pending:
+        path = pending.pop()
+        if path in result:
+            continue
+        result.append(path)
+        with open(path, "r") as file:
+            text = file.read()
+        for pattern in include_pattern.findall(text):
+            pending += sorted(glob.glob(os.path.join(base_dir, pattern)))
+    return result
+
+
+def source_hash(filepaths):
+    """
+    Return a hash of the names and contents of a list of files, and of the
+    Python version (on which the snapshot format depends).
+    """
+    digest = hashlib.sha256(sys.version.encode())
+    for filepath in sorted(filepaths):
+        digest.update(filepath.encode())
+        with open(filepath, "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+def load_yaml(filepath, loader=yaml.FullLoader):
+    """Load a configuration from YAML source files."""
+    with open(filepath, "r") as file:
+        return yaml.load(file, Loader=loader)
+
+
+def write_snapshot(snapshot_filepath, config):
+    try:
+        data = marshal.dumps(config)
+    except ValueError as e:
+        logger.info(f"Configuration cannot be snapshotted: {e}")
+        return
+    os.makedirs(os.path.dirname(snapshot_filepath), mode=0o700, exist_ok=True)
+    # Write atomically, so that concurrently starting processes never read a
+    # partial snapshot.
+    fd, temp_filepath = tempfile.mkstemp(
+        dir=os.path.dirname(snapshot_filepath)
+    )
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        os.replace(temp_filepath, snapshot_filepath)
+    except OSError:
+        os.unlink(temp_filepath)
+        raise
+
+
+def load_config(
+    filepath, snapshot_dir=None, base_dir=".", loader=yaml.FullLoader
+):
+    """
+    Load a configuration, from a snapshot if a valid one exists, otherwise
+    from its YAML source files (and then save a snapshot).
+
+    :param filepath: Filepath of main configuration file.
+    :param snapshot_dir: Directory for snapshots. Defaults to the value of
+      environment variable `DVE_CONFIG_SNAPSHOT_DIR`. Empty string disables
+      snapshots.
+    :param base_dir: Directory relative to which include paths are resolved.
+    :param loader: YAML loader class, with an `!include` tag processor for
+      `base_dir`.
+    :return: configuration
+    """
+    if snapshot_dir is None:
+        snapshot_dir = os.environ.get(
+            "DVE_CONFIG_SNAPSHOT_DIR", default_snapshot_dir
+        )
+    if not snapshot_dir:
+        return load_yaml(filepath, loader)
+
+    filepaths = source_files(filepath, base_dir=base_dir)
+    snapshot_filepath = os.path.join(
+        snapshot_dir, f"config-{source_hash(filepaths)}.marshal"
+    )
+    try:
+        with open(snapshot_filepath, "rb") as file:
+            config = marshal.load(file)
+        logger.debug(f"Configuration loaded from '{snapshot_filepath}'")
+        return config
+    except FileNotFoundError:
+        pass
+    except (OSError, EOFError, ValueError, TypeError) as e:
+        logger.warning(f"Invalid configuration snapshot: {e}")
+
+    config = load_yaml(filepath, loader)
+    try:
+        write_snapshot(snapshot_filepath, config)
+        logger.debug(f"Configuration snapshot saved to '{snapshot_filepath}'")
+    except OSError as e:
+        logger.warning(f"Could not save configuration snapshot: {e}")
+    return config
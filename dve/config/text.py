@@ -314,6 +314,10 @@ def table_c2_no_station_data_msg(config, lang, design_variable):
     )
 
 
+def table_c2_download_button_text(config, lang):
+    return config["text"][lang]["labels"]["table_C2"]["download_button_text"]
+
+
 def location_label(config, lang, which="long"):
     return config["text"][lang]["labels"]["misc"]["location"][which]
 
@@ -344,6 +348,26 @@ def map_pointer_output_heading(config, lang):
     )
 
 
+def province_stats_heading(config, lang):
+    cfg = config["text"][lang]["labels"]["province_stats"]
+    return dbc.Col(
+        [
+            html.H5(cfg["title"]),
+            dcc.Markdown(cfg["subtitle"], style={"font-size": "0.8em"}),
+        ]
+    )
+
+
+def province_stats_column_label(config, lang, column, **kwargs):
+    return config["text"][lang]["labels"]["province_stats"]["columns"][
+        column
+    ].format(**kwargs)
+
+
+def province_stats_no_data_msg(config, lang):
+    return config["text"][lang]["labels"]["province_stats"]["no_data"]
+
+
 def map_no_dvs_for_climate_regime_msg(
     config, lang, climate_regime, design_variable
 ):
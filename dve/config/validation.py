@@ -1,15 +1,22 @@
-import os.path
-from pkg_resources import resource_filename
 import logging
+from dve.config.index import (
+    config_index,
+    historical_dataset_paths,
+    resolve_filepath,
+)
 from dve.dict_utils import path_get
+from dve.file_status import registry
 
 
 logger = logging.getLogger(__name__)
 
 
 def file_exists(filepath):
-    filepath = resource_filename("dve", filepath)
-    return os.path.isfile(filepath)
+    """
+    Return a boolean indicating whether a file specified in the config
+    exists. The answer comes from the file status registry, so it is cheap.
+    """
+    return registry.exists(resolve_filepath(filepath))
 
 
 def validate_filepath(filepath):
@@ -35,35 +42,51 @@ def validate(config):
     Validate a configuration. Specifically:
     - Check that all filepaths specified in config exist. Log a warning message
       for those which do not exist.
+
+    Files are checked concurrently, and their status is registered in the file
+    status registry (which answers subsequent `file_exists` inquiries).
     """
+    index = config_index(config)
+
+    registry.register(
+        {
+            resolve_filepath(filepath)
+            for filepath in (
+                *config["values"]["paths"].values(),
+                *index.filepaths.values(),
+            )
+        }
+    )
+
     for filepath in config["values"]["paths"].values():
         validate_filepath(filepath)
 
     for design_variable in config["values"]["ui"]["dvs"]:
-
-        # Validate historical filepaths, if present
-        cfg_base_path = f"dvs/{design_variable}/historical/datasets"
-        if path_get(config, cfg_base_path, separator="/") is None:
-            logger.info(
-                f"No historical datasets specified for {design_variable}"
+        if design_variable not in index.dvs:
+            logger.warning(
+                f"Design variable {design_variable} is not configured."
             )
-        else:
-            for cfg_ext_path in (
-                "model",
-                "reconstruction",
-                "stations/path",
-                "table_C2",
-            ):
-                validate_config(
-                    config, f"{cfg_base_path}/{cfg_ext_path}", separator="/"
-                )
-
-        # Validate future filepaths, if present.
-        cfg_base_path = f"dvs/{design_variable}/future/datasets"
-        if path_get(config, cfg_base_path, separator="/") is None:
-            logger.info(f"No future datasets specified for {design_variable}")
-        else:
-            for cfg_ext_path in config["values"]["ui"]["future_change_factors"]:
-                validate_config(
-                    config, f"{cfg_base_path}/{cfg_ext_path}", separator="/"
+            continue
+        for climate_regime, dataset_ids in (
+            ("historical", historical_dataset_paths.keys()),
+            ("future", config["values"]["ui"]["future_change_factors"]),
+        ):
+            filepaths = index.dvs[design_variable].climate_regimes.get(
+                climate_regime
+            )
+            filepaths = filepaths and filepaths.filepaths
+            if not filepaths:
+                logger.info(
+                    f"No {climate_regime} datasets specified for "
+                    f"{design_variable}"
                 )
+                continue
+            for dataset_id in dataset_ids:
+                filepath = filepaths.get(dataset_id)
+                if filepath is None:
+                    logger.warning(
+                        f"Expected config for {climate_regime} dataset "
+                        f"'{dataset_id}' of {design_variable} is not present."
+                    )
+                else:
+                    validate_filepath(filepath)
@@ -1,9 +1,17 @@
-from dve.dict_utils import path_get
+from dve.config.index import config_index
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def config_generation(config):
+    """
+    Return the generation number of the configuration, which changes when it
+    is reloaded (see `dve.config.index`).
+    """
+    return config_index(config).generation
+
+
 def filepath_for(
     config,
     design_variable,
@@ -11,19 +19,36 @@ def filepath_for(
     historical_dataset_id=None,
     future_dataset_id=None,
 ):
-    root_path = f"values/dvs/{design_variable}/{climate_regime}/datasets"
+    dataset_id = (
+        historical_dataset_id
+        if climate_regime == "historical"
+        else future_dataset_id
+    )
+    return config_index(config).filepaths.get(
+        (design_variable, climate_regime, dataset_id)
+    )
 
-    if climate_regime == "historical":
-        ext_path = {
-            "stations": "stations/path",
-            "table": "table_C2",
-            "model": "model",
-            "reconstruction": "reconstruction",
-        }[historical_dataset_id]
-    else:
-        ext_path = future_dataset_id
 
-    return path_get(config, f"{root_path}/{ext_path}", separator="/")
+def resolved_filepath_for(
+    config,
+    design_variable,
+    climate_regime,
+    historical_dataset_id=None,
+    future_dataset_id=None,
+):
+    """
+    Return the absolute filepath for a dataset; see `filepath_for`.
+    """
+    filepath = filepath_for(
+        config,
+        design_variable,
+        climate_regime,
+        historical_dataset_id,
+        future_dataset_id,
+    )
+    if filepath is None:
+        return None
+    return config_index(config).resolved_filepaths[filepath]
 
 
 def filepath_defined(*args, **kwargs):
@@ -35,20 +60,47 @@ def dv_has_climate_regime(config, design_variable, climate_regime):
     Return a boolean indicating whether a DV has definitions for specific
     climate regime (historical or future) datasets.
     """
-    return climate_regime in config["values"]["dvs"][design_variable]
+    return (
+        climate_regime
+        in config_index(config).dvs[design_variable].climate_regimes
+    )
+
+
+def required(value, *path):
+    """
+    Return a value from the configuration index, or raise `KeyError`, as a
+    lookup in the configuration itself would, if it is not configured (the
+    index records a missing value as None).
+
+    :param value: Value from the index.
+    :param path: Path of the value in `values/dvs`, for the error message.
+    """
+    if value is None:
+        raise KeyError("/".join(path))
+    return value
 
 
 def dv_tier(config, design_variable):
-    return config["values"]["dvs"][design_variable]["tier"]
+    return required(
+        config_index(config).dvs[design_variable].tier,
+        design_variable,
+        "tier",
+    )
+
+
+def dv_climate_regime(config, design_variable, climate_regime):
+    """
+    Return the compiled configuration record of a design variable for a
+    climate regime.
+    """
+    return config_index(config).dvs[design_variable].climate_regimes[
+        climate_regime
+    ]
 
 
 def nice_units(config, units):
     try:
-        definition = config["values"]["units"][units]
-        return (
-            definition["nice"],
-            (" " if definition.get("separator", True) else ""),
-        )
+        return config_index(config).units[units]
     except KeyError:
         return units, " "
 
@@ -64,43 +116,68 @@ def dv_units(config, design_variable, climate_regime, nice=True):
     Return the units of a given design variable, for historical or future
     projections.
     """
-    units = config["values"]["dvs"][design_variable][climate_regime]["units"]
+    units = required(
+        dv_climate_regime(config, design_variable, climate_regime).units,
+        design_variable,
+        climate_regime,
+        "units",
+    )
     if not nice:
         return units
     return nice_units(config, units)[0]
 
 
 def dv_roundto(config, design_variable, climate_regime):
-    return config["values"]["dvs"][design_variable][climate_regime]["roundto"]
+    return required(
+        dv_climate_regime(config, design_variable, climate_regime).roundto,
+        design_variable,
+        climate_regime,
+        "roundto",
+    )
 
 
 def dv_colour_map(config, design_variable, climate_regime):
-    return config["values"]["dvs"][design_variable][climate_regime][
-        "colour_map"
-    ]
+    return required(
+        dv_climate_regime(config, design_variable, climate_regime).colour_map,
+        design_variable,
+        climate_regime,
+        "colour_map",
+    )
 
 
 def dv_colour_scale_default(config, design_variable, climate_regime):
-    return config["values"]["dvs"][design_variable][climate_regime]["scale"][
-        "default"
-    ]
+    return required(
+        dv_climate_regime(
+            config, design_variable, climate_regime
+        ).colour_scale_default,
+        design_variable,
+        climate_regime,
+        "scale/default",
+    )
 
 
 def dv_colour_scale_disable_logarithmic(
     config, design_variable, climate_regime
 ):
-    return config["values"]["dvs"][design_variable][climate_regime][
-        "scale"
-    ].get("disable_logarithmic", False)
+    return dv_climate_regime(
+        config, design_variable, climate_regime
+    ).colour_scale_disable_logarithmic
 
 
 def dv_colour_bar_sigfigs(config, design_variable, climate_regime):
-    return config["values"]["dvs"][design_variable][climate_regime]["colorbar"][
-        "sigfigs"
-    ]
+    return required(
+        dv_climate_regime(
+            config, design_variable, climate_regime
+        ).colour_bar_sigfigs,
+        design_variable,
+        climate_regime,
+        "colorbar/sigfigs",
+    )
 
 
 def dv_historical_stations_column(config, design_variable):
-    return config["values"]["dvs"][design_variable]["historical"]["datasets"][
-        "stations"
-    ]["column"]
+    return required(
+        config_index(config).dvs[design_variable].stations_column,
+        design_variable,
+        "historical/datasets/stations/column",
+    )
@@ -0,0 +1,18 @@
+"""
+Helpers for identifying Dash callback requests, for instrumentation (see
+modules `dve.profiling`, `dve.tracing`, `dve.capture`).
+"""
+
+
+def update_component_path(app):
+    """Return the path of the Dash callback route of an app."""
+    return f"{app.config.routes_pathname_prefix}_dash-update-component"
+
+
+def callback_label(request):
+    """
+    Return a label for the callback invoked by a Dash callback request,
+    namely its output(s).
+    """
+    body = request.get_json(silent=True) or {}
+    return body.get("output", "unknown")
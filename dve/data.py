@@ -9,12 +9,13 @@ access (and thread-safe access to itself, too, which is essential).
 
 Two classes provide convenient thread-safe access to the two types
 of file-data objects. They are structured very similarly and both use
-(separate) thread safe caches to manage them. These classes also provide
+(separate) thread safe caches to manage them. `DvXrDataset` also provides
 thread-safe access to the data itself, which is probably unnecessary, since
-all file access is conducted under the cache thread lock, forcing
-serialization of access to *all* files. A more sophisticated approach to
-cache invalidation (e.g., managing an "in-use" flag per cached item) would
-provide for greater concurrency.
+all its file access is conducted under the cache thread lock, forcing
+serialization of access to *all* raster files. A more sophisticated approach
+to cache invalidation (e.g., managing an "in-use" flag per cached item) would
+provide for greater concurrency. `PdCsvDataset` items hold no open file,
+and are never modified, so they are read without holding any lock.
 
 Finally, the perhaps too-generic `get_data` function uses the configuration
 to turn convenient requests for data into actual file accesses, and  dispatches
@@ -26,22 +27,32 @@ TODO: Determine whether data access, which is read-only, needs thread locking.
 TODO: `DvXrDataset`, `PdCsvDataset` have a very common structure. Factor this
   out into a base class factory.
 """
+import hashlib
+import json
 import math
 import os
 from collections import namedtuple
+from contextlib import contextmanager
 from random import randrange
 import logging
 import threading
-from pkg_resources import resource_filename
+import time
+from time import perf_counter
 
+import numpy as np
 import pandas as pd
+import shapely.geometry
+import shapely.vectorized
 import xarray
 
 from climpyrical.data import check_valid_data, check_valid_keys
 
+from dve.config.index import resolve_filepath
 from dve.config.validation import file_exists
 from dve.config.values import filepath_for
+from dve.file_status import registry as file_status_registry
 from dve.map_utils import rlonlat_to_rindices, rindices_to_lonlat
+from dve.math_utils import rotated_pole_to_lonlat
 from dve.timing import timing
 
 
@@ -62,17 +73,49 @@ class ThreadSafeCache:
     - *Yields* its result from within the cache thread lock to ensure that the
       cached item cannot be evicted by another cache request (and thus become
       unusable) while something is being done with it.
+    - Keeps statistics on its use (see `stats`).
     """
 
-    def __init__(self, name, on_miss, on_evict=None, maxsize=None):
+    def __init__(
+        self,
+        name,
+        on_miss,
+        on_evict=None,
+        maxsize=None,
+        sizeof=None,
+        is_open=None,
+    ):
+        """
+        :param name: Name of cache (for logging and statistics).
+        :param on_miss: Function called with the key to create a missing item.
+        :param on_evict: Function called with the key and item to finalize an
+          item before it is evicted.
+        :param maxsize: Maximum number of items in cache.
+        :param sizeof: Function returning the size, in bytes, of an item.
+          Called once per item, when the item is created. Optional.
+        :param is_open: Function returning a boolean indicating whether an
+          item holds an open file. Optional.
+        """
         self.name = name
         self.on_miss = on_miss
         self.on_evict = on_evict
         self.maxsize = maxsize
+        self.sizeof = sizeof
+        self.is_open = is_open
         self._lock = threading.RLock()
         self._cache = {}
-
-    def get(self, key):
+        # Statistics
+        self._created = {}
+        self._bytes = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.on_miss_time = 0.0
+        self.lock_wait_time = 0.0
+        self.max_lock_wait_time = 0.0
+
+    def get(self, key, on_miss=None):
         """
         A *generator* that yields the requested cache item.
 
@@ -81,31 +124,174 @@ class ThreadSafeCache:
         cache item, calling `on_evict` on it.
 
         :param key: Cache key.
+        :param on_miss: Function to create the item on a cache miss, in place
+          of the cache's own `on_miss`. Optional.
         :yield: Cached item.
         """
         # logger.debug(f"{self.name} cache size: {len(self._cache)}")
-        with self._lock:
+        with self._locked():
             if key in self._cache:
                 # logger.debug(f"{self.name} cache hit: {key}")
+                self.hits += 1
                 yield self._cache[key]
+                return
 
-            if len(self._cache) > self.maxsize - 1:
-                # Cache full.
-                # Kick a random item out of cache. This is simpler than LRU and
-                # sufficient for testing, and even probably for production.
-                rand_key = tuple(self._cache.keys())[randrange(0, self.maxsize)]
-                logger.debug(f"cache eviction: {rand_key}")
-                if self.on_evict is not None:
-                    self.on_evict(key, self._cache[rand_key])
-                del self._cache[rand_key]
+            self.misses += 1
+            self._make_room()
 
             # Create a new item and add it to the cache
             # logger.debug(f"{self.name} cache miss: {key}")
-            item = self.on_miss(key)
-            self._cache[key] = item
+            miss_start = perf_counter()
+            item = (on_miss or self.on_miss)(key)
+            self.on_miss_time += perf_counter() - miss_start
+            self._store(key, item)
 
             yield item
 
+    @contextmanager
+    def _locked(self):
+        """Hold the cache lock, recording the time spent waiting for it."""
+        wait_start = perf_counter()
+        with self._lock:
+            wait = perf_counter() - wait_start
+            self.lock_wait_time += wait
+            self.max_lock_wait_time = max(self.max_lock_wait_time, wait)
+            yield
+
+    def _make_room(self):
+        """Evict an item if the cache is full. Call under the lock."""
+        if len(self._cache) > self.maxsize - 1:
+            # Cache full.
+            # Kick a random item out of cache. This is simpler than LRU and
+            # sufficient for testing, and even probably for production.
+            rand_key = tuple(self._cache.keys())[randrange(0, self.maxsize)]
+            logger.debug(f"cache eviction: {rand_key}")
+            self.evictions += 1
+            self._remove(rand_key)
+
+    def _store(self, key, item):
+        """Add a new item. Call under the lock, with room made for it."""
+        self._cache[key] = item
+        self._created[key] = time.time()
+        if self.sizeof is not None:
+            self._bytes[key] = self.sizeof(item)
+
+    def _remove(self, key):
+        """Remove an item, calling `on_evict` on it. Call under the lock."""
+        item = self._cache.pop(key)
+        self._created.pop(key, None)
+        self._bytes.pop(key, None)
+        if self.on_evict is not None:
+            self.on_evict(key, item)
+
+    def invalidate(self, key):
+        """
+        Remove an item from the cache, if present, calling `on_evict` on it.
+
+        :param key: Cache key.
+        :return: Boolean indicating whether the item was present.
+        """
+        with self._lock:
+            if key not in self._cache:
+                return False
+            logger.debug(f"{self.name} cache invalidation: {key}")
+            self.invalidations += 1
+            self._remove(key)
+            return True
+
+    def fetch(self, key, on_miss=None, locked_miss=True):
+        """
+        Return the requested cache item, creating it if necessary (see
+        `get`). Unlike `get`, the cache lock is released before the item is
+        returned, so the item may be evicted while in use. Use only for
+        items that remain valid after eviction, i.e., that need no
+        finalization by `on_evict`.
+
+        :param key: Cache key.
+        :param on_miss: As for `get`.
+        :param locked_miss: Whether to create a missing item under the cache
+          lock. If false, an item that is slow to create does not hold up
+          other requests to the cache, but concurrent misses on the same
+          key may each create it; the first one stored is kept.
+        :return: Cached item.
+        """
+        if locked_miss:
+            items = self.get(key, on_miss)
+            try:
+                return next(items)
+            finally:
+                items.close()
+
+        with self._locked():
+            if key in self._cache:
+                self.hits += 1
+                return self._cache[key]
+            self.misses += 1
+        miss_start = perf_counter()
+        item = (on_miss or self.on_miss)(key)
+        miss_time = perf_counter() - miss_start
+        with self._locked():
+            self.on_miss_time += miss_time
+            if key in self._cache:
+                return self._cache[key]
+            self._make_room()
+            self._store(key, item)
+            return item
+
+    def clear(self):
+        """
+        Remove all items from the cache, calling `on_evict` on each.
+
+        :return: Number of items removed.
+        """
+        with self._lock:
+            keys = tuple(self._cache.keys())
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def stats(self):
+        """
+        Return statistics on the use of this cache. The statistics are read
+        without taking the cache lock (which may be held for a long time), so
+        they are not necessarily mutually consistent.
+
+        :return: dict
+        """
+        now = time.time()
+        ages = sorted(
+            now - created for created in list(self._created.values())
+        )
+        requests = self.hits + self.misses
+        result = {
+            "name": self.name,
+            "maxsize": self.maxsize,
+            "size": len(ages),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / requests if requests else None,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "on_miss_seconds": self.on_miss_time,
+            "on_miss_mean_seconds": (
+                self.on_miss_time / self.misses if self.misses else None
+            ),
+            "lock_wait_seconds": self.lock_wait_time,
+            "lock_wait_max_seconds": self.max_lock_wait_time,
+            "item_age_seconds": {
+                "min": ages[0] if ages else None,
+                "median": ages[len(ages) // 2] if ages else None,
+                "max": ages[-1] if ages else None,
+            },
+        }
+        if self.sizeof is not None:
+            result["bytes"] = sum(list(self._bytes.values()))
+        if self.is_open is not None:
+            result["open_files"] = sum(
+                1 for item in list(self._cache.values()) if self.is_open(item)
+            )
+        return result
+
 
 # Manage large DV datasets opened as `xarray.Dataset`s
 
@@ -135,6 +321,114 @@ def data_at_rlonlat(dvds, ds, rlon, rlat):
     return lon, lat, value
 
 
+def lonlat_window(
+    dvds, ds, lon_min, lat_min, lon_max, lat_max, block_rows=64
+):
+    """
+    Return the smallest window of the grid, as a tuple (row slice, column
+    slice), containing all grid cells whose centres lie within a lon-lat
+    bounding box, or None if there are none. Longitudes are in the range
+    [-360, 0), as returned by `rindices_to_lonlat`. The grid is scanned a
+    block of rows at a time, so as not to load the full coordinate arrays.
+    """
+    rows = []
+    cols = []
+    for start in range(0, ds.rlat.size, block_rows):
+        block = slice(start, start + block_rows)
+        lat = ds.lat[block].values
+        lon = ds.lon[block].values - 360
+        inside = (
+            (lon >= lon_min)
+            & (lon <= lon_max)
+            & (lat >= lat_min)
+            & (lat <= lat_max)
+        )
+        block_rows_inside = np.flatnonzero(inside.any(axis=1))
+        if block_rows_inside.size:
+            rows += [
+                start + block_rows_inside[0],
+                start + block_rows_inside[-1],
+            ]
+            block_cols_inside = np.flatnonzero(inside.any(axis=0))
+            cols += [block_cols_inside[0], block_cols_inside[-1]]
+    if not rows:
+        return None
+    # Plain ints: the window sizes end up in file headers (e.g., npy).
+    return (
+        slice(int(min(rows)), int(max(rows)) + 1),
+        slice(int(min(cols)), int(max(cols)) + 1),
+    )
+
+
+def grid_block(dvds, ds, rows, cols):
+    """
+    Return a block of the grid: rlat, rlon, lat, lon, and design values,
+    for the rows and columns (slices) specified. Longitudes are as for
+    `lonlat_window`.
+    """
+    return (
+        ds.rlat[rows].values,
+        ds.rlon[cols].values,
+        ds.lat[rows, cols].values,
+        ds.lon[rows, cols].values - 360,
+        ds[dvds.dv_name].squeeze(drop=True)[rows, cols].values,
+    )
+
+
+def rotated_coords(dvds, ds, rows, cols):
+    """Return the rlat, rlon coordinates of the specified rows and columns."""
+    return ds.rlat[rows].values, ds.rlon[cols].values
+
+
+def variable_attrs(dvds, ds, names):
+    """
+    Return the attributes of the named variables present in the dataset.
+    """
+    return {name: dict(ds[name].attrs) for name in names if name in ds}
+
+
+def pointer_grid(dvds, ds, tolerance=1e-3):
+    """
+    Return a compact description of the grid of a dataset, from which the
+    lon-lat coordinates of the grid cell nearest a map pointer position can
+    be computed client side (see `dve/assets/map.js`).
+
+    The description contains the rotated pole coordinates `rlon`, `rlat`
+    (lists), and either `pole`, the location of the rotated pole, if the
+    lon-lat coordinates of the dataset are given (within `tolerance`
+    degrees) by the rotated pole grid mapping, or otherwise the lon-lat
+    coordinates themselves, as nested lists `lon`, `lat`.
+    """
+    result = {"rlon": ds.rlon.values.tolist(), "rlat": ds.rlat.values.tolist()}
+    lat = ds.lat.values
+    lon = ds.lon.values - 360
+    grid_mapping = ds[dvds.dv_name].attrs.get("grid_mapping")
+    if grid_mapping in ds:
+        attrs = ds[grid_mapping].attrs
+        if attrs.get("grid_mapping_name") == "rotated_latitude_longitude":
+            pole_lon = float(attrs["grid_north_pole_longitude"])
+            pole_lat = float(attrs["grid_north_pole_latitude"])
+            rlon, rlat = np.meshgrid(ds.rlon.values, ds.rlat.values)
+            grid_lon, grid_lat = rotated_pole_to_lonlat(
+                rlon, rlat, pole_lon, pole_lat
+            )
+            lon_error = (grid_lon - lon + 180) % 360 - 180
+            if (
+                np.abs(lon_error).max() <= tolerance
+                and np.abs(grid_lat - lat).max() <= tolerance
+            ):
+                return {**result, "pole": {"lon": pole_lon, "lat": pole_lat}}
+    logger.warning(
+        "Dataset lon-lat coordinates are not given by a rotated pole grid "
+        "mapping; using them directly"
+    )
+    return {
+        **result,
+        "lon": np.round(lon, 6).tolist(),
+        "lat": np.round(lat, 6).tolist(),
+    }
+
+
 # Cache event callbacks.
 
 
@@ -145,6 +439,20 @@ def open_xr_dataset(filepath):
         return DvXrDataset.CacheItem(dataset, lock)
 
 
+def load_xr_dataset(filepath):
+    """
+    Alternative to `open_xr_dataset` that loads the dataset entirely into
+    memory and closes the file. A dataset loaded this way holds no open file
+    handle, so it can safely be created in a process that is later forked
+    (e.g., the Gunicorn master process), and shared copy-on-write by the
+    forked processes.
+    """
+    lock = threading.RLock()
+    with lock:
+        dataset = xarray.load_dataset(filepath)
+        return DvXrDataset.CacheItem(dataset, lock, loaded=True)
+
+
 def close_xr_dataset(filepath, access):
     with access.lock:
         access.dataset.close()
@@ -165,18 +473,39 @@ class DvXrDataset:
        to lonlat coords).
     """
 
-    CacheItem = namedtuple("CacheItem", "dataset lock")
+    # `loaded` indicates whether the dataset was loaded into memory (and its
+    # file closed).
+    CacheItem = namedtuple(
+        "CacheItem", "dataset lock loaded", defaults=(False,)
+    )
 
     _cache = ThreadSafeCache(
         "DvXrDataset",
         on_miss=open_xr_dataset,
         on_evict=close_xr_dataset,
         maxsize=int(os.environ.get("LARGE_FILE_CACHE_SIZE", 20)),
+        sizeof=lambda item: item.dataset.nbytes,
+        is_open=lambda item: not item.loaded,
     )
 
-    def __init__(self, filepath, required_keys=("rlat", "rlon", "lat", "lon")):
+    def __init__(
+        self,
+        filepath,
+        required_keys=("rlat", "rlon", "lat", "lon"),
+        preload=False,
+    ):
+        """
+        :param filepath: Filepath of dataset.
+        :param required_keys: Keys required to be present in dataset.
+        :param preload: If true, and the dataset is not already cached, load
+          it entirely into memory (see `load_xr_dataset`) rather than
+          opening it lazily.
+        """
         self.filepath = filepath
         self.required_keys = required_keys
+        if preload:
+            for _ in DvXrDataset._cache.get(filepath, on_miss=load_xr_dataset):
+                break
         self.dv_name = self.apply(
             lambda dvds, ds: DvXrDataset.dv_name(ds, required_keys)
         )
@@ -220,6 +549,33 @@ class DvXrDataset:
         """
         return self.apply(data_at_rlonlat, rlon, rlat)
 
+    def region(self, bbox=None, rbbox=None, geometry=None):
+        """
+        Return a region of the grid (see `Region`), specified by exactly one
+        of the following.
+
+        :param bbox: Lon-lat bounding box (lon_min, lat_min, lon_max,
+          lat_max).
+        :param rbbox: Rotated pole bounding box (rlon_min, rlat_min,
+          rlon_max, rlat_max).
+        :param geometry: GeoJSON (multi)polygon geometry, in lon-lat.
+        """
+        specs = {"bbox": bbox, "rbbox": rbbox, "polygon": geometry}
+        specs = {kind: spec for kind, spec in specs.items() if spec is not None}
+        if len(specs) != 1:
+            raise ValueError(
+                "Exactly one of bbox, rbbox, geometry must be specified"
+            )
+        ((kind, spec),) = specs.items()
+        return region(self, kind, spec)
+
+    def subset(self, **kwargs):
+        """
+        Return the coordinates and values of the cells in a region (see
+        `RegionValues`). Arguments are as for `region`.
+        """
+        return self.apply(region_values, self.region(**kwargs))
+
     # TODO: This needn't be a method of this class.
     @classmethod
     def dv_name(cls, ds, required_keys):
@@ -251,17 +607,21 @@ class DvXrDataset:
 # Manage small CSV datasets opened as `pandas.csv`s
 
 
-def open_pd_dataset(filepath):
-    lock = threading.RLock()
-    with lock:
-        data_frame = pd.read_csv(filepath)
-        return DvXrDataset.CacheItem(data_frame, lock)
+def read_only(array):
+    """Return a read-only view of a numpy array."""
+    view = array.view()
+    view.flags.writeable = False
+    return view
 
 
-# TODO: This may not be necessary.
-def close_pd_dataset(filepath, access):
-    # Free the data frame.
-    access.data_frame = None
+def open_pd_dataset(filepath):
+    """
+    Read a CSV file into a cache item. The item holds no open file and no
+    lock, and is never modified, so any number of threads can read it
+    without locking, and it remains valid after it is evicted (it is simply
+    garbage collected when no longer referenced).
+    """
+    return PdCsvDataset.CacheItem(data_frame=pd.read_csv(filepath))
 
 
 class PdCsvDataset:
@@ -269,27 +629,37 @@ class PdCsvDataset:
     Manager for data files loaded using `pandas.csv`, which returns a
     `pandas.DataFrame`.
 
-    This class is very similar to, but somewhat simpler than, `DvXrDataset`.
-    It uses a separate cache.
+    This class is similar to, but simpler than, `DvXrDataset`. It uses a
+    separate cache. CSV data is held entirely in memory, and is never
+    modified by the app, so operations on it are performed without holding
+    any lock.
     """
 
-    CacheItem = namedtuple("CacheItem", "data_frame lock")
+    # `data_frame` is shared by all users of the item. Pandas provides no
+    # means of making it read-only, so users must not modify it; operations
+    # that derive new frames (selection, `assign`, sorting) do not.
+    CacheItem = namedtuple("CacheItem", "data_frame")
 
     _cache = ThreadSafeCache(
         "PdCsvDataset",
         on_miss=open_pd_dataset,
-        on_evict=close_pd_dataset,
         maxsize=int(os.environ.get("SMALL_FILE_CACHE_SIZE", 200)),
+        sizeof=lambda item: int(
+            item.data_frame.memory_usage(deep=True).sum()
+        ),
     )
 
     def __init__(self, filepath):
         self.filepath = filepath
 
+    def item(self):
+        """Return the cache item for the file."""
+        return PdCsvDataset._cache.fetch(self.filepath)
+
     def apply(self, operation, *args, **kwargs):
         """
         Returns the result of an arbitrary operation performed on a dataset.
-        Access to the dataset is managed via the thread lock; dataset is
-        cached.
+        The dataset is cached. The operation must not modify the dataset.
 
         :param operation: Operation to apply. Called with the following
           arguments: this object, the dataset, and any additional positional
@@ -298,25 +668,238 @@ class PdCsvDataset:
         :param kwargs: Keyword args to pass to `operation`.
         :return: Value returned by `operation`.
         """
-        for access in PdCsvDataset._cache.get(self.filepath):
-            with access.lock:
-                return operation(self, access.dataset, *args, **kwargs)
+        return operation(self, self.item().data_frame, *args, **kwargs)
 
     def data_frame(self):
-        """Return the data frame loaded from the file."""
-        return self.apply(lambda _, data_frame: data_frame)
+        """
+        Return the data frame loaded from the file. It is shared, and must
+        not be modified.
+        """
+        return self.item().data_frame
+
+
+# Regional subsets of DV datasets
+
+# A region of the grid: the smallest window (row and column slices)
+# containing it, and a boolean mask of the cells in the region within the
+# window.
+Region = namedtuple("Region", "rows cols mask")
 
+empty_region = Region(slice(0, 0), slice(0, 0), np.zeros((0, 0), dtype=bool))
+
+# The cells of a region, as 1D arrays of their coordinates and values.
+RegionValues = namedtuple("RegionValues", "rlat rlon lat lon values")
+
+
+def geometry_hash(geometry):
+    """
+    Return a hash identifying a GeoJSON geometry (a dict). Geometries that
+    differ only in the order of their keys have the same hash.
+    """
+    return hashlib.sha1(
+        json.dumps(geometry, sort_keys=True, separators=(",", ":")).encode()
+    ).hexdigest()
+
+
+def grid_key(ds):
+    """Return a key identifying the grid of a dataset."""
+    rlon = ds.rlon.values
+    rlat = ds.rlat.values
+    return (
+        rlon.size,
+        rlat.size,
+        float(rlon[0]),
+        float(rlon[-1]),
+        float(rlat[0]),
+        float(rlat[-1]),
+    )
+
+
+def index_range(values, low, high):
+    """
+    Return a slice covering the elements of a monotonic 1D array in the
+    closed interval [low, high], or None if there are none.
+    """
+    indices = np.flatnonzero((values >= low) & (values <= high))
+    if not indices.size:
+        return None
+    return slice(indices[0], indices[-1] + 1)
+
+
+def rlonlat_bbox_region(dvds, ds, rlon_min, rlat_min, rlon_max, rlat_max):
+    """Return the region of cells within a rotated pole bounding box."""
+    rows = index_range(ds.rlat.values, rlat_min, rlat_max)
+    cols = index_range(ds.rlon.values, rlon_min, rlon_max)
+    if rows is None or cols is None:
+        return empty_region
+    return Region(
+        rows,
+        cols,
+        np.ones((rows.stop - rows.start, cols.stop - cols.start), dtype=bool),
+    )
+
+
+def lonlat_cells(dvds, ds, lon_min, lat_min, lon_max, lat_max):
+    """
+    Return the window of a lon-lat bounding box (see `lonlat_window`) and the
+    lon, lat coordinates of its cells, as a tuple (rows, cols, lon, lat), or
+    None if the window is empty.
+    """
+    window = lonlat_window(dvds, ds, lon_min, lat_min, lon_max, lat_max)
+    if window is None:
+        return None
+    rows, cols = window
+    return (
+        rows,
+        cols,
+        ds.lon[rows, cols].values - 360,
+        ds.lat[rows, cols].values,
+    )
+
+
+def lonlat_bbox_region(dvds, ds, lon_min, lat_min, lon_max, lat_max):
+    """
+    Return the region of cells within a lon-lat bounding box. Longitudes
+    are as for `lonlat_window`.
+    """
+    cells = lonlat_cells(dvds, ds, lon_min, lat_min, lon_max, lat_max)
+    if cells is None:
+        return empty_region
+    rows, cols, lon, lat = cells
+    return Region(
+        rows,
+        cols,
+        (lon >= lon_min)
+        & (lon <= lon_max)
+        & (lat >= lat_min)
+        & (lat <= lat_max),
+    )
 
-def load_file(path):
-    """Load files with appropriate class according to their type."""
+
+def polygon_cells_region(polygon, cells):
+    """
+    Return the region of cells (see `lonlat_cells`) whose centres lie within
+    a shapely (multi)polygon. This needs no access to the dataset.
+    """
+    if cells is None:
+        return empty_region
+    rows, cols, lon, lat = cells
+    return Region(rows, cols, shapely.vectorized.contains(polygon, lon, lat))
+
+
+def polygon_region(dvds, ds, geometry):
+    """
+    Return the region of cells whose centres lie within a (multi)polygon.
+
+    :param geometry: GeoJSON geometry, in lon-lat coordinates. Longitudes
+      are as for `lonlat_window`.
+    """
+    polygon = shapely.geometry.shape(geometry)
+    return polygon_cells_region(
+        polygon, lonlat_cells(dvds, ds, *polygon.bounds)
+    )
+
+
+region_makers = {
+    "rbbox": rlonlat_bbox_region,
+    "bbox": lonlat_bbox_region,
+}
+
+# Cache of regions, keyed by grid, kind of region, and its specification
+# (the hash of a polygon's geometry). Rasterizing a polygon is expensive,
+# and regional queries tend to be repeated.
+region_cache = ThreadSafeCache(
+    "Region",
+    on_miss=None,
+    maxsize=int(os.environ.get("REGION_CACHE_SIZE", 100)),
+    sizeof=lambda region: region.mask.nbytes,
+)
+
+
+def region_key(ds, kind, spec):
+    """Return the key of a region of the grid of a dataset in the cache."""
+    return (
+        grid_key(ds),
+        kind,
+        geometry_hash(spec) if kind == "polygon" else tuple(spec),
+    )
+
+
+def region(dvds, kind, spec):
+    """
+    Return a region of the grid of a dataset (see `Region`). Regions are
+    cached.
+
+    A polygon is rasterized without holding the dataset lock (see
+    `DvXrDataset.apply`) or the region cache lock; only reading the
+    coordinates of the cells in its bounding box needs the dataset. The
+    geometry is parsed before the dataset is accessed, so an invalid one
+    fails (with a shapely or `KeyError`, `ValueError`, etc.) first.
+
+    :param dvds: DvXrDataset.
+    :param kind: Kind of region: `"bbox"` (lon-lat bounding box), `"rbbox"`
+      (rotated pole bounding box), or `"polygon"`.
+    :param spec: For a bounding box, a tuple (x_min, y_min, x_max, y_max);
+      for a polygon, a GeoJSON geometry.
+    """
+    if kind == "polygon":
+        polygon = shapely.geometry.shape(spec)
+
+        def make_region(key):
+            return polygon_cells_region(
+                polygon, dvds.apply(lonlat_cells, *polygon.bounds)
+            )
+
+    else:
+        operation = region_makers[kind]
+
+        def make_region(key):
+            return dvds.apply(operation, *spec)
+
+    key = dvds.apply(lambda dvds, ds: region_key(ds, kind, spec))
+    return region_cache.fetch(key, on_miss=make_region, locked_miss=False)
+
+
+def region_values(dvds, ds, region):
+    """Return the coordinates and values of the cells of a region."""
+    rows, cols, mask = region
+    ilat, ilon = np.nonzero(mask)
+    return RegionValues(
+        rlat=ds.rlat[rows].values[ilat],
+        rlon=ds.rlon[cols].values[ilon],
+        lat=ds.lat[rows, cols].values[mask],
+        lon=ds.lon[rows, cols].values[mask] - 360,
+        values=ds[dvds.dv_name].squeeze(drop=True)[rows, cols].values[mask],
+    )
+
+
+def invalidate_file(filepath, old_status=None, new_status=None):
+    """
+    Invalidate any cached dataset loaded from a file. The signature is that
+    of a file status registry listener, so that datasets are invalidated
+    when their file is replaced in place.
+    """
+    for cache in (DvXrDataset._cache, PdCsvDataset._cache):
+        if cache.invalidate(filepath):
+            logger.info(f"Invalidated cached data for '{filepath}'")
+
+
+file_status_registry.add_listener(invalidate_file)
+
+
+def load_file(path, preload=False):
+    """
+    Load files with appropriate class according to their type.
+    If `preload` is true, NetCDF files are loaded entirely into memory.
+    """
     logger.info(f"Loading data from '{path}'")
-    filename = resource_filename("dve", path)
+    filename = resolve_filepath(path)
     if path.endswith(".csv"):
         rv = PdCsvDataset(filename)
         logger.debug(f"Loaded data from '{path}'")
         return rv
     if path.endswith(".nc"):
-        rv = DvXrDataset(filename)
+        rv = DvXrDataset(filename, preload=preload)
         logger.debug(f"Loaded data from '{path}'")
         return rv
     raise ValueError(f"Unrecognized file type in path '{path}'")
@@ -328,14 +911,24 @@ def get_data_object(
     climate_regime,
     historical_dataset_id=None,
     future_dataset_id=None,
+    preload=False,
 ):
     """
     Get a specific data object. This function knows the structure
     of `config` so that clients don't have to.
+    If `preload` is true, a raster dataset is loaded entirely into memory.
     """
     description = f"get_data {(design_variable, climate_regime, historical_dataset_id, future_dataset_id)}"
 
-    with timing(description, log=timing_log):
+    with timing(
+        description,
+        log=timing_log,
+        labels={
+            "description": "get_data",
+            "dv": design_variable,
+            "regime": climate_regime,
+        },
+    ):
         filepath = filepath_for(
             config,
             design_variable,
@@ -345,7 +938,7 @@ def get_data_object(
         )
         if filepath is None or not file_exists(filepath):
             return None
-        return load_file(filepath)
+        return load_file(filepath, preload=preload)
 
 
 def dv_value(
@@ -1,3 +1,12 @@
+import functools
+
+
+@functools.lru_cache(maxsize=1024)
+def split_path(path, separator="."):
+    """Split a path string into a tuple of keys. Cached."""
+    return tuple(path.split(separator))
+
+
 def path_get(d, path, default=None, separator="."):
     """
     Get a value addressed by `path` from dict `d`.
@@ -6,14 +15,14 @@ def path_get(d, path, default=None, separator="."):
     if not isinstance(d, dict):
         return default
     if isinstance(path, str):
-        return path_get(d, path.split(separator), default)
-    if isinstance(path, (list, tuple)):
-        head = path[0]
-        if len(path) == 1:
-            return d.get(head, default)
-        if head in d:
-            return path_get(d[head], path[1:], default)
-        return default
+        path = split_path(path, separator)
+    if not isinstance(path, (list, tuple)):
+        return None
+    for key in path:
+        if not isinstance(d, dict) or key not in d:
+            return default
+        d = d[key]
+    return d
 
 
 def path_set(d, path, value, separator="."):
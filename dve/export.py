@@ -0,0 +1,357 @@
+"""
+Export of design value rasters.
+
+The route `<routes pathname prefix>export/<design variable>/<climate
+regime>/<dataset id>` returns the full raster for a design variable,
+climate regime, and dataset (a historical dataset id such as
+`reconstruction`, or a future change factor id such as `2.0`). Query
+parameters:
+
+- `format`: `csv` (default), `nc` (NetCDF), or `npz` (numpy archive).
+- `bbox`: `lon_min,lat_min,lon_max,lat_max`. If given, the raster is clipped
+  to the smallest window of the grid containing all grid cells within the
+  bounding box. Longitudes are negative (degrees east).
+
+CSV output has one line per grid cell with a value (cells without a value,
+e.g., over the ocean, are omitted). NetCDF and npz output contain the
+rotated pole coordinates `rlat`, `rlon`, the 2D coordinates `lat`, `lon`,
+and the design values (named `values` in npz output).
+
+The output is generated a block of `DVE_EXPORT_BLOCK_ROWS` grid rows
+(environment variable; default 32) at a time, and CSV and npz output is
+streamed to the client as it is generated, so that memory use does not grow
+with the size of the export. Each block is read in a separate access to the
+dataset (see `DvXrDataset.apply`), so that an export does not hold the
+dataset cache lock, and hence block other requests, for its duration.
+NetCDF output cannot be written to a stream, so it is written block by
+block to a temporary file, which is then streamed, and deleted when the
+response is closed (whether or not its content was sent; e.g., it is not
+for a HEAD request).
+"""
+import io
+import logging
+import os
+import tempfile
+import zipfile
+
+import flask
+import netCDF4
+import numpy as np
+
+from dve.config.index import config_index
+from dve.config.values import dv_has_climate_regime, dv_units, filepath_for
+from dve.data import (
+    get_data_object,
+    grid_block,
+    grid_size,
+    lonlat_window,
+    rotated_coords,
+    variable_attrs,
+)
+from dve.metrics import byte_buckets, metrics
+
+
+logger = logging.getLogger(__name__)
+
+block_rows = int(os.environ.get("DVE_EXPORT_BLOCK_ROWS", 32))
+
+formats = {
+    "csv": "text/csv",
+    "nc": "application/x-netcdf",
+    "npz": "application/octet-stream",
+}
+
+# Size of chunks in which files are streamed.
+file_chunk_size = 1 << 16
+
+
+class ExportError(Exception):
+    """An export was requested with invalid parameters."""
+
+
+def parse_bbox(text):
+    """
+    Parse a bounding box parameter.
+
+    :param text: `lon_min,lat_min,lon_max,lat_max`, or None.
+    :return: tuple (lon_min, lat_min, lon_max, lat_max), or None.
+    """
+    if text is None:
+        return None
+    try:
+        lon_min, lat_min, lon_max, lat_max = (
+            float(value) for value in text.split(",")
+        )
+    except ValueError:
+        raise ExportError(f"Invalid bbox '{text}'")
+    if lon_min > lon_max or lat_min > lat_max:
+        raise ExportError(f"Empty bbox '{text}'")
+    return lon_min, lat_min, lon_max, lat_max
+
+
+def blocks(dataset, window):
+    """
+    Generate the blocks of the grid (see `grid_block`) in a window, a block
+    of rows at a time.
+    """
+    rows, cols = window
+    for start in range(rows.start, rows.stop, block_rows):
+        yield dataset.apply(
+            grid_block, slice(start, min(start + block_rows, rows.stop)), cols
+        )
+
+
+def csv_chunks(dataset, window, value_name):
+    """Generate CSV output, a block at a time."""
+    yield f"lon,lat,rlon,rlat,{value_name}\n".encode()
+    for rlat, rlon, lat, lon, values in blocks(dataset, window):
+        valid = ~np.isnan(values)
+        ilat, ilon = np.nonzero(valid)
+        columns = np.column_stack(
+            (lon[valid], lat[valid], rlon[ilon], rlat[ilat], values[valid])
+        )
+        if columns.size:
+            with io.BytesIO() as text:
+                np.savetxt(
+                    text,
+                    columns,
+                    fmt=("%.5f", "%.5f", "%.5f", "%.5f", "%.7g"),
+                    delimiter=",",
+                )
+                # `savetxt` leaves a reference cycle to `text`; closing it
+                # frees its buffer now rather than at garbage collection.
+                chunk = text.getvalue()
+            yield chunk
+
+
+class StreamBuffer(io.RawIOBase):
+    """
+    A write-only, unseekable stream that accumulates what is written to it
+    until it is drained.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def write_npy_header(file, shape, dtype):
+    np.lib.format.write_array_header_1_0(
+        file,
+        {
+            "descr": np.lib.format.dtype_to_descr(np.dtype(dtype)),
+            "fortran_order": False,
+            "shape": shape,
+        },
+    )
+
+
+def npz_chunks(dataset, window):
+    """
+    Generate npz output, a block at a time. The archive is written as a
+    stream (using ZIP data descriptors), and each 2D array in it is written
+    a block at a time.
+    """
+    rows, cols = window
+    shape = (rows.stop - rows.start, cols.stop - cols.start)
+    buffer = StreamBuffer()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, array in zip(
+            ("rlat", "rlon"), dataset.apply(rotated_coords, rows, cols)
+        ):
+            with zf.open(f"{name}.npy", "w") as member:
+                np.lib.format.write_array(member, array)
+        yield buffer.drain()
+        for index, name in ((2, "lat"), (3, "lon"), (4, "values")):
+            with zf.open(f"{name}.npy", "w", force_zip64=True) as member:
+                header_written = False
+                for block in blocks(dataset, window):
+                    array = block[index]
+                    if not header_written:
+                        write_npy_header(member, shape, array.dtype)
+                        header_written = True
+                    member.write(np.ascontiguousarray(array).tobytes())
+                    yield buffer.drain()
+    yield buffer.drain()
+
+
+def write_netcdf(filepath, dataset, window, design_variable):
+    """Write NetCDF output to a file, a block at a time."""
+    rows, cols = window
+    attrs = dataset.apply(
+        variable_attrs, ("rlat", "rlon", "lat", "lon", dataset.dv_name)
+    )
+    with netCDF4.Dataset(filepath, "w") as nc:
+        nc.createDimension("rlat", rows.stop - rows.start)
+        nc.createDimension("rlon", cols.stop - cols.start)
+        variables = {}
+        for name, dimensions in (
+            ("rlat", ("rlat",)),
+            ("rlon", ("rlon",)),
+            ("lat", ("rlat", "rlon")),
+            ("lon", ("rlat", "rlon")),
+            (design_variable, ("rlat", "rlon")),
+        ):
+            source_name = (
+                dataset.dv_name if name == design_variable else name
+            )
+            variables[name] = nc.createVariable(
+                name,
+                "f8",
+                dimensions,
+                zlib=True,
+                fill_value=np.nan if name == design_variable else None,
+            )
+            variables[name].setncatts(
+                {
+                    key: value
+                    for key, value in attrs.get(source_name, {}).items()
+                    if key not in ("_FillValue", "grid_mapping")
+                }
+            )
+        offset = 0
+        for rlat, rlon, lat, lon, values in blocks(dataset, window):
+            block = slice(offset, offset + rlat.size)
+            if offset == 0:
+                variables["rlon"][:] = rlon
+            variables["rlat"][block] = rlat
+            variables["lat"][block, :] = lat
+            variables["lon"][block, :] = lon
+            variables[design_variable][block, :] = values
+            offset = block.stop
+
+
+def file_chunks(filepath):
+    """Generate the contents of a file in chunks."""
+    with open(filepath, "rb") as file:
+        while True:
+            chunk = file.read(file_chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+def requested_dataset(config, design_variable, climate_regime, dataset_id):
+    """
+    Return the raster dataset (`DvXrDataset`) requested by route parameters,
+    or abort the request with status 404 if there is none.
+    """
+    filepath = (
+        design_variable in config_index(config).dvs
+        and dv_has_climate_regime(config, design_variable, climate_regime)
+        and filepath_for(
+            config,
+            design_variable,
+            climate_regime,
+            historical_dataset_id=dataset_id,
+            future_dataset_id=dataset_id,
+        )
+    )
+    if not filepath or not filepath.endswith(".nc"):
+        flask.abort(404)
+    dataset = get_data_object(
+        config,
+        design_variable,
+        climate_regime,
+        historical_dataset_id=dataset_id,
+        future_dataset_id=dataset_id,
+    )
+    if dataset is None:
+        flask.abort(404)
+    return dataset
+
+
+def export_response(config, design_variable, climate_regime, dataset_id):
+    """
+    Return a streamed response exporting the requested raster (see module
+    docstring). Query parameters are taken from the current request.
+    """
+    fmt = flask.request.args.get("format", "csv")
+    if fmt not in formats:
+        raise ExportError(f"Unknown format '{fmt}'")
+    bbox = parse_bbox(flask.request.args.get("bbox"))
+
+    dataset = requested_dataset(
+        config, design_variable, climate_regime, dataset_id
+    )
+
+    if bbox is None:
+        rlon_size, rlat_size = dataset.apply(grid_size)
+        window = (slice(0, rlat_size), slice(0, rlon_size))
+    else:
+        window = dataset.apply(lonlat_window, *bbox)
+        if window is None:
+            raise ExportError(f"No grid cells in bbox {bbox}")
+
+    filename = f"{design_variable}_{climate_regime}_{dataset_id}.{fmt}"
+    logger.info(f"Exporting {filename}, window {window}")
+    if fmt == "csv":
+        units = dv_units(config, design_variable, climate_regime, nice=False)
+        chunks = csv_chunks(dataset, window, f"{design_variable} ({units})")
+    elif fmt == "npz":
+        chunks = npz_chunks(dataset, window)
+    else:
+        file, nc_filepath = tempfile.mkstemp(suffix=".nc")
+        os.close(file)
+        try:
+            write_netcdf(nc_filepath, dataset, window, design_variable)
+        except Exception:
+            os.remove(nc_filepath)
+            raise
+        chunks = file_chunks(nc_filepath)
+
+    def counted(chunks):
+        size = 0
+        try:
+            for chunk in chunks:
+                size += len(chunk)
+                yield chunk
+        finally:
+            chunks.close()
+            metrics.observe(
+                "dve_export_bytes",
+                size,
+                {"format": fmt},
+                buckets=byte_buckets,
+            )
+
+    response = flask.Response(
+        counted(chunks),
+        mimetype=formats[fmt],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+        },
+    )
+    if fmt == "nc":
+        # A generator that is never started (e.g., for a HEAD request) does
+        # not run its cleanup when closed, but the response's close
+        # functions are always called.
+        response.call_on_close(lambda: os.remove(nc_filepath))
+    return response
+
+
+def add(app, config):
+    """Add the raster export route to the app."""
+
+    @app.server.route(
+        f"{app.config.routes_pathname_prefix}export/"
+        "<design_variable>/<climate_regime>/<dataset_id>"
+    )
+    def export_raster(design_variable, climate_regime, dataset_id):
+        try:
+            return export_response(
+                config, design_variable, climate_regime, dataset_id
+            )
+        except ExportError as e:
+            return flask.Response(f"{e}\n", status=400, mimetype="text/plain")
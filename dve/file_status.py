@@ -0,0 +1,145 @@
+"""
+Registry of the status (existence, modification time, size) of data files.
+
+Checking whether a data file exists means a filesystem `stat`, which on the
+network-mounted data directories used in production is not cheap, and the
+check is made on almost every map update, map click, and table build. The
+registry answers these questions from memory instead.
+
+The registry is populated with the configured data files at startup (see
+`dve.app.make_app`). Files not yet in the registry are added (and stat-ed)
+on first inquiry. A background thread re-stats all registered files every
+`FILE_STATUS_POLL_INTERVAL` seconds (environment variable; default 60;
+0 disables polling) and notifies listeners of any change. In particular,
+`dve.data` listens for changes in order to invalidate cached datasets when
+a data file is replaced in place.
+
+The polling thread is started lazily, on first inquiry, in each process that
+uses the registry. This matters when the app is preloaded in the Gunicorn
+master process: threads do not survive a fork.
+"""
+import os
+import logging
+import stat
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+
+logger = logging.getLogger(__name__)
+
+
+FileStatus = namedtuple("FileStatus", "exists mtime size")
+
+
+def stat_file(filepath):
+    """Return the current status of a file."""
+    try:
+        st = os.stat(filepath)
+    except OSError:
+        return FileStatus(False, None, None)
+    return FileStatus(stat.S_ISREG(st.st_mode), st.st_mtime, st.st_size)
+
+
+class FileStatusRegistry:
+    """
+    Registry of file statuses. All filepaths are absolute.
+    """
+
+    def __init__(self, poll_interval=None, max_workers=16):
+        self.poll_interval = poll_interval
+        self.max_workers = max_workers
+        self._status = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._poller_pid = None
+
+    def register(self, filepaths):
+        """
+        Add files to the registry (or update their status), and return their
+        statuses. Files are stat-ed concurrently, so that the time taken does
+        not grow (much) with the number of files, even on slow filesystems.
+        """
+        filepaths = list(filepaths)
+        if len(filepaths) <= 1:
+            statuses = map(stat_file, filepaths)
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                statuses = list(executor.map(stat_file, filepaths))
+        result = dict(zip(filepaths, statuses))
+        with self._lock:
+            self._status.update(result)
+        return result
+
+    def status(self, filepath):
+        """Return the status of a file, registering it if necessary."""
+        self._ensure_polling()
+        try:
+            return self._status[filepath]
+        except KeyError:
+            return self.register((filepath,))[filepath]
+
+    def exists(self, filepath):
+        return self.status(filepath).exists
+
+    def mtime(self, filepath):
+        return self.status(filepath).mtime
+
+    def add_listener(self, listener):
+        """
+        Add a listener for status changes. A listener is called with
+        arguments `(filepath, old_status, new_status)`.
+        """
+        self._listeners.append(listener)
+
+    def refresh(self):
+        """
+        Re-stat all registered files, update their statuses, and notify
+        listeners of changes. Return the filepaths whose status changed.
+        """
+        with self._lock:
+            old = dict(self._status)
+        new = self.register(old.keys())
+        changed = [
+            filepath
+            for filepath, status in new.items()
+            if status != old[filepath]
+        ]
+        for filepath in changed:
+            logger.info(
+                f"File status changed: '{filepath}': "
+                f"{old[filepath]} -> {new[filepath]}"
+            )
+            for listener in self._listeners:
+                try:
+                    listener(filepath, old[filepath], new[filepath])
+                except Exception:
+                    logger.exception(
+                        f"Error in file status listener for '{filepath}'"
+                    )
+        return changed
+
+    def _ensure_polling(self):
+        if not self.poll_interval or self._poller_pid == os.getpid():
+            return
+        with self._lock:
+            if self._poller_pid == os.getpid():
+                return
+            self._poller_pid = os.getpid()
+        threading.Thread(
+            target=self._poll, name="FileStatusRegistry", daemon=True
+        ).start()
+
+    def _poll(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Error refreshing file statuses")
+
+
+registry = FileStatusRegistry(
+    poll_interval=float(os.environ.get("FILE_STATUS_POLL_INTERVAL", 60))
+)
@@ -1,3 +1,5 @@
+import functools
+
 from climpyrical.gridding import (
     flatten_coords,
     transform_coords,
@@ -58,6 +60,95 @@ def lonlat_overlay(
     :param lat_max: (list) Maximum latitude covered by overlay.
     :return: (list) Graphical objects representing lon-lat overlay.
     """
+    (
+        rp_x_lon_line,
+        rp_y_lon_line,
+        rp_x_lat_line,
+        rp_y_lat_line,
+        prlon,
+        prlat,
+        lattext,
+    ) = lonlat_overlay_lines(
+        rlon_grid_size,
+        rlat_grid_size,
+        None
+        if viewport is None
+        else tuple(
+            viewport[name] for name in ("x_min", "x_max", "y_min", "y_max")
+        ),
+        num_lon_intervals,
+        num_lat_intervals,
+        tuple(lon_round_to),
+        tuple(lat_round_to),
+        lon_min,
+        lon_max,
+        lat_min,
+        lat_max,
+    )
+
+    return [
+        # Longitude lines
+        go.Scattergl(
+            x=rp_x_lon_line,
+            y=rp_y_lon_line,
+            mode="lines",
+            hoverinfo="skip",
+            visible=True,
+            name="",
+            line=dict(width=1, color="grey", dash="dash"),
+        ),
+        # Latitude lines
+        go.Scattergl(
+            x=rp_x_lat_line,
+            y=rp_y_lat_line,
+            mode="lines+text",
+            hoverinfo="skip",
+            visible=True,
+            name="",
+            line=dict(width=1, color="grey", dash="dash"),
+        ),
+        # Labels for lon/lat lines
+        go.Scattergl(
+            x=prlon,
+            y=prlat,
+            mode="text",
+            text=lattext,
+            hoverinfo="skip",
+            visible=True,
+            name="",
+        ),
+    ]
+
+
+@functools.lru_cache(maxsize=64)
+def lonlat_overlay_lines(
+    rlon_grid_size,
+    rlat_grid_size,
+    viewport_bounds,
+    num_lon_intervals,
+    num_lat_intervals,
+    lon_round_to,
+    lat_round_to,
+    lon_min,
+    lon_max,
+    lat_min,
+    lat_max,
+):
+    """
+    Compute the coordinates and labels of the lines drawn by `lonlat_overlay`.
+
+    This is the expensive part of creating the overlay, and its result depends
+    only on its (hashable) arguments, so it is cached. In particular, the
+    overlay for the default (full) viewport is computed once and reused for
+    every map update.
+
+    Arguments are as for `lonlat_overlay`, except that `viewport_bounds` is
+    None or a tuple (x_min, x_max, y_min, y_max), and `lon_round_to`,
+    `lat_round_to` are tuples.
+
+    :return: tuple (rp_x_lon_line, rp_y_lon_line, rp_x_lat_line,
+        rp_y_lat_line, prlon, prlat, lattext)
+    """
     # Normalize longitudes
     lon_min = lon_0_to_360(lon_min)
     lon_max = lon_0_to_360(lon_max)
@@ -65,7 +156,7 @@ def lonlat_overlay(
     # Determine range of lat and lon in current viewport. This is used to
     # compute the grid deltas, and does not determine the lat-lon range of
     # grid lines created.
-    if viewport is None:
+    if viewport_bounds is None:
         # Default (max zoom; full area) lon and lat bounds
         vp_lon_min = lon_min
         vp_lon_max = lon_max
@@ -73,9 +164,10 @@ def lonlat_overlay(
         vp_lat_max = lat_max
     else:
         # Transform rotated pole viewport corners to standard lon-lat
+        vp_x_min, vp_x_max, vp_y_min, vp_y_max = viewport_bounds
         vp_x_range, vp_y_range = transform_coords(
-            np.array([viewport["x_min"], viewport["x_max"]]),
-            np.array([viewport["y_min"], viewport["y_max"]]),
+            np.array([vp_x_min, vp_x_max]),
+            np.array([vp_y_min, vp_y_max]),
             source_crs={
                 "proj": "ob_tran",
                 "o_proj": "longlat",
@@ -150,35 +242,34 @@ def lonlat_overlay(
         for latval, lonval in zip(plat, plon)
     ]
 
-    return [
-        # Longitude lines
-        go.Scattergl(
-            x=rp_x_lon_line,
-            y=rp_y_lon_line,
-            mode="lines",
-            hoverinfo="skip",
-            visible=True,
-            name="",
-            line=dict(width=1, color="grey", dash="dash"),
-        ),
-        # Latitude lines
-        go.Scattergl(
-            x=rp_x_lat_line,
-            y=rp_y_lat_line,
-            mode="lines+text",
-            hoverinfo="skip",
-            visible=True,
-            name="",
-            line=dict(width=1, color="grey", dash="dash"),
-        ),
-        # Labels for lon/lat lines
-        go.Scattergl(
-            x=prlon,
-            y=prlat,
-            mode="text",
-            text=lattext,
-            hoverinfo="skip",
-            visible=True,
-            name="",
-        ),
-    ]
+    return (
+        rp_x_lon_line,
+        rp_y_lon_line,
+        rp_x_lat_line,
+        rp_y_lat_line,
+        prlon,
+        prlat,
+        tuple(lattext),
+    )
+
+
+def configured_lonlat_overlay(
+    overlay_config, rlon_grid_size, rlat_grid_size, viewport=None
+):
+    """
+    Return `lonlat_overlay` with parameters taken from the map lon-lat overlay
+    configuration (config item `values.map.lonlat_overlay`).
+    """
+    return lonlat_overlay(
+        rlon_grid_size=rlon_grid_size,
+        rlat_grid_size=rlat_grid_size,
+        viewport=viewport,
+        num_lon_intervals=overlay_config["lon"]["num_intervals"],
+        lon_round_to=overlay_config["lon"]["round_to"],
+        num_lat_intervals=overlay_config["lat"]["num_intervals"],
+        lat_round_to=overlay_config["lat"]["round_to"],
+        lon_min=overlay_config["lon"]["min"],
+        lon_max=overlay_config["lon"]["max"],
+        lat_min=overlay_config["lat"]["min"],
+        lat_max=overlay_config["lat"]["max"],
+    )
@@ -4,7 +4,7 @@ from dash import dcc
 import dash_daq as daq
 from dve.config.text import (
     overlay_options_control_columns, color_bar_options_ctrl_width,
-    language_ctrl_options,
+    language_ctrl_options, latitude_label, longitude_label,
 )
 
 
@@ -263,6 +263,25 @@ def main(app, config, lang="en"):
             ),
         ]
 
+    def province_stats_output():
+        """
+        Layout for summary of map data by province and territory.
+        :return: list of dbc.Row
+        """
+        return [
+            dbc.Row(id="province_stats_heading", className="mt-3"),
+            dbc.Row(
+                dbc.Col(
+                    Loading(
+                        html.Div(
+                            id="province_stats",
+                            style={"font-size": "0.8em"},
+                        )
+                    )
+                )
+            ),
+        ]
+
     def map_tab():
         """
         Top-level layout of map tab.
@@ -288,17 +307,24 @@ def main(app, config, lang="en"):
                         ),
                         dbc.Col(
                             Loading(
-                                dcc.Graph(
-                                    id="map_main_graph",
-                                    config=config["values"]["ui"]["graph"],
-                                )
+                                [
+                                    dcc.Graph(
+                                        id="map_main_graph",
+                                        config=config["values"]["ui"]["graph"],
+                                    ),
+                                    # Map figure and its overlays as built
+                                    # on the server. See `dve/assets/map.js`.
+                                    dcc.Store(id="map_figure"),
+                                    dcc.Store(id="map_lonlat_overlay"),
+                                    dcc.Store(id="map_stations"),
+                                ]
                             ),
                             xxl={"size": 7, "order": 3},
                             xs=12,
                             className="border-top",
                         ),
                         dbc.Col(
-                            map_pointer_output(),
+                            map_pointer_output() + province_stats_output(),
                             xxl={"size": 5, "order": 3},
                             xs=12,
                             className="pt-3 border-top",
@@ -316,6 +342,7 @@ def main(app, config, lang="en"):
             children=[
                 Loading(html.H5(id="table-C2-title", className="mt-3")),
                 Loading(html.Div(id="table-C2")),
+                dcc.Download(id="table-C2-download"),
             ],
         )
 
@@ -359,6 +386,22 @@ def main(app, config, lang="en"):
                 id="viewport-ds", style={"display": "none"}, children="null"
             ),
             dcc.Store(id="local_preferences", storage_type="local"),
+            # Grid of the map, and labels for the map hover info, for
+            # displaying the hover info client side.
+            dcc.Store(id="map_grid"),
+            # Colours of the selected colour map, for recolouring the map
+            # client side.
+            dcc.Store(id="colour_table"),
+            dcc.Store(
+                id="map_hover_labels",
+                data={
+                    lang: {
+                        "lat": latitude_label(config, lang, which="short"),
+                        "lon": longitude_label(config, lang, which="short"),
+                    }
+                    for lang in config["text"]
+                },
+            ),
         ]
 
     return dbc.Container(
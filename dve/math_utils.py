@@ -1,5 +1,7 @@
 import math
 
+import numpy as np
+
 
 def compact(items):
     return (item for item in items if item is not None)
@@ -33,6 +35,21 @@ def round_to_multiple(value, multiple, direction="nearest"):
     return round(value, figs)
 
 
+def round_to_multiple_array(values, multiple, direction="nearest"):
+    """
+    Vectorized `round_to_multiple`: return an array of the multiples of
+    `multiple` nearest to `values`. NaNs are preserved. Ties are rounded to
+    even, as by `round`.
+    """
+    try:
+        f = {"down": np.floor, "nearest": np.rint, "up": np.ceil}[direction]
+    except KeyError:
+        f = np.rint
+    values = f(np.asarray(values, dtype=float) / multiple) * multiple
+    figs = math.ceil(max(-math.log10(multiple), 0))
+    return np.round(values, figs)
+
+
 def nice_delta(low, high, n, round_to):
     """
     Return a "nice" value approximately equal to (high - low) / n.
@@ -73,3 +90,30 @@ def sigfigs(x, n=3):
 
 def lon_0_to_360(lon):
     return lon % 360.0
+
+
+def rotated_pole_to_lonlat(rlon, rlat, pole_lon, pole_lat):
+    """
+    Convert rotated pole coordinates to lon-lat coordinates (all in degrees),
+    for a rotated pole grid mapping (CF `rotated_latitude_longitude`) with
+    north pole grid longitude 0. Vectorized. Longitudes returned are in
+    (-180, 180].
+
+    `dve/assets/map.js` contains a JavaScript version of this function; the
+    two must be kept in agreement.
+    """
+    rlon = np.radians(rlon)
+    rlat = np.radians(rlat)
+    # Cartesian coordinates in the rotated system.
+    x = np.cos(rlat) * np.cos(rlon)
+    y = np.cos(rlat) * np.sin(rlon)
+    z = np.sin(rlat)
+    # Rotate about the y axis by the colatitude of the pole, then about the
+    # z axis by the longitude of the pole plus 180 degrees.
+    theta = np.radians(90 - pole_lat)
+    phi = np.radians(pole_lon + 180)
+    x1 = np.cos(theta) * x - np.sin(theta) * z
+    z1 = np.sin(theta) * x + np.cos(theta) * z
+    x2 = np.cos(phi) * x1 - np.sin(phi) * y
+    y2 = np.sin(phi) * x1 + np.cos(phi) * y
+    return np.degrees(np.arctan2(y2, x2)), np.degrees(np.arcsin(z1))
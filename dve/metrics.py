@@ -0,0 +1,330 @@
+"""
+Latency metrics, fed by `dve.timing.timing` and exposed in Prometheus text
+format on the route `metrics`.
+
+Each timing block records its elapsed time in a histogram labelled by the
+timing description and, where the caller provides them, the design variable
+(`dv`) and climate regime (`regime`). Histograms have fixed buckets, so that
+histograms from different processes can be merged simply by adding them.
+From the merged histograms we estimate percentiles (p50, p95, p99), in
+the same way as Prometheus' `histogram_quantile`.
+
+Gunicorn runs the app in several worker processes, each with its own
+metrics, and a scrape of `metrics` reaches only one of them. To aggregate
+across workers, set the environment variable `DVE_METRICS_DIR` to a
+directory shared by all workers. Each process then writes its metrics to
+a file in that directory every `DVE_METRICS_FLUSH_INTERVAL` seconds
+(default 10), and the `metrics` route merges all files in the directory.
+Files of processes that have exited are retained, so counts do not go
+backwards when a worker is restarted. The directory should therefore be
+emptied when the app is (re)started; a `tmpfs` mount does this.
+"""
+import atexit
+import bisect
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+
+import flask
+
+
+logger = logging.getLogger(__name__)
+
+# Default bucket upper bounds, for durations in seconds. There is an
+# implicit +Inf bucket.
+buckets = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+# Bucket upper bounds for sizes in bytes.
+byte_buckets = (
+    1e3,
+    1e4,
+    3e4,
+    1e5,
+    3e5,
+    1e6,
+    3e6,
+    1e7,
+    3e7,
+    1e8,
+)
+
+quantiles = (0.5, 0.95, 0.99)
+
+timing_metric = "dve_timing_seconds"
+
+
+class Histogram:
+    """
+    Histogram of observed values, with fixed buckets. Counts are per bucket
+    (not cumulative, as in the Prometheus exposition format).
+    """
+
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, counts=None, sum=0.0, buckets=buckets):
+        self.buckets = tuple(buckets)
+        self.counts = list(counts or [0] * (len(self.buckets) + 1))
+        self.sum = sum
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def merge(self, other):
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.sum += other.sum
+
+    def quantile(self, q):
+        """
+        Estimate quantile `q` by linear interpolation within the bucket that
+        contains it. Values in the +Inf bucket are estimated as the largest
+        finite bucket bound.
+        """
+        buckets = self.buckets
+        count = self.count
+        if count == 0:
+            return float("nan")
+        rank = q * count
+        cumulative = 0
+        for i, bucket_count in enumerate(self.counts):
+            if bucket_count and cumulative + bucket_count >= rank:
+                if i == len(buckets):
+                    return buckets[-1]
+                lower = buckets[i - 1] if i > 0 else 0.0
+                fraction = (rank - cumulative) / bucket_count
+                return lower + (buckets[i] - lower) * fraction
+            cumulative += bucket_count
+        return buckets[-1]
+
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+def escape_label_value(value):
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\n", "\\n")
+        .replace('"', '\\"')
+    )
+
+
+def format_labels(labels):
+    return ",".join(
+        f'{name}="{escape_label_value(value)}"' for name, value in labels
+    )
+
+
+class Metrics:
+    """
+    Collection of histograms, keyed by metric name and labels.
+    """
+
+    def __init__(self, directory=None, flush_interval=10):
+        """
+        :param directory: Directory shared by all processes for aggregation
+          of metrics. If None, only this process's metrics are reported.
+        :param flush_interval: Interval, in seconds, at which this process's
+          metrics are written to `directory`.
+        """
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._pid = None
+        self._filepath = None
+
+    def _ensure_process(self):
+        """
+        Reset metrics in a newly forked process: metrics recorded by the
+        parent process (e.g., while preloading) are the parent's to report.
+        Start flushing to the shared directory.
+        """
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._histograms = {}
+            if self.directory is None:
+                return
+            self._filepath = os.path.join(
+                self.directory, f"{self._pid}-{uuid.uuid4().hex[:8]}.json"
+            )
+        if self.flush_interval:
+            threading.Thread(
+                target=self._flush_periodically, name="Metrics", daemon=True
+            ).start()
+
+    def observe(self, name, value, labels, buckets=buckets):
+        """
+        Record an observation.
+
+        :param name: Metric name.
+        :param value: Observed value.
+        :param labels: Dict of label names and values.
+        :param buckets: Bucket bounds for the metric. A metric must always be
+          observed with the same buckets.
+        """
+        self._ensure_process()
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets=buckets)
+            histogram.observe(value)
+
+    def snapshot(self):
+        """Return this process's metrics in JSON-serializable form."""
+        with self._lock:
+            return [
+                [name, labels, h.buckets, h.counts, h.sum]
+                for (name, labels), h in self._histograms.items()
+            ]
+
+    def flush(self):
+        """Write this process's metrics to the shared directory."""
+        if self._filepath is None or self._pid != os.getpid():
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        fd, temp_filepath = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as file:
+                json.dump(self.snapshot(), file)
+            os.replace(temp_filepath, self._filepath)
+        except OSError:
+            os.unlink(temp_filepath)
+            raise
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Error writing metrics")
+
+    def collect(self):
+        """
+        Return merged histograms of all processes (or only this process, if
+        there is no shared directory), as a dict keyed by (name, labels).
+        """
+        self._ensure_process()
+        snapshots = [self.snapshot()]
+        if self.directory is not None and os.path.isdir(self.directory):
+            for filename in os.listdir(self.directory):
+                filepath = os.path.join(self.directory, filename)
+                if not filename.endswith(".json") or filepath == self._filepath:
+                    continue
+                try:
+                    with open(filepath, "r") as file:
+                        snapshots.append(json.load(file))
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Could not read metrics '{filepath}': {e}")
+        result = {}
+        for snapshot in snapshots:
+            for name, labels, bounds, counts, total in snapshot:
+                key = (name, tuple(tuple(label) for label in labels))
+                histogram = result.setdefault(key, Histogram(buckets=bounds))
+                histogram.merge(Histogram(counts, total, bounds))
+        return result
+
+    def prometheus_text(self):
+        """
+        Return all metrics in Prometheus text exposition format. Each
+        histogram is reported as a Prometheus histogram, and its estimated
+        quantiles as a gauge named `<name>_quantile`.
+        """
+        histograms = self.collect()
+        lines = []
+        for metric in sorted({name for name, _ in histograms}):
+            series = sorted(
+                (labels, histogram)
+                for (name, labels), histogram in histograms.items()
+                if name == metric
+            )
+            lines.append(f"# TYPE {metric} histogram")
+            for labels, histogram in series:
+                cumulative = 0
+                for bound, count in zip(
+                    histogram.buckets + (float("inf"),), histogram.counts
+                ):
+                    cumulative += count
+                    bucket_labels = format_labels(
+                        labels + (("le", format_value(bound)),)
+                    )
+                    lines.append(
+                        f"{metric}_bucket{{{bucket_labels}}} {cumulative}"
+                    )
+                lines.append(
+                    f"{metric}_sum{{{format_labels(labels)}}} "
+                    f"{format_value(histogram.sum)}"
+                )
+                lines.append(
+                    f"{metric}_count{{{format_labels(labels)}}} {cumulative}"
+                )
+            lines.append(f"# TYPE {metric}_quantile gauge")
+            for labels, histogram in series:
+                for q in quantiles:
+                    quantile_labels = format_labels(
+                        labels + (("quantile", str(q)),)
+                    )
+                    lines.append(
+                        f"{metric}_quantile{{{quantile_labels}}} "
+                        f"{format_value(histogram.quantile(q))}"
+                    )
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics(
+    directory=os.environ.get("DVE_METRICS_DIR") or None,
+    flush_interval=float(os.environ.get("DVE_METRICS_FLUSH_INTERVAL", 10)),
+)
+
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        metrics.flush()
+    except Exception:
+        pass
+
+
+def add(app, config):
+    """Add the `metrics` route to the app."""
+
+    @app.server.route(f"{app.config.routes_pathname_prefix}metrics")
+    def prometheus_metrics():
+        return flask.Response(
+            metrics.prometheus_text(),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
@@ -0,0 +1,202 @@
+"""
+Instrumentation of Dash callback responses: how many bytes each callback
+ships, and how long it takes to serialize them.
+
+For each Dash callback request (`_dash-update-component`), we record,
+labelled by the callback's output(s):
+
+- `dve_callback_request_seconds`: time to handle the request, from receipt
+  until the response body has been sent.
+- `dve_callback_serialization_seconds`: time spent encoding the callback's
+  response to JSON.
+- `dve_callback_response_bytes`: size of the JSON response (before any
+  compression).
+- `dve_callback_sent_bytes`: size of the response body as sent, i.e., after
+  compression if the response is compressed (label `encoding`).
+
+These are exposed with the other metrics on the `metrics` route (see
+`dve.metrics`). The sums of the byte metrics rank callbacks by bytes
+shipped.
+
+Requests that take longer than `DVE_SLOW_REQUEST_THRESHOLD` milliseconds
+(environment variable; default 1000; 0 disables) are also logged, with the
+above information.
+
+Bytes sent are counted by a WSGI middleware wrapped around the Flask app,
+so that they include any compression applied by the app. Serialization
+time is measured by wrapping the function Dash uses to encode callback
+responses.
+"""
+import functools
+import logging
+import os
+from time import perf_counter
+
+import dash._callback
+import flask
+
+from dve.dash_requests import callback_label, update_component_path
+from dve.metrics import byte_buckets, metrics
+from dve.tracing import current_trace_id, span
+
+
+logger = logging.getLogger(__name__)
+
+slow_request_threshold = float(
+    os.environ.get("DVE_SLOW_REQUEST_THRESHOLD", 1000)
+)
+
+# Key of request info in WSGI environ.
+environ_key = "dve.payload"
+
+
+def timed_serializer(to_json):
+    """
+    Wrap a JSON serializer so that its time is accumulated in the request
+    info of the current request, if any.
+    """
+
+    @functools.wraps(to_json)
+    def timed_to_json(obj):
+        start = perf_counter()
+        with span("serialize response"):
+            result = to_json(obj)
+        if flask.has_request_context():
+            info = flask.request.environ.get(environ_key)
+            if info is not None:
+                info["serialization_seconds"] += perf_counter() - start
+        return result
+
+    timed_to_json.timed = True
+    return timed_to_json
+
+
+def instrument_serializer():
+    """Instrument the serializer Dash uses for callback responses."""
+    to_json = getattr(dash._callback, "to_json", None)
+    if to_json is None:
+        logger.warning("Cannot instrument Dash callback serializer")
+        return
+    if not getattr(to_json, "timed", False):
+        dash._callback.to_json = timed_serializer(to_json)
+
+
+def record(info):
+    """Record metrics for a completed callback request, and log it if slow."""
+    labels = {"callback": info["callback"]}
+    metrics.observe(
+        "dve_callback_request_seconds", info["request_seconds"], labels
+    )
+    metrics.observe(
+        "dve_callback_serialization_seconds",
+        info["serialization_seconds"],
+        labels,
+    )
+    if info["response_bytes"] is not None:
+        metrics.observe(
+            "dve_callback_response_bytes",
+            info["response_bytes"],
+            labels,
+            buckets=byte_buckets,
+        )
+    metrics.observe(
+        "dve_callback_sent_bytes",
+        info["sent_bytes"],
+        {**labels, "encoding": info["encoding"]},
+        buckets=byte_buckets,
+    )
+    if (
+        slow_request_threshold
+        and info["request_seconds"] * 1000 >= slow_request_threshold
+    ):
+        logger.warning(
+            f"Slow callback request [{info['callback']}]: "
+            f"{info['request_seconds'] * 1000:.0f} ms, "
+            f"{info['sent_bytes']} bytes sent",
+            extra={"item": "slow_request", **info},
+        )
+
+
+class PayloadMiddleware:
+    """
+    WSGI middleware that measures the time and bytes sent for Dash callback
+    requests, and records them (see `record`).
+    """
+
+    def __init__(self, wsgi_app, callback_path):
+        self.wsgi_app = wsgi_app
+        self.callback_path = callback_path
+
+    def __call__(self, environ, start_response):
+        if environ.get("PATH_INFO") != self.callback_path:
+            return self.wsgi_app(environ, start_response)
+
+        start = perf_counter()
+        info = environ[environ_key] = {
+            "callback": "unknown",
+            "trace_id": None,
+            "status": None,
+            "encoding": "identity",
+            "response_bytes": None,
+            "sent_bytes": 0,
+            "serialization_seconds": 0.0,
+            "request_seconds": None,
+        }
+
+        def instrumented_start_response(status, headers, *args):
+            info["status"] = int(status.split(" ", 1)[0])
+            for name, value in headers:
+                if name.lower() == "content-encoding":
+                    info["encoding"] = value
+            return start_response(status, headers, *args)
+
+        body = self.wsgi_app(environ, instrumented_start_response)
+        return InstrumentedBody(body, info, start)
+
+
+class InstrumentedBody:
+    """
+    Response body iterable that counts the bytes sent, and records the
+    request when the server closes it (after sending it).
+    """
+
+    def __init__(self, body, info, start):
+        self.body = body
+        self.info = info
+        self.start = start
+
+    def __iter__(self):
+        for chunk in self.body:
+            self.info["sent_bytes"] += len(chunk)
+            yield chunk
+
+    def close(self):
+        try:
+            if hasattr(self.body, "close"):
+                self.body.close()
+        finally:
+            self.info["request_seconds"] = perf_counter() - self.start
+            try:
+                record(self.info)
+            except Exception:
+                logger.exception("Error recording callback request metrics")
+
+
+def add(app, config):
+    """Add callback response instrumentation to the app."""
+    instrument_serializer()
+    callback_path = update_component_path(app)
+    app.server.wsgi_app = PayloadMiddleware(app.server.wsgi_app, callback_path)
+
+    @app.server.after_request
+    def record_response(response):
+        info = flask.request.environ.get(environ_key)
+        if info is None:
+            return response
+        info["callback"] = callback_label(flask.request)
+        info["trace_id"] = current_trace_id()
+        if not (
+            response.is_streamed or "Content-Encoding" in response.headers
+        ):
+            info["response_bytes"] = response.calculate_content_length()
+        return response
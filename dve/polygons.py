@@ -1,6 +1,10 @@
+import functools
+
 import geopandas as gpd
 from shapely.geometry import MultiPolygon
 
+from climpyrical.mask import stratify_coords
+
 
 def load_north_america_polygons_plotly(path_to_shapefile: str) -> str:
     """Loads a polygon from Natural Earth to plot in plotly
@@ -44,3 +48,28 @@ def load_north_america_polygons_plotly(path_to_shapefile: str) -> str:
             pts.append([None, None])
 
     return zip(*pts)
+
+
+@functools.lru_cache(maxsize=None)
+def canada_boundary(path_to_shapefile):
+    """
+    Load the boundary polygons of Canada from a shapefile, and return them
+    as coordinate sequences suitable for a Plotly line trace, along with their
+    bounds.
+
+    The result is cached, so the shapefile is read only once per process (or
+    only once in total, if the app is preloaded before forking workers).
+
+    :param path_to_shapefile: Path to shapefile.
+    :return: tuple (x, y, (x_min, x_max, y_min, y_max)), where x, y are
+        the outputs of `stratify_coords`.
+    """
+    canada = gpd.read_file(path_to_shapefile).geometry
+    canada_x, canada_y = stratify_coords(canada)
+    x_values = [value for value in canada_x if value is not None]
+    y_values = [value for value in canada_y if value is not None]
+    return (
+        canada_x,
+        canada_y,
+        (min(x_values), max(x_values), min(y_values), max(y_values)),
+    )
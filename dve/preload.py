@@ -0,0 +1,157 @@
+"""
+Preloading and cache warm-up.
+
+By default, each app process (e.g., each Gunicorn worker) builds everything
+it needs lazily, so the first user after each restart pays for reading the
+boundary shapefile, computing the lon-lat graticule, and opening the data
+files for the map they look at.
+
+Preloading does this work up front, when the app is created. When the app is
+created in the Gunicorn master process before workers are forked (Gunicorn
+setting `preload_app`), the workers inherit the preloaded objects
+copy-on-write, so the work is done once in total rather than once per worker.
+
+Preloading is enabled by the environment variable `DVE_PRELOAD` (see
+`dve.app.make_wsgi_app`), and configured in the app config under the key
+`values.preload`. This object contains the following items, all optional:
+
+- `load_rasters`: If true, rasters are loaded entirely into memory (and their
+  files closed), rather than opened lazily. This is necessary for safely
+  sharing them across forked processes, since open NetCDF file handles must
+  not be shared. Default: true.
+
+- `default`: If true, warm up the design variable, climate regime and
+  future dataset that are shown on first page load (as configured in
+  `values.ui.controls`). Default: true.
+
+- `warm_up`: List of further combinations to warm up. Each item contains
+  the keys `design_variable`, `climate_regime` and, for the future climate
+  regime, `future_dataset_id`.
+"""
+import gc
+import logging
+from pkg_resources import resource_filename
+
+from dve.config.validation import file_exists
+from dve.config.values import filepath_for
+from dve.data import get_data_object, grid_size
+from dve.dict_utils import path_get
+from dve.generate_iso_lines import configured_lonlat_overlay
+from dve.polygons import canada_boundary
+from dve.provinces import province_labels, provinces_filepath
+from dve.timing import timing
+
+
+logger = logging.getLogger(__name__)
+timing_log = logger.info
+
+historical_dataset_id = "reconstruction"
+
+
+def default_warm_up_item(config):
+    """
+    Return a warm-up item for the map shown on first page load.
+    """
+    controls = config["values"]["ui"]["controls"]
+    return {
+        "design_variable": controls["design-value-id"]["value"],
+        "climate_regime": controls["climate-regime"]["value"],
+        "future_dataset_id": controls["future-dataset"]["value"],
+    }
+
+
+def warm_up_items(config):
+    """
+    Return the list of warm-up items specified by the config.
+    """
+    preload_config = path_get(config, "values.preload", default={})
+    items = []
+    if preload_config.get("default", True):
+        items.append(default_warm_up_item(config))
+    items += preload_config.get("warm_up", [])
+    return items
+
+
+def warm_up(
+    config,
+    design_variable,
+    climate_regime,
+    future_dataset_id=None,
+    load_rasters=True,
+):
+    """
+    Prime the caches used when a user views the map and table for a design
+    variable and climate regime: the raster dataset, the station and Table C2
+    datasets (for the historical climate regime), and the default lon-lat
+    graticule and province label raster for the raster grid.
+    """
+    raster_filepath = filepath_for(
+        config,
+        design_variable,
+        climate_regime,
+        historical_dataset_id,
+        future_dataset_id,
+    )
+    if raster_filepath is None or not file_exists(raster_filepath):
+        logger.warning(
+            f"Cannot warm up {(design_variable, climate_regime, future_dataset_id)}: "
+            f"no data file"
+        )
+        return
+
+    raster_dataset = get_data_object(
+        config,
+        design_variable,
+        climate_regime,
+        historical_dataset_id,
+        future_dataset_id,
+        preload=load_rasters,
+    )
+    rlon_grid_size, rlat_grid_size = raster_dataset.apply(grid_size)
+    configured_lonlat_overlay(
+        config["values"]["map"]["lonlat_overlay"],
+        rlon_grid_size=rlon_grid_size,
+        rlat_grid_size=rlat_grid_size,
+    )
+    raster_dataset.apply(province_labels, provinces_filepath(config))
+
+    if climate_regime == "historical":
+        for dataset_id in ("stations", "table"):
+            dataset = get_data_object(
+                config,
+                design_variable,
+                climate_regime,
+                historical_dataset_id=dataset_id,
+            )
+            if dataset is not None:
+                dataset.data_frame()
+
+
+def preload(config):
+    """
+    Preload data and artifacts used by the app, and prime the caches
+    according to the configuration. See module docstring for details.
+    """
+    preload_config = path_get(config, "values.preload", default={})
+    load_rasters = preload_config.get("load_rasters", True)
+
+    with timing("Preload", log=timing_log):
+        canada_boundary(
+            resource_filename("dve", config["values"]["paths"]["canada_vector"])
+        )
+        for item in warm_up_items(config):
+            with timing(
+                f"Warm up {item}",
+                log=timing_log,
+                labels={
+                    "description": "Warm up",
+                    "dv": item["design_variable"],
+                    "regime": item["climate_regime"],
+                },
+            ):
+                warm_up(config, load_rasters=load_rasters, **item)
+
+    # Move everything allocated so far into the permanent generation, so that
+    # the garbage collector does not touch (and therefore copy) the memory
+    # pages that forked processes share with this one.
+    gc.freeze()
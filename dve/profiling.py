@@ -0,0 +1,297 @@
+"""
+On-demand profiling of Dash callback requests.
+
+Profiling is opt-in. When armed, a worker process profiles (with `cProfile`)
+the next N Dash callback requests (`_dash-update-component`) that it
+handles, and keeps the profiles of those that take at least a threshold
+time. Profiles are saved in the directory named by environment variable
+`DVE_PROFILE_DIR` (default: `dve-profiles` in the system temporary
+directory), which should be shared by all workers. At most
+`DVE_PROFILE_MAX_FILES` (default 200) profiles are kept; older ones are
+deleted.
+
+Profiling is armed in either of two ways:
+
+- At startup, in every worker, by setting environment variables
+  `DVE_PROFILE_REQUESTS` (number of requests; default 0, i.e., not armed)
+  and `DVE_PROFILE_THRESHOLD` (milliseconds; default 0).
+- While running, in the worker that handles the request, by the admin
+  route `POST admin/profiling?requests=N&threshold=T`.
+
+Profiles are browsed through these admin routes (see `dve.admin`):
+
+- `GET admin/profiles`: list of profiles, and the profiling state of the
+  handling worker.
+- `GET admin/profiles/summary?top=N&sort=K`: for each callback (identified
+  by its outputs), the top N functions of all its profiles combined,
+  sorted by `K` (a `pstats` sort key; default `cumulative`).
+- `GET admin/profiles/<id>?top=N&sort=K`: the top N functions of a single
+  profile, as text; or with `format=pstats`, the profile itself, for use
+  with `pstats`, `snakeviz`, etc., or with the script `stats.py`.
+"""
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import re
+import tempfile
+import threading
+import time
+from time import perf_counter
+
+import flask
+
+import dve.admin
+from dve.dash_requests import callback_label, update_component_path
+
+
+logger = logging.getLogger(__name__)
+
+default_profile_dir = os.path.join(tempfile.gettempdir(), "dve-profiles")
+
+
+def profile_dir():
+    return os.environ.get("DVE_PROFILE_DIR", default_profile_dir)
+
+
+max_files = int(os.environ.get("DVE_PROFILE_MAX_FILES", 200))
+
+profile_id_pattern = re.compile(r"^[\w.-]+$")
+
+
+class Profiler:
+    """
+    Profiling state of this process.
+    """
+
+    def __init__(self, requests=0, threshold=0):
+        """
+        :param requests: Number of requests remaining to be profiled.
+        :param threshold: Minimum duration (ms) of a request for its profile
+          to be kept.
+        """
+        self.requests = requests
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._sequence = 0
+
+    def arm(self, requests, threshold=0):
+        with self._lock:
+            self.requests = requests
+            self.threshold = threshold
+        logger.info(
+            f"Profiling armed: {requests} requests, threshold {threshold} ms"
+        )
+
+    def claim(self):
+        """
+        Claim a request for profiling. If profiling is armed, count the
+        request and return its sequence number in this process; otherwise
+        return None.
+        """
+        if self.requests <= 0:
+            return None
+        with self._lock:
+            if self.requests <= 0:
+                return None
+            self.requests -= 1
+            self._sequence += 1
+            return self._sequence
+
+    def state(self):
+        return {
+            "pid": os.getpid(),
+            "requests": self.requests,
+            "threshold": self.threshold,
+        }
+
+
+profiler = Profiler(
+    requests=int(os.environ.get("DVE_PROFILE_REQUESTS", 0)),
+    threshold=float(os.environ.get("DVE_PROFILE_THRESHOLD", 0)),
+)
+
+
+def save_profile(profile, metadata):
+    """
+    Save a profile and its metadata in the profile directory, and delete
+    the oldest profiles in excess of `max_files`.
+    """
+    directory = profile_dir()
+    os.makedirs(directory, exist_ok=True)
+    profile.dump_stats(os.path.join(directory, f"{metadata['id']}.prof"))
+    with open(os.path.join(directory, f"{metadata['id']}.json"), "w") as file:
+        json.dump(metadata, file)
+    profile_ids = sorted(
+        filename[: -len(".json")]
+        for filename in os.listdir(directory)
+        if filename.endswith(".json")
+    )
+    for profile_id in profile_ids[:-max_files]:
+        for extension in (".json", ".prof"):
+            try:
+                os.unlink(os.path.join(directory, f"{profile_id}{extension}"))
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles():
+    directory = profile_dir()
+    if not os.path.isdir(directory):
+        return []
+    result = []
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(directory, filename), "r") as file:
+                result.append(json.load(file))
+        except (OSError, ValueError):
+            pass
+    return result
+
+
+def profile_filepath(profile_id):
+    if not profile_id_pattern.match(profile_id):
+        return None
+    filepath = os.path.join(profile_dir(), f"{profile_id}.prof")
+    return filepath if os.path.isfile(filepath) else None
+
+
+def top_functions(stats, sort="cumulative", top=20):
+    """
+    Return the top functions in a `pstats.Stats`, as a list of dicts.
+    """
+    stats.sort_stats(sort)
+    result = []
+    for func in stats.fcn_list[:top]:
+        cc, nc, tt, ct, callers = stats.stats[func]
+        filename, line, name = func
+        result.append(
+            {
+                "function": f"{filename}:{line}({name})",
+                "ncalls": nc,
+                "primitive_calls": cc,
+                "tottime": tt,
+                "cumtime": ct,
+            }
+        )
+    return result
+
+
+def summary(sort="cumulative", top=20):
+    """
+    Return, for each callback, the number of profiles, their total duration,
+    and the top functions of all its profiles combined.
+    """
+    by_label = {}
+    for metadata in list_profiles():
+        by_label.setdefault(metadata["label"], []).append(metadata)
+    result = {}
+    for label, profiles in by_label.items():
+        filepaths = list(
+            filter(None, (profile_filepath(p["id"]) for p in profiles))
+        )
+        if not filepaths:
+            continue
+        result[label] = {
+            "profiles": len(filepaths),
+            "elapsed_ms": sum(p["elapsed_ms"] for p in profiles),
+            "top": top_functions(pstats.Stats(*filepaths), sort, top),
+        }
+    return result
+
+
+def add(app, config):
+    """
+    Add request profiling and the profiling admin routes to the app.
+    """
+    callback_path = update_component_path(app)
+
+    @app.server.before_request
+    def start_profile():
+        if flask.request.path != callback_path:
+            return
+        sequence = profiler.claim()
+        if sequence is None:
+            return
+        flask.g.profile_sequence = sequence
+        flask.g.profile = cProfile.Profile()
+        flask.g.profile_start = perf_counter()
+        flask.g.profile.enable()
+
+    @app.server.teardown_request
+    def end_profile(exception=None):
+        profile = flask.g.pop("profile", None)
+        if profile is None:
+            return
+        profile.disable()
+        elapsed_ms = (perf_counter() - flask.g.pop("profile_start")) * 1000
+        if elapsed_ms < profiler.threshold:
+            return
+        now = time.time()
+        metadata = {
+            "id": (
+                f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime(now))}"
+                f"-{os.getpid()}-{flask.g.profile_sequence}"
+            ),
+            "label": callback_label(flask.request),
+            "elapsed_ms": elapsed_ms,
+            "time": now,
+            "pid": os.getpid(),
+        }
+        try:
+            save_profile(profile, metadata)
+        except OSError as e:
+            logger.warning(f"Could not save profile: {e}")
+
+    def top_args():
+        return (
+            flask.request.args.get("sort", "cumulative"),
+            flask.request.args.get("top", 20, type=int),
+        )
+
+    @dve.admin.route(app, "profiling", methods=["POST"])
+    def admin_arm_profiling():
+        profiler.arm(
+            flask.request.args.get("requests", 10, type=int),
+            flask.request.args.get("threshold", 0, type=float),
+        )
+        return flask.jsonify(profiler.state())
+
+    @dve.admin.route(app, "profiles")
+    def admin_profiles():
+        return flask.jsonify(
+            {"profiler": profiler.state(), "profiles": list_profiles()}
+        )
+
+    @dve.admin.route(app, "profiles/summary")
+    def admin_profiles_summary():
+        try:
+            return flask.jsonify(summary(*top_args()))
+        except KeyError as e:
+            flask.abort(400, f"Invalid sort key {e}")
+
+    @dve.admin.route(app, "profiles/<profile_id>")
+    def admin_profile(profile_id):
+        filepath = profile_filepath(profile_id)
+        if filepath is None:
+            flask.abort(404)
+        if flask.request.args.get("format") == "pstats":
+            return flask.send_file(
+                filepath,
+                mimetype="application/octet-stream",
+                as_attachment=True,
+                download_name=f"{profile_id}.prof",
+            )
+        sort, top = top_args()
+        stream = io.StringIO()
+        try:
+            pstats.Stats(filepath, stream=stream).sort_stats(sort).print_stats(
+                top
+            )
+        except KeyError as e:
+            flask.abort(400, f"Invalid sort key {e}")
+        return flask.Response(stream.getvalue(), mimetype="text/plain")
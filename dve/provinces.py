@@ -0,0 +1,244 @@
+"""
+Summaries of design value rasters by province and territory.
+
+The boundaries of the provinces and territories are read from the Natural
+Earth admin-1 shapefile (configured as `values.paths.provinces_vector`).
+For each raster grid, they are rasterized once into a label raster, which
+assigns each grid cell the index of the province or territory containing its
+centre (or -1 for none). Label rasters are cached by grid (see
+`province_labels`), and computed during preloading (see `dve.preload`), so
+that summarizing a raster by province is a matter of a few vectorized passes
+over it (see `dve.zonal`), taking milliseconds.
+
+The route `<routes pathname prefix>provinces/<design variable>/<climate
+regime>/<dataset id>` returns the summary of a raster by province. The
+dataset is specified as for the export route (see `dve.export`). Query
+parameters:
+
+- `percentiles`: Comma-separated list of percentiles to compute. Default:
+  as configured in `values.provinces.percentiles`.
+- `lang`: Language of province names, `en` (default) or `fr`.
+
+The response is a JSON object:
+
+```
+{
+    "units": <units of values>,
+    "percentiles": [...],
+    "provinces": [
+        {
+            "code": <postal abbreviation>,
+            "name": <name>,
+            "cells": <number of cells in province>,
+            "count": <number of cells in province with a value>,
+            "min": ..., "max": ..., "mean": ...,
+            "percentiles": [...]
+        },
+        ...
+    ]
+}
+```
+
+Statistics are null for a province with no values.
+"""
+import functools
+import logging
+from collections import namedtuple
+from types import MappingProxyType
+
+import flask
+import geopandas as gpd
+import numpy as np
+import shapely.geometry
+from pkg_resources import resource_filename
+
+from dve.config.values import dv_units
+from dve.data import (
+    ThreadSafeCache,
+    grid_key,
+    polygon_region,
+    read_only,
+)
+from dve.export import ExportError, requested_dataset
+from dve.zonal import zonal_stats
+
+
+logger = logging.getLogger(__name__)
+
+# Provinces and territories, in order of their labels.
+Provinces = namedtuple("Provinces", "codes names geometries")
+
+
+@functools.lru_cache(maxsize=None)
+def load_provinces(path_to_shapefile):
+    """
+    Load the provinces and territories of Canada from the Natural Earth
+    admin-1 shapefile.
+
+    :param path_to_shapefile: Path to shapefile.
+    :return: Provinces. `codes` is a tuple of postal abbreviations; `names`
+      maps language to a tuple of names; `geometries` is a tuple of GeoJSON
+      geometries.
+    """
+    provinces = gpd.read_file(path_to_shapefile)
+    provinces = provinces[provinces.iso_a2 == "CA"].sort_values("postal")
+    return Provinces(
+        codes=tuple(provinces.postal),
+        names=MappingProxyType(
+            {"en": tuple(provinces.name), "fr": tuple(provinces.name_fr)}
+        ),
+        geometries=tuple(
+            shapely.geometry.mapping(geometry)
+            for geometry in provinces.geometry
+        ),
+    )
+
+
+def provinces_filepath(config):
+    return resource_filename(
+        "dve", config["values"]["paths"]["provinces_vector"]
+    )
+
+
+def label_raster(dvds, ds, geometries):
+    """
+    Rasterize geometries onto the grid of a dataset.
+
+    :param geometries: Sequence of GeoJSON geometries.
+    :return: Read-only int8 array of the shape of the grid, containing
+      for each cell the index of the geometry containing its centre, or -1.
+    """
+    labels = np.full((ds.rlat.size, ds.rlon.size), -1, dtype=np.int8)
+    for label, geometry in enumerate(geometries):
+        rows, cols, mask = polygon_region(dvds, ds, geometry)
+        labels[rows, cols][mask] = label
+    return read_only(labels)
+
+
+# Cache of province label rasters, keyed by grid and shapefile. There is one
+# per distinct grid of the rasters, of which there are few.
+label_cache = ThreadSafeCache(
+    "ProvinceLabels",
+    on_miss=None,
+    maxsize=10,
+    sizeof=lambda labels: labels.nbytes,
+)
+
+
+def province_labels(dvds, ds, path_to_shapefile):
+    """
+    Return the province label raster for the grid of a dataset (see
+    `label_raster`). Label rasters are cached.
+    """
+    return label_cache.fetch(
+        (grid_key(ds), path_to_shapefile),
+        on_miss=lambda key: label_raster(
+            dvds, ds, load_provinces(path_to_shapefile).geometries
+        ),
+    )
+
+
+def raster_values(dvds, ds):
+    """Return the 2D array of design values of a dataset."""
+    return ds[dvds.dv_name].squeeze(drop=True).values
+
+
+def province_stats(config, dataset, percentiles=()):
+    """
+    Return statistics of a raster dataset by province.
+
+    :param dataset: DvXrDataset.
+    :param percentiles: Iterable of percentiles to compute.
+    :return: tuple (Provinces, ZoneStats).
+    """
+    path = provinces_filepath(config)
+    provinces = load_provinces(path)
+    labels = dataset.apply(province_labels, path)
+    values = dataset.apply(raster_values)
+    return (
+        provinces,
+        zonal_stats(labels, values, len(provinces.codes), percentiles),
+    )
+
+
+def configured_percentiles(config):
+    return tuple(config["values"]["provinces"]["percentiles"])
+
+
+def parse_percentiles(text):
+    """
+    Parse a percentiles parameter.
+
+    :param text: Comma-separated percentiles.
+    :return: tuple of floats.
+    """
+    try:
+        percentiles = tuple(float(value) for value in text.split(",") if value)
+    except ValueError:
+        raise ExportError(f"Invalid percentiles '{text}'")
+    if not all(0 <= q <= 100 for q in percentiles):
+        raise ExportError(f"Percentiles must be in [0, 100]: '{text}'")
+    return percentiles
+
+
+def json_value(value):
+    """Return a float for JSON output; None for NaN."""
+    return None if np.isnan(value) else float(value)
+
+
+def provinces_response(config, design_variable, climate_regime, dataset_id):
+    lang = flask.request.args.get("lang", "en")
+    if lang not in ("en", "fr"):
+        raise ExportError(f"Unknown language '{lang}'")
+    percentiles = flask.request.args.get("percentiles")
+    percentiles = (
+        configured_percentiles(config)
+        if percentiles is None
+        else parse_percentiles(percentiles)
+    )
+
+    dataset = requested_dataset(
+        config, design_variable, climate_regime, dataset_id
+    )
+    provinces, stats = province_stats(config, dataset, percentiles)
+    return flask.jsonify(
+        {
+            "units": dv_units(
+                config, design_variable, climate_regime, nice=False
+            ),
+            "percentiles": list(percentiles),
+            "provinces": [
+                {
+                    "code": code,
+                    "name": name,
+                    "cells": int(stats.cells[i]),
+                    "count": int(stats.count[i]),
+                    "min": json_value(stats.min[i]),
+                    "max": json_value(stats.max[i]),
+                    "mean": json_value(stats.mean[i]),
+                    "percentiles": [
+                        json_value(value) for value in stats.percentiles[:, i]
+                    ],
+                }
+                for i, (code, name) in enumerate(
+                    zip(provinces.codes, provinces.names[lang])
+                )
+            ],
+        }
+    )
+
+
+def add(app, config):
+    """Add the provincial summary route to the app."""
+
+    @app.server.route(
+        f"{app.config.routes_pathname_prefix}provinces/"
+        "<design_variable>/<climate_regime>/<dataset_id>"
+    )
+    def province_summary(design_variable, climate_regime, dataset_id):
+        try:
+            return provinces_response(
+                config, design_variable, climate_regime, dataset_id
+            )
+        except ExportError as e:
+            return flask.Response(f"{e}\n", status=400, mimetype="text/plain")
@@ -0,0 +1,170 @@
+"""
+Hot reloading of the app configuration and data files.
+
+A reload reads the app configuration files afresh (e.g., after a DV is added
+in `config/values/dvs.yml`, or a filepath is changed), compiles and validates
+the new configuration, and swaps it into the configuration object used by
+all the app's callbacks and routes. It also re-stats all data files. Cached
+datasets are invalidated only for files that have changed or are no longer
+configured; all other cached data stays warm. Data derived from the
+configuration (e.g., Table C2) is cached by configuration generation (see
+`dve.config.index`), and so is derived afresh after a reload.
+
+Callbacks and routes read the configuration when they are called, so they
+see the new configuration. (A request handled while a reload is made may
+see parts of both; see `reload`.) The exceptions, which take effect only
+when the app is restarted, are:
+
+- What is decided when the app is created: the set of callbacks and routes,
+  the UI elements stored as local preferences, and the settings of
+  response compression and serialization.
+- The content of a vector file (`paths.canada_vector`,
+  `paths.provinces_vector`) replaced in place. Vector data is cached by
+  filepath; a new filepath is read on reload.
+- Gunicorn and environment variable settings.
+
+Since each worker process has its own configuration and caches, a reload
+must be made in every worker. A reload is triggered in either of two ways:
+
+- A POST request to the admin route `admin/reload` (see `dve.admin`). The
+  worker handling the request reloads immediately, then touches the reload
+  trigger file (see below), which causes the other workers to reload. The
+  worker ignores its own touch of the trigger file.
+- Touching the reload trigger file, whose path is given by the environment
+  variable `DVE_RELOAD_TRIGGER` (default: `dve-reload` in the system
+  temporary directory). The trigger file is watched by the file status
+  registry, so each worker reloads within `FILE_STATUS_POLL_INTERVAL`
+  seconds.
+
+(We do not use a signal for this. Gunicorn uses `SIGHUP` to restart workers,
+which is exactly the loss of warm caches we are trying to avoid, and the
+worker processes' signal handling belongs to Gunicorn.)
+"""
+import logging
+import os
+import tempfile
+import threading
+
+import flask
+
+import dve.admin
+import dve.config.index
+import dve.config.snapshot
+import dve.config.validation
+import dve.data
+import dve.layout
+from dve.file_status import registry, stat_file
+from dve.timing import timing
+
+
+logger = logging.getLogger(__name__)
+timing_log = logger.info  # Set to None to not log timing
+
+default_trigger_filepath = os.path.join(tempfile.gettempdir(), "dve-reload")
+
+_lock = threading.Lock()
+
+
+def trigger_filepath():
+    return os.path.abspath(
+        os.environ.get("DVE_RELOAD_TRIGGER", default_trigger_filepath)
+    )
+
+
+def touch(filepath):
+    with open(filepath, "a"):
+        os.utime(filepath)
+
+
+def reload(app, config, app_config_filepath, refresh=True):
+    """
+    Reload the app configuration and swap it into `config`, in place.
+    Invalidate cached datasets whose files have changed or are no longer
+    in the configuration.
+
+    :param app: Dash app.
+    :param config: Current configuration. Updated in place.
+    :param app_config_filepath: Filepath of app configuration file.
+    :param refresh: Whether to re-stat the data files. False when the reload
+        is made by a file status listener, i.e., during a refresh.
+    :return: dict summarizing the reload.
+    """
+    # Re-stat the data files we know about; the file status registry notifies
+    # `dve.data`, which invalidates cached data for changed files. This is
+    # done outside the lock, since the refresh may notice a reload trigger
+    # from another worker, whose listener reloads.
+    changed = registry.refresh() if refresh else []
+
+    with _lock, timing("reload", log=timing_log):
+        new_config = dve.config.snapshot.load_config(app_config_filepath)
+        new_config["index"] = dve.config.index.compile_config(new_config)
+        dve.config.validation.validate(new_config)
+
+        old_filepaths = set(
+            dve.config.index.config_index(config).resolved_filepaths.values()
+        )
+        new_filepaths = set(new_config["index"].resolved_filepaths.values())
+        removed = old_filepaths - new_filepaths
+        for filepath in removed:
+            dve.data.invalidate_file(filepath)
+
+        # Swap in the new configuration. Callbacks hold a reference to
+        # `config`, so it must be updated in place. Each lookup of a key
+        # sees either its old or its new value, but a callback that looks up
+        # several keys (e.g., `config["values"]`, then `config_index(config)`)
+        # while a reload is made may see some old and some new. Keys no
+        # longer in the configuration are removed.
+        config.update(new_config)
+        for key in set(config) - set(new_config):
+            config.pop(key, None)
+        app.layout = dve.layout.main(app, config)
+
+    summary = {
+        "dvs": len(new_config["index"].dvs),
+        "files": len(new_filepaths),
+        "added": sorted(new_filepaths - old_filepaths),
+        "removed": sorted(removed),
+        "changed": sorted(changed),
+    }
+    logger.info(f"Configuration reloaded: {summary}")
+    return summary
+
+
+def add(app, config, app_config_filepath):
+    """
+    Add reload triggers (admin route and trigger file) to the app.
+    """
+    trigger = trigger_filepath()
+    registry.register((trigger,))
+
+    # Status of the trigger file after this worker last touched it. The
+    # lock ensures that the listener sees it once the touch is made.
+    own_trigger_status = None
+    own_trigger_lock = threading.Lock()
+
+    def on_trigger(filepath, old_status, new_status):
+        if filepath != trigger or not new_status.exists:
+            return
+        with own_trigger_lock:
+            if new_status == own_trigger_status:
+                return
+        # Called during a refresh of the registry, so the reload need not
+        # make one.
+        reload(app, config, app_config_filepath, refresh=False)
+
+    registry.add_listener(on_trigger)
+
+    @dve.admin.route(app, "reload", methods=["POST"])
+    def admin_reload():
+        nonlocal own_trigger_status
+        summary = reload(app, config, app_config_filepath)
+        # Tell the other workers.
+        with own_trigger_lock:
+            try:
+                touch(trigger)
+                own_trigger_status = stat_file(trigger)
+            except OSError as e:
+                logger.warning(
+                    f"Could not touch reload trigger '{trigger}': {e}"
+                )
+        return flask.jsonify(summary)
@@ -0,0 +1,130 @@
+"""
+Regional subsets of design value rasters.
+
+The route `<routes pathname prefix>subset/<design variable>/<climate
+regime>/<dataset id>` returns the values of the grid cells in a region, and
+a summary of them. The dataset is specified as for the export route (see
+`dve.export`). The region is specified by one of:
+
+- Query parameter `bbox`: `lon_min,lat_min,lon_max,lat_max`; a lon-lat
+  bounding box. Longitudes are negative (degrees east).
+- Query parameter `rbbox`: `rlon_min,rlat_min,rlon_max,rlat_max`; a rotated
+  pole bounding box.
+- A POST request body containing a GeoJSON Polygon or MultiPolygon, either
+  as a geometry or as a Feature, in lon-lat coordinates.
+
+The response is a JSON object:
+
+```
+{
+    "units": <units of values>,
+    "cells": <number of cells in region>,
+    "count": <number of cells in region with a value>,
+    "summary": {"min": ..., "max": ..., "mean": ..., "median": ...},
+    "values": {"lon": [...], "lat": [...], "rlon": [...], "rlat": [...],
+               "value": [...]}
+}
+```
+
+Cells without a value (e.g., over the ocean) are omitted from `values`.
+Query parameter `values=false` omits `values` altogether, for a summary
+only. `summary` is null if no cell has a value.
+
+Regions are cached (see `dve.data.region`), so repeated queries for the same
+region, in particular the same polygon, do not rasterize it again.
+"""
+import logging
+
+import flask
+import numpy as np
+import shapely.geometry
+
+from dve.config.values import dv_units
+from dve.export import ExportError, parse_bbox, requested_dataset
+
+
+logger = logging.getLogger(__name__)
+
+polygon_types = ("Polygon", "MultiPolygon")
+
+
+def request_region():
+    """
+    Return the region specification of the current request, as keyword
+    arguments for `DvXrDataset.region`. A geometry is validated here, before
+    the dataset is accessed.
+    """
+    if flask.request.method == "POST":
+        body = flask.request.get_json(silent=True)
+        if isinstance(body, dict) and body.get("type") == "Feature":
+            body = body.get("geometry")
+        if not isinstance(body, dict) or body.get("type") not in polygon_types:
+            raise ExportError("Body must be a GeoJSON Polygon or MultiPolygon")
+        try:
+            shapely.geometry.shape(body)
+        except Exception as e:
+            # Shapely raises various errors (KeyError, ValueError, TypeError,
+            # GEOSException, ...) for malformed geometries.
+            raise ExportError(f"Invalid geometry: {e!r}")
+        return {"geometry": body}
+    bbox = parse_bbox(flask.request.args.get("bbox"))
+    rbbox = parse_bbox(flask.request.args.get("rbbox"))
+    if (bbox is None) == (rbbox is None):
+        raise ExportError("Exactly one of bbox, rbbox must be specified")
+    if bbox is not None:
+        return {"bbox": bbox}
+    return {"rbbox": rbbox}
+
+
+def summary(values):
+    """Return a summary of an array of values without NaNs."""
+    if not values.size:
+        return None
+    return {
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "mean": float(values.mean()),
+        "median": float(np.median(values)),
+    }
+
+
+def subset_response(config, design_variable, climate_regime, dataset_id):
+    region = request_region()
+    dataset = requested_dataset(
+        config, design_variable, climate_regime, dataset_id
+    )
+    subset = dataset.subset(**region)
+
+    valid = ~np.isnan(subset.values)
+    result = {
+        "units": dv_units(config, design_variable, climate_regime, nice=False),
+        "cells": int(subset.values.size),
+        "count": int(valid.sum()),
+        "summary": summary(subset.values[valid]),
+    }
+    if flask.request.args.get("values", "true").lower() != "false":
+        result["values"] = {
+            "lon": subset.lon[valid].tolist(),
+            "lat": subset.lat[valid].tolist(),
+            "rlon": subset.rlon[valid].tolist(),
+            "rlat": subset.rlat[valid].tolist(),
+            "value": subset.values[valid].tolist(),
+        }
+    return flask.jsonify(result)
+
+
+def add(app, config):
+    """Add the regional subset route to the app."""
+
+    @app.server.route(
+        f"{app.config.routes_pathname_prefix}subset/"
+        "<design_variable>/<climate_regime>/<dataset_id>",
+        methods=["GET", "POST"],
+    )
+    def subset_raster(design_variable, climate_regime, dataset_id):
+        try:
+            return subset_response(
+                config, design_variable, climate_regime, dataset_id
+            )
+        except ExportError as e:
+            return flask.Response(f"{e}\n", status=400, mimetype="text/plain")
@@ -0,0 +1,505 @@
+"""
+Generate a synthetic data set, shaped like the production data, and a
+matching app configuration.
+
+The production data files (CanRCM4-derived rasters, station files, and
+Table C2 files) are stored outside this repository. For local development
+and benchmarking, this module writes stand-ins for all of them, for every
+design variable in the app configuration (or a selection of them):
+
+- Reconstruction, model, and future change factor rasters (NetCDF), on the
+  CanRCM4 rotated-pole grid, with the same coordinate variables (`rlon`,
+  `rlat`, 2D `lon`, `lat`), grid mapping, and NaN pattern (ocean cells)
+  as the production rasters. The grid is taken from the CanRCM4 land mask
+  in `dve/data/masks`. It can be refined by an integer factor, for rasters
+  of larger size.
+- Station files (CSV), with station locations in rotated-pole and
+  standard coordinates and the configured value columns.
+- Table C2 files (CSV), with the columns the Table C2 tab requires.
+- An app configuration file (`app-config.yml`) identical to the
+  repository's configuration, except that it addresses the synthetic data
+  files.
+
+Data values are smooth random fields plus noise; they are plausible in
+shape, not in value.
+
+Usage (the generated configuration, like the repository's, assumes that
+the repository root directory is the current directory when the app runs):
+
+```
+python -m dve.synthetic_data OUTPUT_DIR [--dvs HDD RL50] [--refine 2]
+python app.py --config OUTPUT_DIR/app-config.yml
+```
+"""
+import argparse
+import logging
+import os
+import re
+
+import numpy as np
+import pandas as pd
+import xarray
+import yaml
+from pkg_resources import resource_filename
+from yamlinclude import YamlIncludeConstructor
+
+import dve.config.snapshot
+from dve.config.index import compile_config
+
+
+logger = logging.getLogger(__name__)
+
+grid_filepath = "data/masks/land_mask_CanRCM4_sftlf.nc"
+
+provinces = ("BC", "AB", "SK", "MB", "ON", "QC", "NB", "NS", "PE", "NL", "YT")
+
+
+def model_grid(refine=1):
+    """
+    Return the CanRCM4 model grid, optionally refined by an integer factor,
+    as an `xarray.Dataset` with coordinates `rlon`, `rlat`, `lon`, `lat`,
+    variable `rotated_pole`, and the land fraction `sftlf` (percent).
+    """
+    with xarray.open_dataset(resource_filename("dve", grid_filepath)) as ds:
+        grid = ds.squeeze("time", drop=True).load()
+    if refine > 1:
+        rlon = np.linspace(
+            grid.rlon.values[0],
+            grid.rlon.values[-1],
+            (grid.rlon.size - 1) * refine + 1,
+        )
+        rlat = np.linspace(
+            grid.rlat.values[0],
+            grid.rlat.values[-1],
+            (grid.rlat.size - 1) * refine + 1,
+        )
+        coords = (
+            grid[["lon", "lat"]].reset_coords().interp(rlon=rlon, rlat=rlat)
+        )
+        sftlf = grid.sftlf.interp(rlon=rlon, rlat=rlat, method="nearest")
+        grid = xarray.Dataset(
+            {
+                "rotated_pole": grid.rotated_pole,
+                "sftlf": sftlf.reset_coords(drop=True),
+            },
+            coords={
+                "rlon": ("rlon", rlon, grid.rlon.attrs),
+                "rlat": ("rlat", rlat, grid.rlat.attrs),
+                "lon": (("rlat", "rlon"), coords.lon.values, grid.lon.attrs),
+                "lat": (("rlat", "rlon"), coords.lat.values, grid.lat.attrs),
+            },
+        )
+    return grid
+
+
+def smooth_field(rng, lon, lat):
+    """
+    Return a smooth random field on the given coordinates, with values in
+    [0, 1].
+    """
+    field = np.zeros(np.shape(lon))
+    for _ in range(4):
+        kx, ky = rng.uniform(0.02, 0.1, 2)
+        phase_x, phase_y = rng.uniform(0, 2 * np.pi, 2)
+        field += np.sin(kx * lon + phase_x) * np.cos(ky * lat + phase_y)
+    field += (lat - 40) / 20
+    field -= field.min()
+    return field / field.max()
+
+
+def historical_values(rng, roundto, field):
+    """Scale a unit field to plausible-looking historical values."""
+    scale = 1000 * (roundto or 1)
+    return scale * (0.1 + 0.9 * field) + rng.normal(0, scale / 200, field.shape)
+
+
+def future_values(rng, units, roundto, field, delta_t):
+    """
+    Scale a unit field to plausible-looking change factors for a warming
+    level: ratios near 1, or deltas near 0.
+    """
+    noise = rng.normal(0, 0.005, field.shape)
+    if units == "ratio":
+        return 1 + 0.05 * delta_t * (field - 0.3) + noise
+    return 100 * (roundto or 1) * delta_t * (field - 0.3 + noise)
+
+
+def raster_dataset(grid, name, values, units, time=False):
+    """
+    Return a raster dataset, with NaN over ocean cells.
+
+    :param grid: Model grid (see `model_grid`).
+    :param name: Name of data variable.
+    :param values: Values on grid.
+    :param units: Units of data variable.
+    :param time: If true, add a time dimension of length 1, as in the
+      model (CanRCM4) datasets.
+    """
+    values = np.where(grid.sftlf.values > 0, values, np.nan).astype("float32")
+    dims = ("rlat", "rlon")
+    if time:
+        values = values[np.newaxis, ...]
+        dims = ("time",) + dims
+    dataset = xarray.Dataset(
+        {
+            name: (
+                dims,
+                values,
+                {"units": units, "grid_mapping": "rotated_pole"},
+            ),
+            "rotated_pole": grid.rotated_pole,
+        },
+        coords={
+            "rlon": grid.rlon,
+            "rlat": grid.rlat,
+            "lon": grid.lon,
+            "lat": grid.lat,
+        },
+    )
+    if time:
+        dataset = dataset.assign_coords(
+            time=("time", pd.to_datetime(["1986-07-02"]))
+        )
+    return dataset
+
+
+def land_points(rng, grid, n):
+    """Return indices (ilat, ilon) of `n` random land cells of a grid."""
+    ilat, ilon = np.nonzero(grid.sftlf.values > 0)
+    choice = rng.choice(ilat.size, size=min(n, ilat.size), replace=False)
+    return ilat[choice], ilon[choice]
+
+
+def stations_data_frame(rng, grid, n):
+    """
+    Return a station data frame, without value columns. Value columns are
+    added by `add_stations_column`, since several design variables may share
+    a station file.
+    """
+    ilat, ilon = land_points(rng, grid, n)
+    return pd.DataFrame(
+        {
+            "station_name": [f"Station {i}" for i in range(ilat.size)],
+            "lon": grid.lon.values[ilat, ilon] - 360,
+            "lat": grid.lat.values[ilat, ilon],
+            "rlon": grid.rlon.values[ilon],
+            "rlat": grid.rlat.values[ilat],
+            "ilat": ilat,
+            "ilon": ilon,
+        }
+    )
+
+
+def add_stations_column(rng, df, field, column, roundto):
+    """Add a value column to a station data frame."""
+    df[column] = historical_values(
+        rng, roundto, field[df["ilat"].values, df["ilon"].values]
+    )
+
+
+def table_c2_data_frame(
+    rng, grid, field, dv_id, dv_record, future_dataset_ids, n
+):
+    """
+    Return a Table C2 data frame. Column names follow those expected by
+    `dve.callbacks.table_c2.make_data_table`.
+    """
+    historical = dv_record.climate_regimes["historical"]
+    ilat, ilon = land_points(rng, grid, n)
+    values = historical_values(rng, historical.roundto, field[ilat, ilon])
+    columns = {
+        "Location": [f"Location {i}" for i in range(ilat.size)],
+        "prov": rng.choice(provinces, size=ilat.size),
+        "Longitude": grid.lon.values[ilat, ilon] - 360,
+        "Latitude": grid.lat.values[ilat, ilon],
+        f"{dv_id} (NBCC)": np.round(values * rng.uniform(0.9, 1.1), -1),
+        f"{dv_id} ({historical.units})": values,
+    }
+    future = dv_record.climate_regimes.get("future")
+    if future is not None:
+        suffix = f" ({future.units})" if future.units != "ratio" else " "
+        for dataset_id in future_dataset_ids:
+            columns[f"CF_{dataset_id}C{suffix}"] = future_values(
+                rng,
+                future.units,
+                future.roundto,
+                field[ilat, ilon],
+                float(dataset_id),
+            )
+    return pd.DataFrame(columns)
+
+
+def output_filepath(output_dir, filepath):
+    """
+    Return the filepath of a synthetic data file, given its configured
+    filepath. Configured filepaths are relative, and are reproduced under
+    the output directory.
+    """
+    return os.path.abspath(os.path.join(output_dir, filepath))
+
+
+def write(filepath, writer):
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    writer(filepath)
+    logger.info(f"Wrote {filepath}")
+
+
+def generate_dv(
+    output_dir,
+    grid,
+    dv_id,
+    dv_record,
+    future_dataset_ids,
+    stations,
+    seed=0,
+    n_stations=600,
+    n_locations=680,
+):
+    """
+    Write all synthetic data files for a design variable, except its
+    station file, which is added to `stations` (a map from configured
+    filepath to station data frame) for writing once complete.
+    """
+    rng = np.random.default_rng([seed, sum(map(ord, dv_id))])
+    field = smooth_field(rng, grid.lon.values, grid.lat.values)
+
+    historical = dv_record.climate_regimes.get("historical")
+    if historical is not None:
+        filepaths = historical.filepaths
+        values = historical_values(rng, historical.roundto, field)
+        for dataset_id, time in (("reconstruction", False), ("model", True)):
+            if dataset_id in filepaths:
+                dataset = raster_dataset(
+                    grid, dv_id, values, historical.units, time=time
+                )
+                write(
+                    output_filepath(output_dir, filepaths[dataset_id]),
+                    dataset.to_netcdf,
+                )
+        if "stations" in filepaths:
+            df = stations.get(filepaths["stations"])
+            if df is None:
+                df = stations[filepaths["stations"]] = stations_data_frame(
+                    rng, grid, n_stations
+                )
+            add_stations_column(
+                rng, df, field, dv_record.stations_column, historical.roundto
+            )
+        if "table" in filepaths:
+            df = table_c2_data_frame(
+                rng,
+                grid,
+                field,
+                dv_id,
+                dv_record,
+                future_dataset_ids,
+                n_locations,
+            )
+            write(
+                output_filepath(output_dir, filepaths["table"]),
+                lambda path: df.to_csv(path, index=False),
+            )
+
+    future = dv_record.climate_regimes.get("future")
+    if future is not None:
+        for dataset_id, filepath in future.filepaths.items():
+            values = future_values(
+                rng, future.units, future.roundto, field, float(dataset_id)
+            )
+            dataset = raster_dataset(grid, dv_id, values, future.units)
+            write(output_filepath(output_dir, filepath), dataset.to_netcdf)
+
+
+def relocate_filepaths(dvs_config, output_dir):
+    """
+    Return a copy of the `dvs` configuration in which all dataset filepaths
+    address the synthetic data files. Config filepaths are relative to the
+    `dve` package (see `dve.config.index.resolve_filepath`), so the
+    relocated filepaths are too.
+    """
+    package_dir = resource_filename("dve", "")
+
+    def relocate(value, key=None):
+        if isinstance(value, dict):
+            return {k: relocate(v, k) for k, v in value.items()}
+        if isinstance(value, str) and (
+            value.endswith(".nc") or value.endswith(".csv")
+        ):
+            return os.path.relpath(
+                output_filepath(output_dir, value), package_dir
+            )
+        return value
+
+    return relocate(dvs_config)
+
+
+class SourceConfigLoader(yaml.FullLoader):
+    """
+    YAML loader for the imitated app configuration, whose include paths are
+    relative to its own directory, which need not be the current directory.
+    A separate class, so that the app's loader (`yaml.FullLoader`) is
+    unaffected.
+    """
+
+
+def write_config(output_dir, config, app_config_filepath, dvs=None):
+    """
+    Write an app configuration addressing the synthetic data files. The
+    configuration includes the imitated configuration's files, except for
+    the design variable configuration, which is written with relocated
+    filepaths (restricted to `dvs`, if given). The imitated configuration's
+    files are found relative to its directory.
+    """
+    source_dir = os.path.dirname(os.path.abspath(app_config_filepath))
+    with open(app_config_filepath) as file:
+        app_config_text = file.read()
+
+    dvs_config = relocate_filepaths(config["values"]["dvs"], output_dir)
+    if dvs is not None:
+        dvs_config = {dv: dvs_config[dv] for dv in dvs}
+    dvs_filepath = os.path.abspath(os.path.join(output_dir, "dvs.yml"))
+    with open(dvs_filepath, "w") as file:
+        yaml.safe_dump(dvs_config, file, sort_keys=False)
+
+    # Copy the values and app config files, replacing only the includes we
+    # need to replace.
+    source_values_filepath = re.search(
+        r"^values: !include (\S+)$", app_config_text, flags=re.MULTILINE
+    ).group(1)
+    with open(os.path.join(source_dir, source_values_filepath)) as file:
+        values_text = file.read()
+    values_text = re.sub(
+        r"^dvs: !include .*$",
+        f"dvs: !include {dvs_filepath}",
+        values_text,
+        flags=re.MULTILINE,
+    )
+    if dvs is not None:
+        ui_dvs_filepath = os.path.abspath(
+            os.path.join(output_dir, "ui-dvs.yml")
+        )
+        with open(ui_dvs_filepath, "w") as file:
+            yaml.safe_dump(
+                [dv for dv in config["values"]["ui"]["dvs"] if dv in dvs],
+                file,
+            )
+        values_text = re.sub(
+            r"^([ \t]+)dvs: !include .*$",
+            rf"\1dvs: !include {ui_dvs_filepath}",
+            values_text,
+            flags=re.MULTILINE,
+        )
+    values_filepath = os.path.abspath(os.path.join(output_dir, "values.yml"))
+    with open(values_filepath, "w") as file:
+        file.write(values_text)
+
+    app_config_text = re.sub(
+        r"^values: !include .*$",
+        f"values: !include {values_filepath}",
+        app_config_text,
+        flags=re.MULTILINE,
+    )
+    filepath = os.path.join(output_dir, "app-config.yml")
+    with open(filepath, "w") as file:
+        file.write(app_config_text)
+    logger.info(f"Wrote {filepath}")
+    return filepath
+
+
+def generate(
+    output_dir,
+    app_config_filepath="app-config.yml",
+    dvs=None,
+    refine=1,
+    seed=0,
+    n_stations=600,
+    n_locations=680,
+):
+    """
+    Generate synthetic data files and a matching app configuration.
+
+    :param output_dir: Directory to write to.
+    :param app_config_filepath: App configuration to imitate.
+    :param dvs: Design variables to generate data for. Default: all.
+    :param refine: Factor by which to refine the model grid.
+    :param seed: Random seed.
+    :param n_stations: Number of stations per station file.
+    :param n_locations: Number of locations per Table C2 file.
+    :return: Filepath of generated app configuration.
+    """
+    source_dir = os.path.dirname(os.path.abspath(app_config_filepath))
+    YamlIncludeConstructor.add_to_loader_class(
+        loader_class=SourceConfigLoader, base_dir=source_dir
+    )
+    config = dve.config.snapshot.load_config(
+        app_config_filepath, base_dir=source_dir, loader=SourceConfigLoader
+    )
+    index = compile_config(config)
+    future_dataset_ids = config["values"]["ui"]["future_change_factors"]
+    grid = model_grid(refine)
+    stations = {}
+    for dv_id in dvs or index.dvs:
+        generate_dv(
+            output_dir,
+            grid,
+            dv_id,
+            index.dvs[dv_id],
+            future_dataset_ids,
+            stations,
+            seed=seed,
+            n_stations=n_stations,
+            n_locations=n_locations,
+        )
+    for filepath, df in stations.items():
+        write(
+            output_filepath(output_dir, filepath),
+            lambda path: df.drop(columns=["ilat", "ilon"]).to_csv(
+                path, index=False
+            ),
+        )
+    return write_config(output_dir, config, app_config_filepath, dvs)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic data files and app configuration"
+    )
+    parser.add_argument("output_dir", help="Directory to write to")
+    parser.add_argument(
+        "-c",
+        "--config",
+        default="app-config.yml",
+        help="App configuration to imitate (default: app-config.yml)",
+    )
+    parser.add_argument(
+        "--dvs", nargs="+", default=None, help="Design variables (default: all)"
+    )
+    parser.add_argument(
+        "--refine",
+        type=int,
+        default=1,
+        help="Factor by which to refine the model grid (default: 1)",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument(
+        "--stations", type=int, default=600, help="Stations per station file"
+    )
+    parser.add_argument(
+        "--locations", type=int, default=680, help="Locations per Table C2"
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    filepath = generate(
+        args.output_dir,
+        app_config_filepath=args.config,
+        dvs=args.dvs,
+        refine=args.refine,
+        seed=args.seed,
+        n_stations=args.stations,
+        n_locations=args.locations,
+    )
+    print(filepath)
+
+
+if __name__ == "__main__":
+    main()
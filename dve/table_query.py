@@ -0,0 +1,263 @@
+"""
+Server-side querying (filtering, sorting, paging) of data frames displayed
+in Dash `DataTable`s with `filter_action`, `sort_action` and `page_action`
+set to `"custom"`.
+
+In custom mode, the table sends its filter expression (`filter_query`),
+sort specification (`sort_by`), and page (`page_current`, `page_size`) to a
+callback, which returns only the requested page of rows. This keeps the
+payload sent to the browser small, no matter how many rows the table has.
+
+Filter expressions are those produced by the `DataTable` filter row: terms
+of the form `{column} operator value`, joined by `&&`. Supported operators
+are the relational operators `=`, `!=`, `<`, `<=`, `>`, `>=` (or `eq`, `ne`,
+`lt`, `le`, `gt`, `ge`), `contains`, and `datestartswith`, optionally
+prefixed with `i` (case-insensitive) or `s` (case-sensitive), and the
+unary operators `is blank` and `is not blank`. Values may be quoted with
+`"`, `'` or `` ` ``. Terms that cannot be parsed, or that name unknown
+columns, are ignored, as the `DataTable` does for native filtering.
+"""
+import logging
+import math
+import re
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+
+logger = logging.getLogger(__name__)
+
+
+FilterTerm = namedtuple("FilterTerm", "column operator value case")
+
+relational_operators = {
+    "=": "eq",
+    "eq": "eq",
+    "!=": "ne",
+    "ne": "ne",
+    "<": "lt",
+    "lt": "lt",
+    "<=": "le",
+    "le": "le",
+    ">": "gt",
+    "gt": "gt",
+    ">=": "ge",
+    "ge": "ge",
+    "contains": "contains",
+    "datestartswith": "datestartswith",
+}
+
+unary_operators = {
+    "is blank": "blank",
+    "is not blank": "not blank",
+}
+
+# Quoted values, with backslash escapes (verbose regular expression).
+quoted_pattern = r"""
+    "(?:[^"\\]|\\.)*"
+    |'(?:[^'\\]|\\.)*'
+    |`(?:[^`\\]|\\.)*`
+"""
+
+term_pattern = re.compile(
+    r"""
+    ^\s*\{(?P<column>[^}]+)\}\s*
+    (?:
+        (?P<unary>is\s+not\s+blank|is\s+blank)
+        |
+        (?P<operator>[!<>=]=?|[is]?[a-z]+)\s*
+        (?P<value>
+    """
+    + quoted_pattern
+    + r"""
+            |\S.*?
+        )
+    )
+    \s*$
+    """,
+    re.VERBOSE,
+)
+
+# Tokens of a filter expression: quoted values, the `&&` joining terms, and
+# runs of other text. A quote that is not closed is a token by itself.
+token_pattern = re.compile(
+    quoted_pattern + r"""|&&|[^&"'`]+|.""", re.VERBOSE | re.DOTALL
+)
+
+
+def parse_value(text):
+    """
+    Return the value denoted by `text`: the unquoted string if quoted,
+    otherwise a number if possible, otherwise the text itself.
+    """
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "\"'`":
+        return re.sub(r"\\(.)", r"\1", text[1:-1])
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+def parse_term(text):
+    """
+    Parse a single filter term.
+
+    :param text: Term text, e.g., `{Latitude} >= 49`.
+    :return: `FilterTerm`, or None if the term cannot be parsed.
+    """
+    match = term_pattern.match(text)
+    if match is None:
+        return None
+    column = match.group("column")
+    if match.group("unary"):
+        operator = unary_operators[" ".join(match.group("unary").split())]
+        return FilterTerm(column, operator, None, None)
+    operator = match.group("operator")
+    case = None
+    if operator not in relational_operators and operator[:1] in "is":
+        case = "insensitive" if operator[0] == "i" else "sensitive"
+        operator = operator[1:]
+    try:
+        operator = relational_operators[operator]
+    except KeyError:
+        return None
+    return FilterTerm(column, operator, parse_value(match.group("value")), case)
+
+
+def split_terms(query):
+    """
+    Split a filter expression into the texts of its terms, at the `&&`s
+    that are not within quoted values.
+    """
+    texts = [""]
+    for match in token_pattern.finditer(query):
+        token = match.group()
+        if token == "&&":
+            texts.append("")
+        else:
+            texts[-1] += token
+    return texts
+
+
+def parse_filter_query(query):
+    """
+    Parse a `DataTable` filter expression.
+
+    :param query: Filter expression; may be empty or None.
+    :return: List of `FilterTerm`s. Unparseable terms are omitted.
+    """
+    terms = []
+    for text in split_terms(query or ""):
+        if not text.strip():
+            continue
+        term = parse_term(text)
+        if term is None:
+            logger.debug(f"Ignoring unparseable filter term: {text!r}")
+            continue
+        terms.append(term)
+    return terms
+
+
+def as_strings(series):
+    """Return a series' values as strings, with NaN as the empty string."""
+    return series.astype(str).where(series.notna(), "")
+
+
+def term_mask(data_frame, term):
+    """
+    Return a boolean mask selecting the rows of `data_frame` satisfying a
+    filter term, or None if the term does not apply to it.
+    """
+    if term.column not in data_frame.columns:
+        return None
+    series = data_frame[term.column]
+    if term.operator == "blank":
+        return series.isna() | (as_strings(series) == "")
+    if term.operator == "not blank":
+        return series.notna() & (as_strings(series) != "")
+
+    case = term.case != "insensitive"
+    value = term.value
+    if term.operator == "contains":
+        return as_strings(series).str.contains(
+            str(value) if not isinstance(value, float) else f"{value:g}",
+            case=case,
+            regex=False,
+        )
+    if term.operator == "datestartswith":
+        return as_strings(series).str.startswith(str(value))
+
+    numeric = pd.api.types.is_numeric_dtype(series)
+    if numeric != isinstance(value, float):
+        # Compare as strings (e.g., a number with a text column).
+        series = as_strings(series)
+        value = f"{value:g}" if isinstance(value, float) else value
+    if not case and isinstance(value, str):
+        series = series.str.lower()
+        value = value.lower()
+    return getattr(series, term.operator)(value)
+
+
+def filter_data_frame(data_frame, query):
+    """
+    Return the rows of `data_frame` satisfying a filter expression.
+    """
+    mask = np.ones(len(data_frame), dtype=bool)
+    for term in parse_filter_query(query):
+        term_result = term_mask(data_frame, term)
+        if term_result is not None:
+            mask &= term_result.to_numpy(dtype=bool)
+    if mask.all():
+        return data_frame
+    return data_frame[mask]
+
+
+def sort_data_frame(data_frame, sort_by):
+    """
+    Return `data_frame` sorted according to a `DataTable` sort
+    specification: a list of `{"column_id": ..., "direction": "asc" | "desc"}`.
+    Sorting is stable, and missing values sort last.
+    """
+    sort_by = [
+        s for s in (sort_by or []) if s.get("column_id") in data_frame.columns
+    ]
+    if not sort_by:
+        return data_frame
+    return data_frame.sort_values(
+        by=[s["column_id"] for s in sort_by],
+        ascending=[s.get("direction") != "desc" for s in sort_by],
+        kind="mergesort",
+        na_position="last",
+    )
+
+
+def page_count(num_rows, page_size):
+    """Return the number of pages for `num_rows` rows (at least 1)."""
+    return max(1, math.ceil(num_rows / page_size))
+
+
+def query_data_frame(
+    data_frame, filter_query=None, sort_by=None, page_current=0, page_size=50
+):
+    """
+    Filter, sort, and page a data frame as requested by a `DataTable`.
+
+    :param data_frame: Data frame to query. Not modified.
+    :param filter_query: Filter expression (see module docstring).
+    :param sort_by: Sort specification (see `sort_data_frame`).
+    :param page_current: Index of requested page. A page past the last page
+        is taken to be the last page.
+    :param page_size: Number of rows per page.
+    :return: tuple (records, page_current, page_count), where `records` is
+        the requested page of rows as a list of dicts, and `page_current` is
+        the index of the page returned.
+    """
+    result = sort_data_frame(
+        filter_data_frame(data_frame, filter_query), sort_by
+    )
+    num_pages = page_count(len(result), page_size)
+    page_current = min(max(page_current or 0, 0), num_pages - 1)
+    start = page_current * page_size
+    records = result.iloc[start : start + page_size].to_dict("records")
+    return records, page_current, num_pages
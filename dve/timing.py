@@ -11,10 +11,30 @@ with timing("description/label", log=logger.debug):
     # ... Code to be timed ...
 # Timing end message logged here
 ```
+
+Each timed block also records its elapsed time in the latency metrics (see
+module `dve.metrics`), labelled by `description` and any additional
+`labels`, whether or not timing messages are logged. To keep the number of
+distinct metrics small, callers whose description varies (e.g., includes a
+DV name) should pass a fixed `description` label:
+
+```
+with timing(
+    f"Table C2 for {dv}", log=logger.info,
+    labels={"description": "Table C2", "dv": dv},
+):
+    ...
+```
+
+Each timed block is also a span of the active trace, if any (see module
+`dve.tracing`), so nested timing blocks are recorded with their nesting.
 """
 from contextlib import contextmanager
 from time import perf_counter
 
+from dve.metrics import metrics, timing_metric
+from dve.tracing import current_trace_id, span
+
 
 @contextmanager
 def timing(
@@ -25,36 +45,52 @@ def timing(
     # Requirement: `multiplier` * `units` = `1 s`
     start_message="Timing [{description}]: start",
     end_message="Timing [{description}]: end; elapsed {elapsed} {units}",
+    labels=None,
 ):
-    if log is None:
+    with span(description, **(labels or {})):
+        if log is None:
+            start = perf_counter()
+            yield
+            observe(description, labels, perf_counter() - start)
+            return
+        start = perf_counter() * multiplier
+        if start_message is not None:
+            log(
+                start_message.format(
+                    description=description,
+                    start=start,
+                    units=units,
+                ),
+                extra={
+                    "item": "timing:start",
+                    "description": description,
+                    "trace_id": current_trace_id(),
+                },
+            )
         yield
-        return
-    start = perf_counter() * multiplier
-    if start_message is not None:
-        log(
-            start_message.format(
-                description=description,
-                start=start,
-                units=units,
-                extra={"item": "timing:start", "description": description},
+        end = perf_counter() * multiplier
+        elapsed = end - start
+        observe(description, labels, elapsed / multiplier)
+        if end_message is not None:
+            log(
+                end_message.format(
+                    description=description,
+                    start=start,
+                    end=end,
+                    elapsed=elapsed,
+                    units=units,
+                ),
+                extra={
+                    "item": "timing:end",
+                    "description": description,
+                    "elapsed": elapsed,
+                    "units": units,
+                    "trace_id": current_trace_id(),
+                },
             )
-        )
-    yield
-    end = perf_counter() * multiplier
-    elapsed = end - start
-    if end_message is not None:
-        log(
-            end_message.format(
-                description=description,
-                start=start,
-                end=end,
-                elapsed=elapsed,
-                units=units,
-            ),
-            extra={
-                "item": "timing:end",
-                "description": description,
-                "elapsed": elapsed,
-                "units": units,
-            },
-        )
+
+
+def observe(description, labels, elapsed):
+    metrics.observe(
+        timing_metric, elapsed, {"description": description, **(labels or {})}
+    )
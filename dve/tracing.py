@@ -0,0 +1,259 @@
+"""
+Hierarchical tracing of Dash callback requests.
+
+A trace records the nested spans of work done while handling a request,
+with their parent-child relationships. A trace has an id, which correlates
+it with the request: it is taken from the request header `X-Request-ID` if
+present, otherwise generated, and is returned in the response header
+`X-Request-ID`. While a trace is active, timing messages logged by
+`dve.timing.timing` carry the trace id (as `trace_id`).
+
+Every `dve.timing.timing` block is a span, so the existing timing blocks
+in the callbacks give a useful breakdown without further ado. Blocks that
+should be traced but not timed can use `span` directly:
+
+```
+with span("compute something", dv=design_variable):
+    ...
+```
+
+When no trace is active, spans cost almost nothing.
+
+Tracing is enabled by setting environment variable `DVE_TRACE_DIR` to a
+directory. Each traced request is then written to a file in that
+directory, in Chrome trace (Trace Event) format, which can be viewed in
+`chrome://tracing`, Perfetto (https://ui.perfetto.dev), or speedscope.
+Environment variable `DVE_TRACE_SAMPLE` (default 1) is the fraction of
+callback requests traced, and `DVE_TRACE_MAX_FILES` (default 1000) limits
+the number of trace files kept.
+"""
+import contextvars
+import itertools
+import json
+import logging
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from time import perf_counter
+
+import flask
+
+from dve.dash_requests import callback_label, update_component_path
+
+
+logger = logging.getLogger(__name__)
+
+request_id_header = "X-Request-ID"
+# Request ids accepted from clients. (Trace ids are used in filenames.)
+request_id_pattern = re.compile(r"^[\w.-]{1,64}$")
+
+current_trace = contextvars.ContextVar("current_trace", default=None)
+current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Trace:
+    """
+    A trace: a collection of spans, recorded as Chrome trace events.
+    """
+
+    def __init__(self, name, trace_id=None, **args):
+        """
+        :param name: Name of the trace (and of its root span).
+        :param trace_id: Trace (correlation) id. Generated if not given.
+        :param args: Additional information about the root span.
+        """
+        self.name = name
+        self.id = trace_id or uuid.uuid4().hex
+        self.args = args
+        self.events = []
+        self.span_ids = itertools.count(1)
+        self.root_span_id = next(self.span_ids)
+        # Span timestamps are taken with `perf_counter`, and converted to
+        # epoch time relative to the start of the trace.
+        self.start_time = time.time()
+        self.start = perf_counter()
+        self.end = None
+
+    def timestamp(self, t):
+        """Convert a `perf_counter` value to epoch microseconds."""
+        return (self.start_time + (t - self.start)) * 1e6
+
+    def add_span(self, name, span_id, parent_id, start, end, args):
+        self.events.append(
+            {
+                "name": name,
+                "cat": "dve",
+                "ph": "X",
+                "ts": self.timestamp(start),
+                "dur": (end - start) * 1e6,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": {
+                    "span_id": span_id,
+                    "parent_id": parent_id,
+                    **{key: str(value) for key, value in args.items()},
+                },
+            }
+        )
+
+    def finish(self):
+        self.end = perf_counter()
+        self.add_span(
+            self.name,
+            self.root_span_id,
+            None,
+            self.start,
+            self.end,
+            {"trace_id": self.id, **self.args},
+        )
+
+    def chrome_trace(self):
+        """Return the trace in Chrome trace (Trace Event) format."""
+        return {
+            "traceEvents": sorted(self.events, key=lambda e: e["ts"]),
+            "displayTimeUnit": "ms",
+            "otherData": {"trace_id": self.id, "name": self.name},
+        }
+
+
+def current_trace_id():
+    """Return the id of the active trace, or None."""
+    trace = current_trace.get()
+    return trace and trace.id
+
+
+@contextmanager
+def span(name, **args):
+    """
+    Context manager that records the enclosed block as a span of the active
+    trace, if any, as a child of the enclosing span.
+
+    :param name: Name of span.
+    :param args: Additional information about the span.
+    :yield: Span id, or None if no trace is active.
+    """
+    trace = current_trace.get()
+    if trace is None:
+        yield None
+        return
+    span_id = next(trace.span_ids)
+    parent_id = current_span.get()
+    token = current_span.set(span_id)
+    start = perf_counter()
+    try:
+        yield span_id
+    finally:
+        end = perf_counter()
+        current_span.reset(token)
+        trace.add_span(name, span_id, parent_id, start, end, args)
+
+
+def start_trace(name, trace_id=None, **args):
+    """
+    Start a trace in the current context. Return tokens to pass to
+    `end_trace`.
+    """
+    trace = Trace(name, trace_id, **args)
+    return (
+        current_trace.set(trace),
+        current_span.set(trace.root_span_id),
+    )
+
+
+def end_trace(tokens):
+    """End the trace started by `start_trace`, and return it."""
+    trace_token, span_token = tokens
+    trace = current_trace.get()
+    current_span.reset(span_token)
+    current_trace.reset(trace_token)
+    trace.finish()
+    return trace
+
+
+class TraceWriter:
+    """
+    Writes traces to files in a directory, keeping at most `max_files`.
+    """
+
+    # Check for excess files only every so many writes.
+    prune_every = 100
+
+    def __init__(self, directory, max_files=1000):
+        self.directory = directory
+        self.max_files = max_files
+        self._writes = itertools.count(1)
+
+    def write(self, trace):
+        os.makedirs(self.directory, exist_ok=True)
+        filename = (
+            f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime(trace.start_time))}"
+            f"-{trace.id}.json"
+        )
+        fd, temp_filepath = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as file:
+            json.dump(trace.chrome_trace(), file)
+        os.replace(temp_filepath, os.path.join(self.directory, filename))
+        if next(self._writes) % self.prune_every == 0:
+            self.prune()
+
+    def prune(self):
+        filenames = sorted(
+            filename
+            for filename in os.listdir(self.directory)
+            if filename.endswith(".json")
+        )
+        for filename in filenames[: -self.max_files]:
+            try:
+                os.unlink(os.path.join(self.directory, filename))
+            except FileNotFoundError:
+                pass
+
+
+def add(app, config):
+    """
+    Add tracing of Dash callback requests to the app, if enabled.
+    """
+    directory = os.environ.get("DVE_TRACE_DIR")
+    if not directory:
+        return
+    sample = float(os.environ.get("DVE_TRACE_SAMPLE", 1))
+    writer = TraceWriter(
+        directory, max_files=int(os.environ.get("DVE_TRACE_MAX_FILES", 1000))
+    )
+    callback_path = update_component_path(app)
+
+    @app.server.before_request
+    def start_request_trace():
+        if flask.request.path != callback_path or random.random() >= sample:
+            return
+        request_id = flask.request.headers.get(request_id_header, "")
+        flask.g.trace_tokens = start_trace(
+            callback_label(flask.request),
+            trace_id=(
+                request_id if request_id_pattern.match(request_id) else None
+            ),
+            path=flask.request.path,
+        )
+
+    @app.server.after_request
+    def add_request_id(response):
+        trace_id = current_trace_id()
+        if trace_id is not None:
+            response.headers[request_id_header] = trace_id
+        return response
+
+    @app.server.teardown_request
+    def end_request_trace(exception=None):
+        tokens = flask.g.pop("trace_tokens", None)
+        if tokens is None:
+            return
+        trace = end_trace(tokens)
+        try:
+            writer.write(trace)
+        except OSError as e:
+            logger.warning(f"Could not write trace {trace.id}: {e}")
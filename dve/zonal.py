@@ -0,0 +1,93 @@
+"""
+Zonal statistics: summaries of the values of a raster within each of a set
+of zones, defined by a label raster of the same shape.
+
+The statistics for all zones are computed together, in a few vectorized
+passes over the raster, rather than once per zone: counts and sums with
+`np.bincount`, and order statistics (min, max, percentiles) by a single sort
+of the values by zone and value, after which each zone's values occupy a
+contiguous, ordered run of the sorted array.
+
+This module depends only on numpy.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+
+# Statistics for each zone, as arrays indexed by zone label. `cells` is the
+# number of cells in the zone; `count` the number of them with a value (not
+# NaN). Statistics of zones with no values are NaN. `percentiles` has one
+# row per requested percentile.
+ZoneStats = namedtuple("ZoneStats", "cells count min max mean percentiles")
+
+
+def order_statistic(ordered, start, count, q):
+    """
+    Return the `q`th percentile of each zone, interpolated linearly between
+    values as by `np.percentile`.
+
+    :param ordered: Values sorted by zone, and by value within zone.
+    :param start: Index in `ordered` of the first value of each zone.
+    :param count: Number of values of each zone.
+    :param q: Percentile, in [0, 100].
+    :return: Array of percentiles, NaN for zones with no values.
+    """
+    result = np.full(count.shape, np.nan)
+    present = count > 0
+    position = (count[present] - 1) * (q / 100)
+    low = np.floor(position).astype(np.intp)
+    high = np.ceil(position).astype(np.intp)
+    low_values = ordered[start[present] + low]
+    high_values = ordered[start[present] + high]
+    result[present] = low_values + (high_values - low_values) * (
+        position - low
+    )
+    return result
+
+
+def zonal_stats(labels, values, zone_count, percentiles=()):
+    """
+    Compute statistics of the values of a raster within each zone.
+
+    :param labels: Integer array of zone labels, in `range(zone_count)`, or
+      negative for cells in no zone.
+    :param values: Float array of values, of the same shape as `labels`.
+      NaN values are ignored.
+    :param zone_count: Number of zones.
+    :param percentiles: Iterable of percentiles (in [0, 100]) to compute.
+    :return: ZoneStats.
+    """
+    labels = np.asarray(labels)
+    values = np.asarray(values, dtype=float)
+    if labels.shape != values.shape:
+        raise ValueError(
+            f"Labels and values differ in shape: "
+            f"{labels.shape} != {values.shape}"
+        )
+    labels = labels.ravel()
+    values = values.ravel()
+
+    in_zone = labels >= 0
+    cells = np.bincount(labels[in_zone], minlength=zone_count)
+    valid = in_zone & ~np.isnan(values)
+    zones = labels[valid]
+    values = values[valid]
+
+    count = np.bincount(zones, minlength=zone_count)
+    total = np.bincount(zones, weights=values, minlength=zone_count)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(count > 0, total / count, np.nan)
+
+    ordered = values[np.lexsort((values, zones))]
+    start = np.cumsum(count) - count
+    return ZoneStats(
+        cells=cells,
+        count=count,
+        min=order_statistic(ordered, start, count, 0),
+        max=order_statistic(ordered, start, count, 100),
+        mean=mean,
+        percentiles=np.array(
+            [order_statistic(ordered, start, count, q) for q in percentiles]
+        ).reshape(-1, zone_count),
+    )
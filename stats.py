@@ -1,6 +1,33 @@
+"""
+Print a summary of one or more profiles (combined).
+
+Profiles are captured by the app's request profiler (see `dve/profiling.py`)
+and can be downloaded from the admin route
+`admin/profiles/<id>?format=pstats`.
+
+Usage:
+
+```
+python stats.py [--sort KEY] [--top N] PROFILE [PROFILE ...]
+```
+"""
+import argparse
 import pstats
-from pstats import SortKey
 
-name = "profile-2"
-p = pstats.Stats(f'/codebase/{name}.pro')
-p.sort_stats(SortKey.TIME).print_stats()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("profiles", nargs="+", help="Profile file(s)")
+    parser.add_argument(
+        "--sort", default="time", help="pstats sort key (default: time)"
+    )
+    parser.add_argument(
+        "--top", type=int, default=None, help="Number of functions to print"
+    )
+    args = parser.parse_args()
+    p = pstats.Stats(*args.profiles)
+    p.sort_stats(args.sort).print_stats(*([args.top] if args.top else []))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+"""
+Fixtures shared by unit tests that need an app configuration with data
+files (see `dve.synthetic_data`).
+"""
+import pytest
+
+import dve.config.snapshot
+import dve.synthetic_data
+from dve.config.index import compile_config
+
+
+@pytest.fixture(scope="session")
+def app_config_filepath(tmp_path_factory):
+    """Filepath of an app configuration for a small synthetic data set."""
+    return dve.synthetic_data.generate(
+        str(tmp_path_factory.mktemp("synthetic-data")), dvs=["RL50"]
+    )
+
+
+@pytest.fixture(scope="session")
+def config(app_config_filepath):
+    config = dve.config.snapshot.load_config(app_config_filepath)
+    config["index"] = compile_config(config)
+    return config
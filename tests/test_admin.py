@@ -0,0 +1,53 @@
+import flask
+import pytest
+
+import dve.admin
+
+
+class App:
+    """Minimal stand-in for a Dash app."""
+
+    class config:
+        routes_pathname_prefix = "/base/"
+
+    def __init__(self):
+        self.server = flask.Flask(__name__)
+
+
+def make_client(monkeypatch, token):
+    if token is None:
+        monkeypatch.delenv("DVE_ADMIN_TOKEN", raising=False)
+    else:
+        monkeypatch.setenv("DVE_ADMIN_TOKEN", token)
+    app = App()
+
+    @dve.admin.route(app, "ping", methods=["POST"])
+    def ping():
+        return "pong"
+
+    return app.server.test_client()
+
+
+@pytest.mark.parametrize("token", [None, ""])
+def test_disabled(monkeypatch, token):
+    client = make_client(monkeypatch, token)
+    response = client.post(
+        "/base/admin/ping", headers={"Authorization": "Bearer "}
+    )
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize(
+    "headers, status",
+    [
+        ({}, 403),
+        ({"Authorization": "Bearer wrong"}, 403),
+        ({"Authorization": "Basic sekret"}, 403),
+        ({"Authorization": "Bearer sekret"}, 200),
+        ({"Authorization": "bearer sekret"}, 200),
+    ],
+)
+def test_enabled(monkeypatch, headers, status):
+    client = make_client(monkeypatch, "sekret")
+    response = client.post("/base/admin/ping", headers=headers)
+    assert response.status_code == status
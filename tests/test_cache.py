@@ -0,0 +1,91 @@
+import pytest
+
+from dve.data import ThreadSafeCache
+
+
+@pytest.fixture
+def evicted():
+    return []
+
+
+@pytest.fixture
+def cache(evicted):
+    return ThreadSafeCache(
+        "Test",
+        on_miss=lambda key: f"item {key}",
+        on_evict=lambda key, item: evicted.append((key, item)),
+        maxsize=1,
+    )
+
+
+def test_counters(cache, evicted):
+    assert cache.fetch("a") == "item a"
+    assert cache.fetch("a") == "item a"
+    for item in cache.get("b"):
+        assert item == "item b"
+    assert cache.invalidate("b")
+    assert not cache.invalidate("b")
+    assert cache.fetch("c") == "item c"
+    for item in cache.get("c"):
+        assert item == "item c"
+    assert cache.fetch("d", locked_miss=False) == "item d"
+
+    stats = cache.stats()
+    assert stats["name"] == "Test"
+    assert stats["maxsize"] == 1
+    assert stats["size"] == 1
+    assert stats["hits"] == 2
+    assert stats["misses"] == 4
+    assert stats["hit_ratio"] == pytest.approx(2 / 6)
+    assert stats["evictions"] == 2
+    assert stats["invalidations"] == 1
+    assert stats["on_miss_seconds"] >= 0
+    assert "bytes" not in stats and "open_files" not in stats
+
+
+def test_on_evict(cache, evicted):
+    """`on_evict` receives the evicted key and item, not the requested."""
+    cache.fetch("a")
+    assert evicted == []
+    cache.fetch("b")
+    assert evicted == [("a", "item a")]
+    cache.fetch("c", locked_miss=False)
+    assert evicted == [("a", "item a"), ("b", "item b")]
+    cache.invalidate("c")
+    assert evicted[-1] == ("c", "item c")
+    cache.fetch("d")
+    assert cache.clear() == 1
+    assert evicted[-1] == ("d", "item d")
+
+
+def test_empty_stats(cache):
+    stats = cache.stats()
+    assert stats["size"] == stats["hits"] == stats["misses"] == 0
+    assert stats["hit_ratio"] is None
+    assert stats["on_miss_mean_seconds"] is None
+    assert stats["item_age_seconds"] == {
+        "min": None,
+        "median": None,
+        "max": None,
+    }
+
+
+def test_bytes_and_open_files():
+    cache = ThreadSafeCache(
+        "Test",
+        on_miss=lambda key: key * 10,
+        maxsize=3,
+        sizeof=len,
+        is_open=lambda item: item.startswith("open"),
+    )
+    cache.fetch("open")
+    cache.fetch("shut")
+    cache.fetch("x")
+    stats = cache.stats()
+    assert stats["bytes"] == 90
+    assert stats["open_files"] == 1
+
+    cache.invalidate("open")
+    stats = cache.stats()
+    assert stats["bytes"] == 50
+    assert stats["open_files"] == 0
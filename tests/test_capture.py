@@ -0,0 +1,45 @@
+import json
+
+import dash
+from dash import html
+from dash.dependencies import Input, Output
+
+import dve.capture
+
+
+def make_client(monkeypatch, filepath):
+    monkeypatch.setenv("DVE_CAPTURE_FILE", str(filepath))
+    app = dash.Dash(__name__)
+    app.layout = html.Div([html.Div(id="a"), html.Div(id="b")])
+
+    @app.callback(Output("b", "children"), Input("a", "children"))
+    def update(a):
+        return a
+
+    dve.capture.add(app, {})
+    return app.server.test_client()
+
+
+def test_capture(monkeypatch, tmp_path):
+    filepath = tmp_path / "capture.jsonl"
+    client = make_client(monkeypatch, filepath)
+    body = {
+        "output": "b.children",
+        "outputs": {"id": "b", "property": "children"},
+        "inputs": [{"id": "a", "property": "children", "value": "x"}],
+        "changedPropIds": ["a.children"],
+    }
+    client.post("/_dash-update-component", json=body)
+    client.post("/_dash-update-component", json=body)
+    client.get("/_dash-layout")
+    records = [json.loads(line) for line in filepath.read_text().splitlines()]
+    assert len(records) == 2
+    assert records[0]["body"] == body
+    assert records[0]["time"] <= records[1]["time"]
+
+
+def test_capture_disabled(monkeypatch, tmp_path):
+    monkeypatch.delenv("DVE_CAPTURE_FILE", raising=False)
+    app = dash.Dash(__name__)
+    dve.capture.add(app, {})
+    assert not app.server.before_request_funcs
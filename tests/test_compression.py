@@ -0,0 +1,115 @@
+import gzip
+
+import brotli
+import flask
+import pytest
+import yaml
+
+import dve.compression
+
+
+content = b"".join(b"%d: design values\n" % i for i in range(2000))
+
+
+class App:
+    """Minimal stand-in for a Dash app."""
+
+    def __init__(self):
+        self.server = flask.Flask(__name__)
+
+
+@pytest.fixture
+def client(tmp_path):
+    with open("config/values/compression.yml") as file:
+        compression_config = yaml.safe_load(file)
+    (tmp_path / "data.txt").write_bytes(content)
+    app = App()
+
+    @app.server.route("/text")
+    def text():
+        return flask.Response(content, mimetype="text/plain")
+
+    @app.server.route("/file")
+    def file():
+        return flask.send_from_directory(tmp_path, "data.txt")
+
+    @app.server.route("/tagged")
+    def tagged():
+        response = flask.Response(content, mimetype="text/plain")
+        response.set_etag("v1")
+        return response.make_conditional(flask.request)
+
+    @app.server.route("/stream")
+    def stream():
+        return flask.Response(
+            (content[i : i + 1000] for i in range(0, len(content), 1000)),
+            mimetype="text/plain",
+        )
+
+    dve.compression.add(app, {"values": {"compression": compression_config}})
+    dve.compression.cache.clear()
+    return app.server.test_client()
+
+
+decoders = {None: bytes, "gzip": gzip.decompress, "br": brotli.decompress}
+
+
+@pytest.mark.parametrize("path", ["/text", "/file", "/tagged", "/stream"])
+@pytest.mark.parametrize(
+    "accept, encoding", [("", None), ("gzip", "gzip"), ("gzip, br", "br")]
+)
+def test_compression(client, path, accept, encoding):
+    response = client.get(path, headers={"Accept-Encoding": accept})
+    assert response.status_code == 200
+    assert response.headers.get("Content-Encoding") == encoding
+    assert "Accept-Encoding" in response.vary
+    assert decoders[encoding](response.data) == content
+
+
+@pytest.mark.parametrize("accept", ["", "gzip", "gzip, br"])
+def test_range(client, accept):
+    """Partial content is sent uncompressed."""
+    response = client.get(
+        "/file",
+        headers={"Accept-Encoding": accept, "Range": "bytes=10-5009"},
+    )
+    assert response.status_code == 206
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["Content-Range"] == (
+        f"bytes 10-5009/{len(content)}"
+    )
+    assert response.data == content[10:5010]
+
+
+@pytest.mark.parametrize("accept, encoding", [("", None), ("gzip", "gzip")])
+def test_conditional(client, accept, encoding):
+    """
+    Requests conditional on an entity tag are evaluated against the tag of
+    the representation sent.
+    """
+    headers = {"Accept-Encoding": accept}
+    response = client.get("/tagged", headers=headers)
+    etag = response.headers["ETag"]
+    assert response.headers.get("Content-Encoding") == encoding
+    assert etag == ('"v1"' if encoding is None else f'"v1-{encoding}"')
+
+    response = client.get(
+        "/tagged", headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.data == b""
+
+
+def test_conditional_other_encoding(client):
+    """The tag of a compressed representation does not match another."""
+    response = client.get("/tagged", headers={"Accept-Encoding": "br"})
+    etag = response.headers["ETag"]
+    for accept, encoding in (("", None), ("gzip", "gzip")):
+        response = client.get(
+            "/tagged",
+            headers={"Accept-Encoding": accept, "If-None-Match": etag},
+        )
+        assert response.status_code == 200
+        assert response.headers.get("Content-Encoding") == encoding
+        assert decoders[encoding](response.data) == content
+
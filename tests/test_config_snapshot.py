@@ -0,0 +1,110 @@
+import os
+
+import pytest
+import yaml
+from yamlinclude import YamlIncludeConstructor
+
+from dve.config.snapshot import load_config, source_files, source_hash
+
+
+@pytest.fixture
+def config_dir(tmp_path, monkeypatch):
+    (tmp_path / "values").mkdir()
+    (tmp_path / "main.yml").write_text(
+        "text: !include values/text.yml\nvalues: !include values/values.yml\n"
+    )
+    (tmp_path / "values" / "text.yml").write_text("title: Test\n")
+    (tmp_path / "values" / "values.yml").write_text(
+        "dvs: [HDD, RL50]\nroundto: 0.1\n"
+    )
+    # Include relative to the test directory, for this test only. The
+    # loader's constructors are restored afterwards, since the app registers
+    # its own on the same loader class.
+    monkeypatch.setattr(
+        yaml.FullLoader,
+        "yaml_constructors",
+        dict(yaml.FullLoader.yaml_constructors),
+    )
+    YamlIncludeConstructor.add_to_loader_class(
+        loader_class=yaml.FullLoader, base_dir=str(tmp_path)
+    )
+    return tmp_path
+
+
+expected = {
+    "text": {"title": "Test"},
+    "values": {"dvs": ["HDD", "RL50"], "roundto": 0.1},
+}
+
+
+def test_source_files(config_dir):
+    assert set(
+        source_files(str(config_dir / "main.yml"), base_dir=str(config_dir))
+    ) == {
+        str(config_dir / "main.yml"),
+        str(config_dir / "values" / "text.yml"),
+        str(config_dir / "values" / "values.yml"),
+    }
+
+
+def test_source_hash(config_dir):
+    filepaths = source_files(
+        str(config_dir / "main.yml"), base_dir=str(config_dir)
+    )
+    before = source_hash(filepaths)
+    assert source_hash(filepaths) == before
+    (config_dir / "values" / "text.yml").write_text("title: Changed\n")
+    assert source_hash(filepaths) != before
+
+
+def test_load_config(config_dir, tmp_path_factory):
+    snapshot_dir = str(tmp_path_factory.mktemp("snapshots"))
+    cwd = os.getcwd()
+    os.chdir(config_dir)
+    try:
+        assert load_config("main.yml", snapshot_dir=snapshot_dir) == expected
+        assert len(os.listdir(snapshot_dir)) == 1
+        # Loaded from snapshot
+        assert load_config("main.yml", snapshot_dir=snapshot_dir) == expected
+        assert len(os.listdir(snapshot_dir)) == 1
+        # Source changed: new snapshot
+        (config_dir / "values" / "text.yml").write_text("title: Changed\n")
+        config = load_config("main.yml", snapshot_dir=snapshot_dir)
+        assert config["text"] == {"title": "Changed"}
+        assert len(os.listdir(snapshot_dir)) == 2
+        # Snapshots disabled
+        assert load_config("main.yml", snapshot_dir="") == config
+    finally:
+        os.chdir(cwd)
+
+
+def test_load_config_base_dir(config_dir, tmp_path_factory):
+    # Includes resolved relative to a directory other than the current one,
+    # by a loader of their own.
+    class Loader(yaml.FullLoader):
+        pass
+
+    YamlIncludeConstructor.add_to_loader_class(
+        loader_class=Loader, base_dir=str(config_dir)
+    )
+    snapshot_dir = str(tmp_path_factory.mktemp("snapshots"))
+    filepath = str(config_dir / "main.yml")
+    for _ in range(2):
+        assert (
+            load_config(
+                filepath,
+                snapshot_dir=snapshot_dir,
+                base_dir=str(config_dir),
+                loader=Loader,
+            )
+            == expected
+        )
+    # Source changed: new snapshot
+    (config_dir / "values" / "text.yml").write_text("title: Changed\n")
+    config = load_config(
+        filepath,
+        snapshot_dir=snapshot_dir,
+        base_dir=str(config_dir),
+        loader=Loader,
+    )
+    assert config["text"] == {"title": "Changed"}
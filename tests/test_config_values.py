@@ -0,0 +1,131 @@
+import pytest
+from dve.config.index import compile_config
+from dve.config.values import (
+    config_generation,
+    filepath_for,
+    dv_has_climate_regime,
+    dv_tier,
+    dv_units,
+    dv_roundto,
+    dv_colour_map,
+    dv_colour_scale_default,
+    dv_colour_scale_disable_logarithmic,
+    dv_colour_bar_sigfigs,
+    dv_historical_stations_column,
+)
+
+config = {
+    "values": {
+        "dvs": {
+            "HDD": {
+                "tier": 1,
+                "historical": {
+                    "datasets": {
+                        "model": "data/model.nc",
+                        "reconstruction": "data/recon.nc",
+                        "stations": {
+                            "column": "HDD (degC-day)",
+                            "path": "data/stations.csv",
+                        },
+                        "table_C2": "data/table.csv",
+                    },
+                    "units": "degC-day",
+                    "roundto": 10,
+                    "colour_map": "RdBu",
+                    "scale": {"default": "linear"},
+                    "colorbar": {"sigfigs": 3},
+                },
+                "future": {
+                    "datasets": {"0.5": "data/cf_0.5.nc"},
+                    "units": "ratio",
+                    "roundto": 0.001,
+                    "colour_map": "jet",
+                    "scale": {
+                        "default": "linear",
+                        "disable_logarithmic": True,
+                    },
+                },
+            },
+            "MI": {
+                "tier": 3,
+                "historical": {
+                    "datasets": {"reconstruction": "data/mi_recon.nc"},
+                    "units": "",
+                    "roundto": 0.001,
+                },
+            },
+        },
+        "units": {"degC-day": {"nice": "°C-day"}},
+    }
+}
+
+
+@pytest.mark.parametrize(
+    "args, expected",
+    [
+        (("HDD", "historical", "model", None), "data/model.nc"),
+        (("HDD", "historical", "reconstruction", "0.5"), "data/recon.nc"),
+        (("HDD", "historical", "stations", None), "data/stations.csv"),
+        (("HDD", "historical", "table", None), "data/table.csv"),
+        (("HDD", "future", "reconstruction", "0.5"), "data/cf_0.5.nc"),
+        (("HDD", "future", "reconstruction", "1.0"), None),
+        (("MI", "historical", "stations", None), None),
+        (("MI", "future", None, "0.5"), None),
+    ],
+)
+def test_filepath_for(args, expected):
+    assert filepath_for(config, *args) == expected
+
+
+@pytest.mark.parametrize(
+    "design_variable, climate_regime, expected",
+    [
+        ("HDD", "historical", True),
+        ("HDD", "future", True),
+        ("MI", "historical", True),
+        ("MI", "future", False),
+    ],
+)
+def test_dv_has_climate_regime(design_variable, climate_regime, expected):
+    assert (
+        dv_has_climate_regime(config, design_variable, climate_regime)
+        == expected
+    )
+
+
+def test_dv_values():
+    assert dv_tier(config, "MI") == 3
+    assert dv_units(config, "HDD", "historical") == "°C-day"
+    assert dv_units(config, "HDD", "historical", nice=False) == "degC-day"
+    assert dv_units(config, "HDD", "future") == "ratio"
+    assert dv_roundto(config, "HDD", "future") == 0.001
+    assert not dv_colour_scale_disable_logarithmic(config, "HDD", "historical")
+    assert dv_colour_scale_disable_logarithmic(config, "HDD", "future")
+    assert dv_colour_bar_sigfigs(config, "HDD", "historical") == 3
+    assert dv_historical_stations_column(config, "HDD") == "HDD (degC-day)"
+    with pytest.raises(KeyError):
+        dv_units(config, "MI", "future")
+
+
+@pytest.mark.parametrize(
+    "accessor, args",
+    [
+        (dv_colour_bar_sigfigs, ("HDD", "future")),
+        (dv_colour_bar_sigfigs, ("MI", "historical")),
+        (dv_colour_map, ("MI", "historical")),
+        (dv_colour_scale_default, ("MI", "historical")),
+        (dv_historical_stations_column, ("MI",)),
+        (dv_roundto, ("HDD", "other")),
+        (dv_tier, ("other",)),
+    ],
+)
+def test_dv_values_missing(accessor, args):
+    # As lookups in the configuration itself.
+    with pytest.raises(KeyError):
+        accessor(config, *args)
+
+
+def test_config_generation():
+    recompiled = {**config, "index": compile_config(config)}
+    assert config_generation(recompiled) != config_generation(config)
+    assert config_generation(config) == config_generation(config)
@@ -0,0 +1,231 @@
+import io
+import os
+import tempfile
+
+import netCDF4
+import numpy as np
+import pandas as pd
+import pytest
+import xarray
+
+from dve.app import make_app
+from dve.config.values import resolved_filepath_for
+from dve.data import lonlat_window
+from dve.export import ExportError, parse_bbox
+from dve.synthetic_data import model_grid, raster_dataset
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        (None, None),
+        ("-130,48,-120,55", (-130, 48, -120, 55)),
+        ("-123.5,49,-123.5,49", (-123.5, 49, -123.5, 49)),
+    ],
+)
+def test_parse_bbox(text, expected):
+    assert parse_bbox(text) == expected
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "",
+        "-130,48,-120",
+        "-130,48,-120,55,1",
+        "a,48,-120,55",
+        "-120,48,-130,55",
+        "-130,55,-120,48",
+    ],
+)
+def test_parse_bbox_invalid(text):
+    with pytest.raises(ExportError):
+        parse_bbox(text)
+
+
+@pytest.fixture(scope="module")
+def grid_dataset():
+    grid = model_grid()
+    return raster_dataset(grid, "X", np.ones(grid.sftlf.shape), "1")
+
+
+@pytest.mark.parametrize("bbox", [(-130, 48, -120, 55), (-80, 43, -79, 44)])
+@pytest.mark.parametrize("block_rows", [1, 7, 64, 1000])
+def test_lonlat_window(grid_dataset, bbox, block_rows):
+    lon_min, lat_min, lon_max, lat_max = bbox
+    lon = grid_dataset.lon.values - 360
+    lat = grid_dataset.lat.values
+    inside = (
+        (lon >= lon_min)
+        & (lon <= lon_max)
+        & (lat >= lat_min)
+        & (lat <= lat_max)
+    )
+    rows = np.flatnonzero(inside.any(axis=1))
+    cols = np.flatnonzero(inside.any(axis=0))
+    assert rows.size
+
+    window = lonlat_window(None, grid_dataset, *bbox, block_rows=block_rows)
+    assert all(type(s.start) is int for s in window)
+    assert window == (
+        slice(rows[0], rows[-1] + 1),
+        slice(cols[0], cols[-1] + 1),
+    )
+
+
+def test_lonlat_window_empty(grid_dataset):
+    assert lonlat_window(None, grid_dataset, 10, 10, 20, 20) is None
+
+
+@pytest.fixture(scope="module")
+def client(app_config_filepath):
+    app = make_app(app_config_filepath=app_config_filepath)
+    return app.server.test_client(), app.config.routes_pathname_prefix
+
+
+@pytest.fixture(scope="module")
+def source(config):
+    """Source raster of the exports tested, and its values."""
+    with xarray.open_dataset(
+        resolved_filepath_for(
+            config, "RL50", "historical", historical_dataset_id="model"
+        )
+    ) as ds:
+        ds.load()
+    return ds, ds.RL50.squeeze(drop=True).values
+
+
+def export_url(prefix, fmt, bbox=None):
+    url = f"{prefix}export/RL50/historical/model?format={fmt}"
+    if bbox is not None:
+        url += f"&bbox={bbox}"
+    return url
+
+
+def get(client, url):
+    test_client, _ = client
+    response = test_client.get(url)
+    data = response.data
+    response.close()
+    return response, data
+
+
+def source_window(source, bbox):
+    ds, values = source
+    if bbox is None:
+        return slice(None), slice(None)
+    return lonlat_window(
+        None, ds, *(float(value) for value in bbox.split(","))
+    )
+
+
+bboxes = [None, "-130,48,-120,55"]
+
+
+@pytest.mark.parametrize("bbox", bboxes)
+def test_export_csv(client, source, bbox):
+    response, data = get(client, export_url(client[1], "csv", bbox))
+    assert response.status_code == 200
+    assert response.mimetype == "text/csv"
+    df = pd.read_csv(io.BytesIO(data))
+    assert list(df.columns) == ["lon", "lat", "rlon", "rlat", "RL50 (kPa)"]
+
+    ds, values = source
+    rows, cols = source_window(source, bbox)
+    values = values[rows, cols]
+    valid = ~np.isnan(values)
+    assert len(df) == valid.sum()
+    np.testing.assert_allclose(
+        df["RL50 (kPa)"], values[valid], rtol=1e-6
+    )
+    ilat, ilon = np.nonzero(valid)
+    np.testing.assert_allclose(
+        df["rlat"], ds.rlat.values[rows][ilat], atol=1e-5
+    )
+    np.testing.assert_allclose(
+        df["rlon"], ds.rlon.values[cols][ilon], atol=1e-5
+    )
+    np.testing.assert_allclose(
+        df["lat"], ds.lat.values[rows, cols][valid], atol=1e-5
+    )
+    np.testing.assert_allclose(
+        df["lon"], ds.lon.values[rows, cols][valid] - 360, atol=1e-5
+    )
+
+
+@pytest.mark.parametrize("bbox", bboxes)
+def test_export_npz(client, source, bbox):
+    response, data = get(client, export_url(client[1], "npz", bbox))
+    assert response.status_code == 200
+    ds, values = source
+    rows, cols = source_window(source, bbox)
+    with np.load(io.BytesIO(data)) as npz:
+        assert sorted(npz.files) == ["lat", "lon", "rlat", "rlon", "values"]
+        np.testing.assert_array_equal(npz["rlat"], ds.rlat.values[rows])
+        np.testing.assert_array_equal(npz["rlon"], ds.rlon.values[cols])
+        np.testing.assert_array_equal(npz["lat"], ds.lat.values[rows, cols])
+        np.testing.assert_array_equal(
+            npz["lon"], ds.lon.values[rows, cols] - 360
+        )
+        np.testing.assert_array_equal(npz["values"], values[rows, cols])
+
+
+@pytest.mark.parametrize("bbox", bboxes)
+def test_export_nc(client, source, bbox):
+    response, data = get(client, export_url(client[1], "nc", bbox))
+    assert response.status_code == 200
+    ds, values = source
+    rows, cols = source_window(source, bbox)
+    with netCDF4.Dataset("export.nc", memory=data) as nc:
+        np.testing.assert_array_equal(nc["rlat"][:], ds.rlat.values[rows])
+        np.testing.assert_array_equal(nc["rlon"][:], ds.rlon.values[cols])
+        np.testing.assert_array_equal(
+            nc["lat"][:], ds.lat.values[rows, cols]
+        )
+        np.testing.assert_array_equal(
+            nc["lon"][:], ds.lon.values[rows, cols] - 360
+        )
+        exported = nc["RL50"][:].filled(np.nan)
+        np.testing.assert_array_equal(exported, values[rows, cols])
+        assert nc["RL50"].units == ds.RL50.units
+
+
+@pytest.mark.parametrize("method", ["get", "head"])
+def test_export_nc_temporary_file(client, monkeypatch, tmp_path, method):
+    """The temporary NetCDF file is deleted, whether or not it is sent."""
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    test_client, prefix = client
+    response = getattr(test_client, method)(export_url(prefix, "nc"))
+    assert response.status_code == 200
+    response.close()
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.parametrize(
+    "query, status",
+    [
+        ("format=xls", 400),
+        ("bbox=1,2,3", 400),
+        ("bbox=10,10,20,20", 400),
+    ],
+)
+def test_export_invalid(client, query, status):
+    test_client, prefix = client
+    response = test_client.get(
+        f"{prefix}export/RL50/historical/model?{query}"
+    )
+    assert response.status_code == status
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "XYZ/historical/model",
+        "RL50/historical/XYZ",
+        "RL50/historical/stations",
+        "RL50/XYZ/model",
+    ],
+)
+def test_export_not_found(client, path):
+    test_client, prefix = client
+    assert test_client.get(f"{prefix}export/{path}").status_code == 404
@@ -0,0 +1,53 @@
+import os
+
+import dve.file_status
+from dve.file_status import FileStatus, FileStatusRegistry, stat_file
+
+
+def test_stat_file(tmp_path, monkeypatch):
+    filepath = tmp_path / "data.csv"
+    filepath.write_text("a,b\n")
+    mtime = filepath.stat().st_mtime
+    calls = []
+    real_stat = os.stat
+
+    def counted_stat(*args, **kwargs):
+        calls.append(args)
+        return real_stat(*args, **kwargs)
+
+    monkeypatch.setattr(dve.file_status.os, "stat", counted_stat)
+
+    assert stat_file(str(filepath)) == FileStatus(True, mtime, 4)
+    # The file is stat-ed once.
+    assert len(calls) == 1
+    monkeypatch.undo()
+    # A directory exists, but is not a file.
+    assert not stat_file(str(tmp_path)).exists
+    assert stat_file(str(tmp_path / "missing")) == FileStatus(
+        False, None, None
+    )
+
+
+def test_file_status_registry(tmp_path):
+    filepath = str(tmp_path / "data.csv")
+    registry = FileStatusRegistry(poll_interval=0)
+    changes = []
+    registry.add_listener(lambda fp, old, new: changes.append((fp, old, new)))
+
+    assert not registry.exists(filepath)
+    assert registry.refresh() == []
+
+    with open(filepath, "w") as file:
+        file.write("a,b\n")
+    # Status is answered from memory until refreshed
+    assert not registry.exists(filepath)
+    assert registry.refresh() == [filepath]
+    assert registry.exists(filepath)
+    assert len(changes) == 1
+
+    mtime = registry.mtime(filepath)
+    os.utime(filepath, (mtime + 10, mtime + 10))
+    assert registry.refresh() == [filepath]
+    assert registry.mtime(filepath) == mtime + 10
+    assert changes[-1][1].mtime == mtime
+    assert changes[-1][2].mtime == mtime + 10
@@ -0,0 +1,50 @@
+import math
+
+import numpy as np
+import pytest
+
+from dve.math_utils import (
+    round_to_multiple,
+    round_to_multiple_array,
+    rotated_pole_to_lonlat,
+)
+
+
+values = [0.0, 0.04, 0.05, 0.15, 0.25, 0.7000001, 1.234, -1.25, 12.5, 1e-3]
+
+
+@pytest.mark.parametrize("multiple", [0.1, 0.05, 0.01, 0.5, 1, 5])
+@pytest.mark.parametrize("direction", ["down", "nearest", "up"])
+def test_round_to_multiple_array(multiple, direction):
+    result = round_to_multiple_array(values, multiple, direction)
+    expected = [round_to_multiple(v, multiple, direction) for v in values]
+    assert result.tolist() == expected
+
+
+def test_round_to_multiple_array_nan():
+    result = round_to_multiple_array([math.nan, 1.26], 0.1)
+    assert np.isnan(result[0])
+    assert result[1] == 1.3
+
+
+@pytest.mark.parametrize(
+    "rlon, rlat, expected",
+    [
+        # The centre of the rotated grid is on the meridian opposite the
+        # pole, at 90 degrees of latitude from it.
+        (0, 0, (-97, 47.5)),
+        # The rotated north pole is the pole.
+        (0, 90, (83, 42.5)),
+        (0, -90, (-97, -42.5)),
+    ],
+)
+def test_rotated_pole_to_lonlat(rlon, rlat, expected):
+    lon, lat = rotated_pole_to_lonlat(rlon, rlat, 83, 42.5)
+    assert (lon, lat) == pytest.approx(expected)
+
+
+def test_rotated_pole_to_lonlat_unrotated():
+    rlon, rlat = np.meshgrid([-170, -30, 0, 45, 120], [-60, 0, 10, 75])
+    lon, lat = rotated_pole_to_lonlat(rlon, rlat, 180, 90)
+    assert lon == pytest.approx(rlon)
+    assert lat == pytest.approx(rlat)
@@ -0,0 +1,56 @@
+import math
+
+import pytest
+
+from dve.metrics import Histogram, Metrics, buckets
+
+
+def test_histogram():
+    histogram = Histogram()
+    assert math.isnan(histogram.quantile(0.5))
+    for value in (0.001, 0.002, 0.02, 0.02, 1000):
+        histogram.observe(value)
+    assert histogram.count == 5
+    assert histogram.sum == pytest.approx(1000.043)
+    # Bucket bounds are inclusive
+    assert histogram.counts[0] == 1
+    assert histogram.counts[1] == 1
+    assert histogram.counts[-1] == 1
+    assert histogram.quantile(0.5) == pytest.approx(0.01 + 0.015 * 0.25)
+    assert histogram.quantile(0.99) == buckets[-1]
+
+
+def test_prometheus_text():
+    metrics = Metrics()
+    metrics.observe("t", 0.003, {"description": "Update map", "dv": "HDD"})
+    metrics.observe("t", 0.004, {"dv": "HDD", "description": "Update map"})
+    metrics.observe("t", 0.2, {"description": 'Say "hi"'})
+    lines = metrics.prometheus_text().splitlines()
+    assert lines[0] == "# TYPE t histogram"
+    assert 't_bucket{description="Update map",dv="HDD",le="0.0025"} 0' in lines
+    assert 't_bucket{description="Update map",dv="HDD",le="0.005"} 2' in lines
+    assert 't_bucket{description="Update map",dv="HDD",le="+Inf"} 2' in lines
+    assert 't_count{description="Update map",dv="HDD"} 2' in lines
+    assert 't_count{description="Say \\"hi\\""} 1' in lines
+    assert "# TYPE t_quantile gauge" in lines
+    assert (
+        't_quantile{description="Update map",dv="HDD",quantile="0.5"} 0.00375'
+        in lines
+    )
+
+
+def test_aggregation(tmp_path):
+    worker_1 = Metrics(directory=str(tmp_path), flush_interval=0)
+    worker_2 = Metrics(directory=str(tmp_path), flush_interval=0)
+    worker_1.observe("t", 0.003, {"description": "a"})
+    worker_2.observe("t", 0.003, {"description": "a"})
+    worker_2.observe("t", 0.3, {"description": "b"})
+    # Unflushed metrics of other workers are not seen
+    assert len(worker_1.collect()) == 1
+    worker_2.flush()
+    collected = worker_1.collect()
+    assert collected[("t", (("description", "a"),))].count == 2
+    assert collected[("t", (("description", "b"),))].count == 1
+    # Own file is not double counted
+    worker_1.flush()
+    assert worker_1.collect()[("t", (("description", "a"),))].count == 2
@@ -0,0 +1,123 @@
+import gzip
+
+import dash._callback
+import flask
+import pytest
+
+import dve.payloads
+from dve.tracing import end_trace, start_trace
+
+
+class App:
+    """Minimal stand-in for a Dash app."""
+
+    class config:
+        routes_pathname_prefix = "/base/"
+
+    def __init__(self):
+        self.server = flask.Flask(__name__)
+
+
+callback_path = "/base/_dash-update-component"
+
+
+def make_client(monkeypatch, encode=None, streamed=False):
+    """
+    Return a test client of an app instrumented by `dve.payloads.add`, and
+    the list of request info it records.
+
+    :param encode: When to gzip responses: "after" the payload hook (as
+      `dve.compression` does), "before" it, or None for not at all.
+    :param streamed: Whether the callback response is streamed.
+    """
+    records = []
+    monkeypatch.setattr(dve.payloads, "record", records.append)
+    app = App()
+
+    @app.server.route(callback_path, methods=["POST"])
+    def update():
+        # Serialized as Dash does, with the instrumented serializer.
+        body = dash._callback.to_json({"response": "x" * 1000})
+        if streamed:
+            return flask.Response(iter([body]), mimetype="application/json")
+        return flask.Response(body, mimetype="application/json")
+
+    @app.server.route("/base/other")
+    def other():
+        return "other"
+
+    @app.server.before_request
+    def begin_trace():
+        flask.g.trace_tokens = start_trace("callback", trace_id="t1")
+
+    @app.server.teardown_request
+    def finish_trace(exc):
+        end_trace(flask.g.trace_tokens)
+
+    def gzip_response(response):
+        response.set_data(gzip.compress(response.get_data()))
+        response.headers["Content-Encoding"] = "gzip"
+        return response
+
+    # After-request functions run in the reverse order of registration.
+    if encode == "after":
+        app.server.after_request(gzip_response)
+    dve.payloads.add(app, {})
+    if encode == "before":
+        app.server.after_request(gzip_response)
+
+    return app.server.test_client(), records
+
+
+def post(client):
+    response = client.post(callback_path, json={"output": "a.children"})
+    data = response.data
+    response.close()
+    return response, data
+
+
+def test_payloads(monkeypatch):
+    client, records = make_client(monkeypatch)
+    response, data = post(client)
+    (info,) = records
+    assert info["callback"] == "a.children"
+    assert info["trace_id"] == "t1"
+    assert info["status"] == 200
+    assert info["encoding"] == "identity"
+    assert info["response_bytes"] == info["sent_bytes"] == len(data)
+    assert 0 < info["serialization_seconds"] <= info["request_seconds"]
+
+
+def test_payloads_compressed(monkeypatch):
+    """Response bytes are counted before compression, sent bytes after."""
+    client, records = make_client(monkeypatch, encode="after")
+    response, data = post(client)
+    (info,) = records
+    assert info["encoding"] == "gzip"
+    assert info["sent_bytes"] == len(data)
+    assert info["sent_bytes"] < info["response_bytes"]
+    assert info["response_bytes"] == len(gzip.decompress(data))
+
+
+@pytest.mark.parametrize(
+    "encode, streamed", [("before", False), (None, True)]
+)
+def test_payloads_response_bytes_unknown(monkeypatch, encode, streamed):
+    """
+    Response bytes are not recorded for a response already encoded, or
+    streamed, when the payload hook sees it.
+    """
+    client, records = make_client(
+        monkeypatch, encode=encode, streamed=streamed
+    )
+    response, data = post(client)
+    (info,) = records
+    assert info["response_bytes"] is None
+    assert info["sent_bytes"] == len(data) > 0
+    assert info["callback"] == "a.children"
+
+
+def test_other_paths_not_instrumented(monkeypatch):
+    client, records = make_client(monkeypatch)
+    client.get("/base/other").close()
+    assert records == []
@@ -0,0 +1,42 @@
+import cProfile
+
+from dve.profiling import (
+    Profiler,
+    list_profiles,
+    profile_filepath,
+    save_profile,
+    summary,
+)
+import dve.profiling
+
+
+def test_profiler_claim():
+    profiler = Profiler()
+    assert profiler.claim() is None
+    profiler.arm(2, threshold=100)
+    assert profiler.claim() == 1
+    assert profiler.claim() == 2
+    assert profiler.claim() is None
+    assert profiler.state()["requests"] == 0
+
+
+def test_save_and_summarize(tmp_path, monkeypatch):
+    monkeypatch.setenv("DVE_PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(dve.profiling, "max_files", 2)
+    for i, label in enumerate(("a.children", "b.figure", "b.figure")):
+        profile = cProfile.Profile()
+        profile.enable()
+        sorted(range(1000))
+        profile.disable()
+        save_profile(
+            profile, {"id": f"p{i}", "label": label, "elapsed_ms": 10.0}
+        )
+    # Oldest profile has been deleted
+    assert [p["id"] for p in list_profiles()] == ["p1", "p2"]
+    assert profile_filepath("p0") is None
+    assert profile_filepath("../p1") is None
+    result = summary(top=3)
+    assert list(result) == ["b.figure"]
+    assert result["b.figure"]["profiles"] == 2
+    assert result["b.figure"]["elapsed_ms"] == 20.0
+    assert len(result["b.figure"]["top"]) <= 3
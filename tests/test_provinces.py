@@ -0,0 +1,182 @@
+import numpy as np
+import pytest
+
+from dve.app import make_app
+from dve.callbacks.province_stats import province_stats_table
+from dve.data import get_data_object, polygon_region
+from dve.provinces import (
+    configured_percentiles,
+    label_cache,
+    label_raster,
+    load_provinces,
+    province_labels,
+    province_stats,
+    provinces_filepath,
+)
+from dve.synthetic_data import model_grid, raster_dataset
+
+
+@pytest.fixture(scope="module")
+def grid_dataset():
+    grid = model_grid()
+    return raster_dataset(grid, "X", np.ones(grid.sftlf.shape), "1")
+
+
+@pytest.fixture(scope="module")
+def provinces(config):
+    return load_provinces(provinces_filepath(config))
+
+
+def test_load_provinces(provinces):
+    assert len(provinces.codes) == 13
+    assert "BC" in provinces.codes
+    assert len(provinces.names["en"]) == len(provinces.names["fr"]) == 13
+    assert provinces.names["fr"][provinces.codes.index("BC")] == (
+        "Colombie-Britannique"
+    )
+
+
+@pytest.mark.parametrize("code", ["BC", "NU", "PE"])
+def test_label_raster(grid_dataset, provinces, code):
+    labels = label_raster(None, grid_dataset, provinces.geometries)
+    assert labels.shape == grid_dataset.lat.shape
+    assert not labels.flags.writeable
+
+    label = provinces.codes.index(code)
+    region = polygon_region(None, grid_dataset, provinces.geometries[label])
+    expected = np.zeros(labels.shape, dtype=bool)
+    expected[region.rows, region.cols] = region.mask
+    assert expected.any()
+    np.testing.assert_array_equal(labels == label, expected)
+
+
+def test_province_labels_cached_by_grid(config, grid_dataset):
+    path = provinces_filepath(config)
+    label_cache.clear()
+    labels = province_labels(None, grid_dataset, path)
+    assert province_labels(None, grid_dataset, path) is labels
+
+    # Same grid, different data: same labels.
+    other = grid_dataset.assign(X=grid_dataset.X * 2)
+    assert province_labels(None, other, path) is labels
+
+    # Different grid: different labels.
+    subgrid = grid_dataset.isel(rlat=slice(10, None))
+    sublabels = province_labels(None, subgrid, path)
+    assert sublabels is not labels
+    np.testing.assert_array_equal(sublabels, labels[10:])
+
+    stats = label_cache.stats()
+    assert stats["misses"] == 2
+    assert stats["hits"] == 2
+
+
+@pytest.fixture(scope="module")
+def dataset(config):
+    return get_data_object(
+        config, "RL50", "historical", historical_dataset_id="reconstruction"
+    )
+
+
+def test_province_stats_table(config, provinces, dataset):
+    stats = province_stats(config, dataset, configured_percentiles(config))
+    table = province_stats_table(config, "en", "historical", "RL50", stats)
+    caption, thead, tbody = table.children
+    assert [th.children for th in thead.children.children] == [
+        "Province/Territory",
+        "Min",
+        "P10",
+        "P50",
+        "P90",
+        "Mean",
+        "Max",
+    ]
+    assert len(tbody.children) == len(provinces.codes)
+    _, zone_stats = stats
+    for i, (row, name) in enumerate(
+        zip(tbody.children, provinces.names["en"])
+    ):
+        heading, *cells = row.children
+        assert heading.children == name
+        assert len(cells) == 6
+        if zone_stats.count[i]:
+            assert cells[0].children == pytest.approx(
+                zone_stats.min[i], abs=0.1
+            )
+        else:
+            assert all(cell.children == "n/a" for cell in cells)
+
+
+@pytest.fixture(scope="module")
+def client(app_config_filepath):
+    app = make_app(app_config_filepath=app_config_filepath)
+    return app.server.test_client(), app.config.routes_pathname_prefix
+
+
+def provinces_url(prefix, query=""):
+    return f"{prefix}provinces/RL50/historical/reconstruction?{query}"
+
+
+def test_provinces_route(client, config, provinces, dataset):
+    test_client, prefix = client
+    response = test_client.get(provinces_url(prefix))
+    assert response.status_code == 200
+    result = response.get_json()
+
+    percentiles = list(configured_percentiles(config))
+    _, stats = province_stats(config, dataset, percentiles)
+    assert result["units"] == "kPa"
+    assert result["percentiles"] == percentiles
+    assert [p["code"] for p in result["provinces"]] == list(provinces.codes)
+    assert [p["name"] for p in result["provinces"]] == list(
+        provinces.names["en"]
+    )
+    for i, province in enumerate(result["provinces"]):
+        assert set(province) == {
+            "code",
+            "name",
+            "cells",
+            "count",
+            "min",
+            "max",
+            "mean",
+            "percentiles",
+        }
+        assert province["cells"] == stats.cells[i]
+        assert province["count"] == stats.count[i]
+        assert len(province["percentiles"]) == len(percentiles)
+        if province["count"]:
+            assert province["min"] == pytest.approx(stats.min[i])
+            assert province["mean"] == pytest.approx(stats.mean[i])
+        else:
+            assert province["min"] is province["mean"] is None
+
+
+def test_provinces_route_options(client, provinces):
+    test_client, prefix = client
+    response = test_client.get(
+        provinces_url(prefix, "lang=fr&percentiles=5,95")
+    )
+    assert response.status_code == 200
+    result = response.get_json()
+    assert result["percentiles"] == [5, 95]
+    assert [p["name"] for p in result["provinces"]] == list(
+        provinces.names["fr"]
+    )
+    assert all(len(p["percentiles"]) == 2 for p in result["provinces"])
+
+
+@pytest.mark.parametrize(
+    "query", ["lang=de", "percentiles=a,b", "percentiles=50,101"]
+)
+def test_provinces_route_invalid(client, query):
+    test_client, prefix = client
+    response = test_client.get(provinces_url(prefix, query))
+    assert response.status_code == 400
+    assert response.mimetype == "text/plain"
+
+
+def test_provinces_route_not_found(client):
+    test_client, prefix = client
+    response = test_client.get(f"{prefix}provinces/RL50/historical/XYZ")
+    assert response.status_code == 404
@@ -0,0 +1,56 @@
+import datetime
+import decimal
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import pytest
+from dash import html
+from plotly.io.json import to_json_plotly
+
+from dve.serialization import to_json
+
+
+def figure():
+    z = np.array([[1.5, np.nan], [np.inf, -np.inf]])
+    return go.Figure(
+        data=[
+            go.Heatmap(z=z, x=np.arange(2), y=np.array([0.5, 1.5], "f4")),
+            go.Scattergl(x=z[:, 0], y=z[0, :], marker={"color": z[1]}),
+        ],
+        layout=go.Layout(title="Map", meta={"colour_scale": {"zmin": 1}}),
+    )
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        figure(),
+        figure().data[0],
+        {"figure": figure(), "stations": figure().data[1]},
+        [np.arange(12.0).reshape(3, 4)[:, ::2]],
+        np.arange(4, dtype="i1"),
+        np.float32(1.5),
+        np.ma.masked_array([1.0, 2.0, 3.0], mask=[False, True, False]),
+        np.array(["a", "b"]),
+        np.array(["2021-01-01", "2021-06-01"], dtype="datetime64[ns]"),
+        np.datetime64("2021-01-01"),
+        pd.Series([1.0, np.nan, 3.0]),
+        pd.Series(["a", None]),
+        pd.Series(pd.to_datetime(["2021-01-01", "2021-06-01"])),
+        pd.DatetimeIndex(["2021-01-01", "2021-06-01"]),
+        pd.NaT,
+        html.Div([html.P("Text"), html.Table(html.Tr(html.Td(1.5)))]),
+        {1: "a", 2: ("b", None)},
+        datetime.datetime(2021, 1, 1, 12),
+        datetime.date(2021, 1, 1),
+        decimal.Decimal("1.5"),
+    ],
+)
+def test_to_json(value):
+    assert to_json(value) == to_json_plotly(value, engine="orjson")
+
+
+def test_to_json_unserializable():
+    with pytest.raises(TypeError):
+        to_json(object())
@@ -0,0 +1,268 @@
+import numpy as np
+import pytest
+import shapely.geometry
+
+import dve.data
+from dve.app import make_app
+from dve.data import (
+    DvXrDataset,
+    get_data_object,
+    lonlat_bbox_region,
+    polygon_region,
+    region_cache,
+    region_key,
+    rlonlat_bbox_region,
+)
+from dve.synthetic_data import model_grid, raster_dataset
+
+
+@pytest.fixture(scope="module")
+def grid_dataset():
+    grid = model_grid()
+    return raster_dataset(grid, "X", np.ones(grid.sftlf.shape), "1")
+
+
+def window_mask(region, shape):
+    """Return the mask of a region on the full grid."""
+    mask = np.zeros(shape, dtype=bool)
+    mask[region.rows, region.cols] = region.mask
+    return mask
+
+
+bbox = (-130, 48, -120, 55)
+triangle = {
+    "type": "Polygon",
+    "coordinates": [[[-130, 48], [-120, 48], [-125, 55], [-130, 48]]],
+}
+
+
+def test_lonlat_bbox_region(grid_dataset):
+    lon_min, lat_min, lon_max, lat_max = bbox
+    lon = grid_dataset.lon.values - 360
+    lat = grid_dataset.lat.values
+    expected = (
+        (lon >= lon_min)
+        & (lon <= lon_max)
+        & (lat >= lat_min)
+        & (lat <= lat_max)
+    )
+    region = lonlat_bbox_region(None, grid_dataset, *bbox)
+    assert region.mask.any()
+    np.testing.assert_array_equal(
+        window_mask(region, lon.shape), expected
+    )
+
+
+def test_rlonlat_bbox_region(grid_dataset):
+    rlon = grid_dataset.rlon.values
+    rlat = grid_dataset.rlat.values
+    rbbox = (rlon[10], rlat[20], rlon[30], rlat[25])
+    region = rlonlat_bbox_region(None, grid_dataset, *rbbox)
+    assert region.rows == slice(20, 26)
+    assert region.cols == slice(10, 31)
+    assert region.mask.shape == (6, 21) and region.mask.all()
+
+
+@pytest.mark.parametrize(
+    "geometry",
+    [
+        triangle,
+        {"type": "MultiPolygon", "coordinates": [triangle["coordinates"]]},
+    ],
+)
+def test_polygon_region(grid_dataset, geometry):
+    lon = grid_dataset.lon.values - 360
+    lat = grid_dataset.lat.values
+    polygon = shapely.geometry.shape(geometry)
+    expected = np.vectorize(
+        lambda x, y: polygon.contains(shapely.geometry.Point(x, y))
+    )(lon, lat)
+    region = polygon_region(None, grid_dataset, geometry)
+    assert region.mask.any()
+    np.testing.assert_array_equal(
+        window_mask(region, lon.shape), expected
+    )
+
+
+@pytest.mark.parametrize(
+    "region_fn, spec",
+    [
+        (lonlat_bbox_region, (10, 10, 20, 20)),
+        (rlonlat_bbox_region, (100, 100, 110, 110)),
+        (polygon_region, {"type": "Polygon", "coordinates": []}),
+    ],
+)
+def test_region_empty(grid_dataset, region_fn, spec):
+    args = (spec,) if region_fn is polygon_region else spec
+    assert not region_fn(None, grid_dataset, *args).mask.size
+
+
+def test_region_key(grid_dataset):
+    reordered = {"coordinates": triangle["coordinates"], "type": "Polygon"}
+    assert region_key(grid_dataset, "polygon", triangle) == region_key(
+        grid_dataset, "polygon", reordered
+    )
+    keys = {
+        region_key(grid_dataset, "polygon", triangle),
+        region_key(grid_dataset, "bbox", bbox),
+        region_key(grid_dataset, "rbbox", bbox),
+        region_key(grid_dataset, "bbox", list(bbox)),
+        region_key(grid_dataset.isel(rlat=slice(1, None)), "bbox", bbox),
+    }
+    assert len(keys) == 4
+
+
+@pytest.fixture
+def dataset(config):
+    region_cache.clear()
+    return get_data_object(
+        config, "RL50", "historical", historical_dataset_id="model"
+    )
+
+
+def test_region_cached(dataset):
+    region = dataset.region(geometry=triangle)
+    assert dataset.region(geometry=triangle) is region
+    assert dataset.region(bbox=bbox) is not region
+    assert dataset.region(bbox=bbox) is dataset.region(bbox=bbox)
+
+
+def test_polygon_rasterized_without_locks(dataset, monkeypatch):
+    """
+    A polygon is rasterized without holding the dataset or region cache
+    locks.
+    """
+    contains = shapely.vectorized.contains
+    held = []
+
+    def checked_contains(*args):
+        held.append(
+            DvXrDataset._cache._lock._is_owned()
+            or region_cache._lock._is_owned()
+        )
+        return contains(*args)
+
+    monkeypatch.setattr(
+        dve.data.shapely.vectorized, "contains", checked_contains
+    )
+    dataset.region(geometry=triangle)
+    assert held == [False]
+
+
+@pytest.fixture(scope="module")
+def client(app_config_filepath):
+    app = make_app(app_config_filepath=app_config_filepath)
+    return app.server.test_client(), app.config.routes_pathname_prefix
+
+
+@pytest.fixture(scope="module")
+def source(config):
+    """Source raster of the subsets tested, and its values."""
+    dataset = get_data_object(
+        config, "RL50", "historical", historical_dataset_id="model"
+    )
+    ds = dataset.apply(lambda dvds, ds: ds.load())
+    return ds, ds.RL50.squeeze(drop=True).values
+
+
+def subset_url(prefix, query=""):
+    return f"{prefix}subset/RL50/historical/model?{query}"
+
+
+@pytest.mark.parametrize(
+    "method, query, body, region_fn, spec",
+    [
+        ("get", "bbox=-130,48,-120,55", None, lonlat_bbox_region, bbox),
+        (
+            "get",
+            "rbbox=-20,-10,-10,0",
+            None,
+            rlonlat_bbox_region,
+            (-20, -10, -10, 0),
+        ),
+        ("post", "", triangle, polygon_region, triangle),
+        (
+            "post",
+            "",
+            {"type": "Feature", "properties": {}, "geometry": triangle},
+            polygon_region,
+            triangle,
+        ),
+    ],
+)
+def test_subset(client, source, method, query, body, region_fn, spec):
+    test_client, prefix = client
+    response = getattr(test_client, method)(
+        subset_url(prefix, query), json=body
+    )
+    assert response.status_code == 200
+    result = response.get_json()
+
+    ds, values = source
+    args = (spec,) if region_fn is polygon_region else spec
+    region = region_fn(None, ds, *args)
+    values = values[region.rows, region.cols][region.mask]
+    valid = values[~np.isnan(values)]
+    assert result["units"] == "kPa"
+    assert result["cells"] == values.size > 0
+    assert result["count"] == valid.size > 0
+    assert result["summary"]["min"] == pytest.approx(valid.min())
+    assert result["summary"]["max"] == pytest.approx(valid.max())
+    assert result["summary"]["mean"] == pytest.approx(valid.mean())
+    np.testing.assert_allclose(result["values"]["value"], valid, rtol=1e-6)
+    assert set(result["values"]) == {"lon", "lat", "rlon", "rlat", "value"}
+    assert all(
+        len(column) == valid.size for column in result["values"].values()
+    )
+
+
+def test_subset_summary_only(client):
+    test_client, prefix = client
+    response = test_client.get(
+        subset_url(prefix, "bbox=-130,48,-120,55&values=false")
+    )
+    assert response.status_code == 200
+    assert "values" not in response.get_json()
+
+
+def test_subset_no_cells(client):
+    test_client, prefix = client
+    response = test_client.get(subset_url(prefix, "bbox=10,10,20,20"))
+    assert response.status_code == 200
+    result = response.get_json()
+    assert result["cells"] == result["count"] == 0
+    assert result["summary"] is None
+
+
+@pytest.mark.parametrize(
+    "query, body",
+    [
+        ("", None),
+        ("bbox=-130,48,-120,55&rbbox=-20,-10,-10,0", None),
+        ("bbox=1,2,3", None),
+        ("", {"type": "Point", "coordinates": [-125, 50]}),
+        ("", {"type": "Polygon"}),
+        ("", {"type": "Polygon", "coordinates": [[1, 2]]}),
+        ("", {"type": "Polygon", "coordinates": "x"}),
+        ("", {"type": "Polygon", "coordinates": [[[0, 0], [1, 0]]]}),
+        ("", {"type": "Feature", "geometry": None}),
+        ("", [1, 2]),
+    ],
+)
+def test_subset_invalid(client, query, body):
+    test_client, prefix = client
+    url = subset_url(prefix, query)
+    if body is None:
+        response = test_client.get(url)
+    else:
+        response = test_client.post(url, json=body)
+    assert response.status_code == 400
+    assert response.mimetype == "text/plain"
+
+
+def test_subset_not_found(client):
+    test_client, prefix = client
+    response = test_client.get(
+        f"{prefix}subset/RL50/historical/XYZ?bbox=-130,48,-120,55"
+    )
+    assert response.status_code == 404
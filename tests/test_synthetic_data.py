@@ -0,0 +1,83 @@
+import os
+
+import numpy as np
+import pytest
+
+from dve.config.index import compile_dv, resolve_filepath
+from dve.synthetic_data import (
+    model_grid,
+    raster_dataset,
+    relocate_filepaths,
+    table_c2_data_frame,
+)
+
+
+@pytest.fixture(scope="module")
+def grid():
+    return model_grid()
+
+
+@pytest.mark.parametrize("refine", [1, 2])
+def test_model_grid(refine):
+    grid = model_grid(refine)
+    assert grid.rlat.size == 129 * refine + 1
+    assert grid.rlon.size == 154 * refine + 1
+    assert grid.lon.shape == grid.lat.shape == grid.sftlf.shape
+    assert "rotated_pole" in grid
+
+
+@pytest.mark.parametrize("time", [False, True])
+def test_raster_dataset(grid, time):
+    values = np.ones(grid.sftlf.shape)
+    dataset = raster_dataset(grid, "HDD", values, "degC-day", time=time)
+    assert ("time" in dataset.HDD.dims) == time
+    data = dataset.HDD.squeeze().values
+    assert np.array_equal(np.isnan(data), grid.sftlf.values == 0)
+    assert dataset.HDD.attrs["grid_mapping"] == "rotated_pole"
+
+
+@pytest.mark.parametrize(
+    "future_units, suffix", [("ratio", " "), ("degC", " (degC)")]
+)
+def test_table_c2_data_frame(grid, future_units, suffix):
+    dv_record = compile_dv(
+        "X",
+        {
+            "historical": {"units": "kPa", "roundto": 0.1},
+            "future": {"units": future_units, "roundto": 0.01},
+        },
+    )
+    df = table_c2_data_frame(
+        np.random.default_rng(0),
+        grid,
+        np.zeros(grid.sftlf.shape),
+        "X",
+        dv_record,
+        ["1.0", "2.0"],
+        10,
+    )
+    assert list(df.columns) == [
+        "Location",
+        "prov",
+        "Longitude",
+        "Latitude",
+        "X (NBCC)",
+        "X (kPa)",
+        f"CF_1.0C{suffix}",
+        f"CF_2.0C{suffix}",
+    ]
+    assert len(df) == 10
+
+
+def test_relocate_filepaths(tmp_path):
+    relocated = relocate_filepaths(
+        {"X": {"historical": {"units": "kPa", "model": "data/x.nc"}}},
+        str(tmp_path),
+    )
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "x.nc").touch()
+    assert relocated["X"]["historical"]["units"] == "kPa"
+    assert os.path.samefile(
+        resolve_filepath(relocated["X"]["historical"]["model"]),
+        tmp_path / "data" / "x.nc",
+    )
@@ -0,0 +1,133 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dve.table_query import (
+    FilterTerm,
+    filter_data_frame,
+    parse_filter_query,
+    query_data_frame,
+    sort_data_frame,
+)
+
+
+@pytest.fixture
+def data_frame():
+    return pd.DataFrame(
+        {
+            "Location": ["Vancouver", "Victoria", "Toronto", None, "Ottawa"],
+            "prov": ["BC", "BC", "ON", "QC", "ON"],
+            "Latitude": [49.25, 48.43, 43.65, np.nan, 45.42],
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        (None, []),
+        ("", []),
+        ("{prov} = BC", [FilterTerm("prov", "eq", "BC", None)]),
+        ('{prov} eq "BC"', [FilterTerm("prov", "eq", "BC", None)]),
+        (
+            "{Latitude} >= 45 && {prov} ne 'ON'",
+            [
+                FilterTerm("Latitude", "ge", 45.0, None),
+                FilterTerm("prov", "ne", "ON", None),
+            ],
+        ),
+        (
+            "{Location} icontains van",
+            [FilterTerm("Location", "contains", "van", "insensitive")],
+        ),
+        (
+            r'{Location} contains "a \"b\""',
+            [FilterTerm("Location", "contains", 'a "b"', None)],
+        ),
+        (
+            '{Location} contains "A && B" && {prov} = BC',
+            [
+                FilterTerm("Location", "contains", "A && B", None),
+                FilterTerm("prov", "eq", "BC", None),
+            ],
+        ),
+        (
+            r"{Location} = 'it\'s && more' && {prov}=`&&`",
+            [
+                FilterTerm("Location", "eq", "it's && more", None),
+                FilterTerm("prov", "eq", "&&", None),
+            ],
+        ),
+        ("{Location} is blank", [FilterTerm("Location", "blank", None, None)]),
+        ("{Location} frobnicates x", []),
+        ("nonsense && {prov} = ON", [FilterTerm("prov", "eq", "ON", None)]),
+    ],
+)
+def test_parse_filter_query(query, expected):
+    assert parse_filter_query(query) == expected
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("", [0, 1, 2, 3, 4]),
+        ("{prov} = BC", [0, 1]),
+        ("{prov} = bc", []),
+        ("{prov} ieq bc", [0, 1]),
+        ("{Latitude} > 45", [0, 1, 4]),
+        ("{Latitude} < 45 && {prov} = ON", [2]),
+        ("{Location} contains T", [2]),
+        ("{Location} icontains T", [1, 2, 4]),
+        ("{Latitude} contains 49", [0]),
+        ("{Location} is blank", [3]),
+        ("{Location} is not blank", [0, 1, 2, 4]),
+        ("{Unknown} = 1", [0, 1, 2, 3, 4]),
+    ],
+)
+def test_filter_data_frame(data_frame, query, expected):
+    assert filter_data_frame(data_frame, query).index.tolist() == expected
+
+
+@pytest.mark.parametrize(
+    "sort_by, expected",
+    [
+        ([], [0, 1, 2, 3, 4]),
+        ([{"column_id": "Latitude", "direction": "asc"}], [2, 4, 1, 0, 3]),
+        ([{"column_id": "Latitude", "direction": "desc"}], [0, 1, 4, 2, 3]),
+        (
+            [
+                {"column_id": "prov", "direction": "desc"},
+                {"column_id": "Latitude", "direction": "asc"},
+            ],
+            [3, 2, 4, 1, 0],
+        ),
+    ],
+)
+def test_sort_data_frame(data_frame, sort_by, expected):
+    assert sort_data_frame(data_frame, sort_by).index.tolist() == expected
+
+
+@pytest.mark.parametrize(
+    "page_current, page_size, expected_page, expected_locations",
+    [
+        (0, 2, 0, ["Ottawa", "Toronto"]),
+        (1, 2, 1, ["Vancouver", "Victoria"]),
+        (9, 2, 1, ["Vancouver", "Victoria"]),
+        (0, 10, 0, ["Ottawa", "Toronto", "Vancouver", "Victoria"]),
+    ],
+)
+def test_query_data_frame(
+    data_frame, page_current, page_size, expected_page, expected_locations
+):
+    records, page, page_count = query_data_frame(
+        data_frame,
+        filter_query="{Location} is not blank",
+        sort_by=[{"column_id": "Location", "direction": "asc"}],
+        page_current=page_current,
+        page_size=page_size,
+    )
+    assert page == expected_page
+    assert page_count == math.ceil(4 / page_size)
+    assert [r["Location"] for r in records] == expected_locations
@@ -0,0 +1,61 @@
+import json
+
+from dve.timing import timing
+from dve.tracing import (
+    TraceWriter,
+    current_trace_id,
+    end_trace,
+    span,
+    start_trace,
+)
+
+
+def test_no_trace():
+    assert current_trace_id() is None
+    with span("outside") as span_id:
+        assert span_id is None
+
+
+def test_nested_spans():
+    tokens = start_trace("callback", trace_id="abc", path="/x")
+    assert current_trace_id() == "abc"
+    with timing("outer", labels={"dv": "HDD"}):
+        with span("inner", n=1):
+            pass
+        with timing("inner timed"):
+            pass
+    trace = end_trace(tokens)
+    assert current_trace_id() is None
+
+    events = {
+        event["name"]: event for event in trace.chrome_trace()["traceEvents"]
+    }
+    assert set(events) == {"callback", "outer", "inner", "inner timed"}
+    assert all(event["ph"] == "X" for event in events.values())
+    root = events["callback"]["args"]
+    assert root["parent_id"] is None
+    assert root["trace_id"] == "abc"
+    outer = events["outer"]["args"]
+    assert outer["parent_id"] == root["span_id"]
+    assert outer["dv"] == "HDD"
+    assert events["inner"]["args"]["parent_id"] == outer["span_id"]
+    assert events["inner timed"]["args"]["parent_id"] == outer["span_id"]
+    assert events["inner"]["args"]["n"] == "1"
+    # Children lie within their parents
+    assert events["outer"]["ts"] >= events["callback"]["ts"]
+    assert (
+        events["inner"]["ts"] + events["inner"]["dur"]
+        <= events["outer"]["ts"] + events["outer"]["dur"]
+    )
+
+
+def test_trace_writer(tmp_path):
+    writer = TraceWriter(str(tmp_path), max_files=2)
+    writer.prune_every = 3
+    for i in range(3):
+        trace = end_trace(start_trace("callback", trace_id=f"t{i}"))
+        writer.write(trace)
+    filenames = sorted(p.name for p in tmp_path.iterdir())
+    assert [name.split("-")[-1] for name in filenames] == ["t1.json", "t2.json"]
+    with open(tmp_path / filenames[-1]) as file:
+        assert json.load(file)["otherData"]["trace_id"] == "t2"
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from dve.zonal import zonal_stats
+
+
+@pytest.fixture
+def raster():
+    rng = np.random.default_rng(42)
+    labels = rng.integers(-1, 4, size=(30, 40))
+    values = rng.normal(100, 20, size=labels.shape)
+    values[rng.random(labels.shape) < 0.2] = np.nan
+    # Zone 3 has cells, but no values; zone 4 has no cells.
+    values[labels == 3] = np.nan
+    return labels, values
+
+
+@pytest.mark.parametrize("percentiles", [(), (50,), (0, 5, 33.3, 95, 100)])
+def test_zonal_stats(raster, percentiles):
+    labels, values = raster
+    stats = zonal_stats(labels, values, 5, percentiles)
+    assert stats.percentiles.shape == (len(percentiles), 5)
+    for zone in range(5):
+        in_zone = values[labels == zone]
+        zone_values = in_zone[~np.isnan(in_zone)]
+        assert stats.cells[zone] == in_zone.size
+        assert stats.count[zone] == zone_values.size
+        if zone_values.size:
+            assert stats.min[zone] == zone_values.min()
+            assert stats.max[zone] == zone_values.max()
+            assert stats.mean[zone] == pytest.approx(zone_values.mean())
+            assert stats.percentiles[:, zone] == pytest.approx(
+                np.percentile(zone_values, percentiles)
+            )
+        else:
+            assert np.isnan(stats.min[zone])
+            assert np.isnan(stats.max[zone])
+            assert np.isnan(stats.mean[zone])
+            assert np.isnan(stats.percentiles[:, zone]).all()
+
+
+def test_zonal_stats_no_values():
+    stats = zonal_stats(np.full(4, -1), np.ones(4), 2, (50,))
+    assert stats.cells.tolist() == [0, 0]
+    assert stats.count.tolist() == [0, 0]
+    assert np.isnan(stats.percentiles).all()
+
+
+def test_zonal_stats_shape_mismatch():
+    with pytest.raises(ValueError):
+        zonal_stats(np.zeros((2, 3), dtype=int), np.zeros((3, 2)), 1)